@@ -13,13 +13,2686 @@
 """
 
 import tkinter as tk
-from tkinter import ttk
+from tkinter import filedialog, ttk
+import argparse
+import asyncio
+import contextvars
+import cProfile
+import csv
+import hashlib
+import heapq
+import inspect
+import itertools
+import json
+import math
+import mmap
+import os
+import re
+import pstats
 import random
 import threading
 import time
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from datetime import datetime
+from statistics import NormalDist
+
+try:
+    import numpy as np  # Optional: vectorized population draws
+except ImportError:
+    np = None
+
+try:
+    import tomllib  # Python 3.11+: TOML scenario files
+except ImportError:
+    tomllib = None
+
+try:
+    import yaml  # Optional: YAML scenario files
+except ImportError:
+    yaml = None
+
+
+COLORS = {
+    'bg': '#1a1a2e',
+    'card': '#16213e',
+    'accent': '#0f3460',
+    'success': '#00b894',
+    'error': '#e74c3c',
+    'warning': '#f39c12',
+    'text': '#ffffff',
+    'text_dim': '#a0a0a0',
+    'blue': '#3498db',
+    'purple': '#9b59b6'
+}
+
+
+# ===== SERVER MODEL =====
+# Shared by the animated demos and the headless solvers below
+
+SERVER_CAPACITY = 50  # Max clients the server can handle smoothly
+DEFAULT_MAX_WAIT = 30  # Seconds: cap on any one backoff wait in the demos
+
+# (load ratio up to, failure rate) bands; calibrate_server() fits these to real logs
+FAILURE_CURVE = (
+    (0.5, 0.1),  # 10% failure - light load
+    (1.0, 0.3),  # 30% failure - normal load
+    (2.0, 0.6),  # 60% failure - heavy load
+    (4.0, 0.8),  # 80% failure - very heavy
+    (math.inf, 0.95)  # 95% failure - overloaded
+)
+
+
+def failure_rate_for_load(num_clients, server_load_modifier=0, server_capacity=SERVER_CAPACITY, curve=FAILURE_CURVE):
+    """
+    Calculate failure rate based on number of clients
+    More clients = higher failure rate
+    """
+    # Base failure rate depends on how overloaded the server is
+    load_ratio = num_clients / server_capacity
+    base_rate = next((rate for limit, rate in curve if load_ratio <= limit), curve[-1][1])
+    
+    # Apply modifier (for backoff recovery)
+    adjusted_rate = max(0.05, min(0.99, base_rate + server_load_modifier))
+    return adjusted_rate
+
+
+def server_load_for_clients(num_clients, server_capacity=SERVER_CAPACITY):
+    """Calculate server load percentage based on number of clients"""
+    load = (num_clients / server_capacity) * 50  # 50 clients = 50% load
+    return min(100, int(load))
+
+
+def next_demo_load(server_load, use_backoff):
+    """Load after one more attempt: backoff lets the server recover, retries pile on"""
+    if use_backoff:
+        return max(20, server_load - 15)
+    return min(100, server_load + 10)
+
+
+def demo_failure_rate(num_clients, server_load, use_backoff, server_capacity=SERVER_CAPACITY):
+    """Failure rate of a demo attempt made at the given server load"""
+    offset = 80 if use_backoff else 50
+    return failure_rate_for_load(num_clients, (server_load - offset) * 0.01, server_capacity)
+
+
+def capped_backoff(base_wait, attempt, max_wait=None):
+    """base_wait * 2^attempt, but never more than max_wait (None = no cap)"""
+    wait = base_wait * (2 ** attempt)
+    return wait if max_wait is None else min(wait, max_wait)
+
+
+def demo_wait_time(base_wait, attempt, use_backoff, max_wait=None):
+    """Wait before an attempt in the single-client demos"""
+    return capped_backoff(base_wait, attempt, max_wait) if use_backoff else 0.1
+
+
+# ===== EXACT ANALYSIS =====
+
+def solve_retry_outcome(num_clients, max_attempts, base_wait, use_backoff, server_capacity=SERVER_CAPACITY,
+                        max_wait=None):
+    """
+    Exact outcome of one single-client demo run by dynamic programming
+    
+    States are (attempt, server load) pairs holding the probability that the
+    client is still retrying. Load moves deterministically, so only a few
+    states are reachable per attempt and the whole solve takes microseconds.
+    """
+    states = {server_load_for_clients(num_clients, server_capacity): 1.0}
+    success_at = []
+    expected_wait = 0.0
+    
+    for attempt in range(max_attempts):
+        wait = demo_wait_time(base_wait, attempt, use_backoff, max_wait)
+        next_states = {}
+        succeeded = 0.0
+        
+        for load, prob in states.items():
+            expected_wait += prob * wait  # Every client still retrying waits first
+            load = next_demo_load(load, use_backoff)
+            failure_rate = demo_failure_rate(num_clients, load, use_backoff, server_capacity)
+            succeeded += prob * (1 - failure_rate)
+            next_states[load] = next_states.get(load, 0.0) + prob * failure_rate
+        
+        success_at.append(succeeded)
+        states = next_states
+    
+    exhausted = sum(states.values())
+    expected_attempts = sum((i + 1) * p for i, p in enumerate(success_at)) + max_attempts * exhausted
+    
+    return {
+        'use_backoff': use_backoff,
+        'success_probability': sum(success_at),
+        'exhausted_probability': exhausted,
+        'attempt_distribution': success_at,  # P(success on attempt i + 1)
+        'expected_attempts': expected_attempts,
+        'expected_total_wait': expected_wait
+    }
+
+
+def simulate_retry_outcome(num_clients, max_attempts, base_wait, use_backoff, rng=random, server_capacity=SERVER_CAPACITY,
+                           max_wait=None):
+    """Headless replay of one run_single_demo run: (attempts, succeeded, total_wait)"""
+    server_load = server_load_for_clients(num_clients, server_capacity)
+    total_wait = 0
+    
+    for attempt in range(max_attempts):
+        total_wait += demo_wait_time(base_wait, attempt, use_backoff, max_wait)
+        server_load = next_demo_load(server_load, use_backoff)
+        if rng.random() > demo_failure_rate(num_clients, server_load, use_backoff, server_capacity):
+            return attempt + 1, True, total_wait
+    
+    return max_attempts, False, total_wait
+
+
+def monte_carlo_retry_outcome(num_clients, max_attempts, base_wait, use_backoff, runs=10000, rng=None, server_capacity=SERVER_CAPACITY,
+                              max_wait=None):
+    """Monte Carlo estimate of solve_retry_outcome, for checking the stochastic engines"""
+    rng = rng or random.Random()
+    success_at = [0] * max_attempts
+    exhausted = 0
+    total_attempts = 0
+    total_wait = 0.0
+    
+    for _ in range(runs):
+        attempts, succeeded, wait = simulate_retry_outcome(num_clients, max_attempts, base_wait, use_backoff,
+                                                           rng, server_capacity, max_wait)
+        total_attempts += attempts
+        total_wait += wait
+        if succeeded:
+            success_at[attempts - 1] += 1
+        else:
+            exhausted += 1
+    
+    return {
+        'use_backoff': use_backoff,
+        'success_probability': (runs - exhausted) / runs,
+        'exhausted_probability': exhausted / runs,
+        'attempt_distribution': [count / runs for count in success_at],
+        'expected_attempts': total_attempts / runs,
+        'expected_total_wait': total_wait / runs
+    }
+
+
+# ===== POPULATION HISTOGRAM =====
+
+def jitter_arrival_histogram(num_clients, base, bucket_width=0.1, jitter=0.5, seed=None):
+    """
+    Bin the retry times of all clients in one jitter round
+    
+    Every client retries at base + uniform(0, base * jitter), so the counts
+    cover that window in bucket_width slices. Without jitter all num_clients
+    land in a single bucket. Uses numpy when installed (1M clients in ms).
+    """
+    window = base * jitter
+    buckets = max(1, math.ceil(window / bucket_width))
+    
+    if np is not None:
+        offsets = np.random.default_rng(seed).uniform(0, window, num_clients)
+        index = np.minimum((offsets / bucket_width).astype(np.int64), buckets - 1)
+        return np.bincount(index, minlength=buckets).tolist()
+    
+    rng = random.Random(seed)
+    counts = [0] * buckets
+    scale = window / bucket_width
+    for _ in range(num_clients):
+        counts[min(buckets - 1, int(rng.random() * scale))] += 1
+    return counts
+
+
+# ===== WORKLOADS =====
+# Generators yielding client arrival times in seconds (ascending).
+# The simulation pulls them one at a time, so nothing is materialized.
+
+def burst_arrivals(num_clients, at=0.0):
+    """All clients arrive at once - what every demo assumes"""
+    for _ in range(num_clients):
+        yield at
+
+
+def poisson_arrivals(rate, horizon=None, seed=None, start=0.0):
+    """Poisson arrivals at `rate` clients per second (none at all for a rate of 0)"""
+    if rate <= 0:
+        return
+    rng = random.Random(seed)
+    now = start
+    while True:
+        now += rng.expovariate(rate)
+        if horizon is not None and now > horizon:
+            return
+        yield now
+
+
+def rate_arrivals(rate_at, max_rate, horizon=None, seed=None):
+    """
+    Non-homogeneous Poisson arrivals by thinning
+    
+    rate_at(t) gives the arrival rate at time t and must never exceed max_rate.
+    """
+    rng = random.Random(seed)
+    for now in poisson_arrivals(max_rate, horizon, rng.random()):
+        if rng.random() * max_rate <= rate_at(now):
+            yield now
+
+
+def on_off_arrivals(rate, on_time, off_time, horizon=None, seed=None):
+    """Bursts at `rate` for on_time seconds, then silence for off_time seconds"""
+    period = on_time + off_time
+    return rate_arrivals(lambda t: rate if t % period < on_time else 0.0, rate, horizon, seed)
+
+
+def step_spike_arrivals(base_rate, spike_rate, spike_start, spike_duration, horizon=None, seed=None):
+    """Steady base_rate with one spike_rate step between spike_start and spike_start + spike_duration"""
+    def rate_at(t):
+        return spike_rate if spike_start <= t < spike_start + spike_duration else base_rate
+    return rate_arrivals(rate_at, max(base_rate, spike_rate), horizon, seed)
+
+
+def diurnal_arrivals(mean_rate, period=86400.0, amplitude=0.5, horizon=None, seed=None):
+    """Sinusoidal day/night traffic around mean_rate"""
+    def rate_at(t):
+        return mean_rate * (1 + amplitude * math.sin(2 * math.pi * t / period))
+    return rate_arrivals(rate_at, mean_rate * (1 + amplitude), horizon, seed)
+
+
+def parse_timestamp(value):
+    """Seconds from a unix time, ISO 8601 or access log ([10/Oct/2000:13:55:36 -0700]) stamp, None if neither"""
+    value = value.strip().strip("[]")
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    for parse in (datetime.fromisoformat, lambda text: datetime.strptime(text, "%d/%b/%Y:%H:%M:%S %z")):
+        try:
+            return parse(value).timestamp()
+        except ValueError:
+            pass
+    return None
+
+
+def trace_arrivals(path, column=0, speedup=1.0, horizon=None):
+    """
+    Replay arrivals from a CSV of timestamps, one row at a time
+    
+    Timestamps may be seconds (e.g. unix time) or ISO 8601 dates and must be
+    sorted. They are shifted so the first row arrives at t=0. A header row
+    is skipped.
+    """
+    first = None
+    with open(path, newline='') as f:
+        for row in csv.reader(f):
+            if not row or len(row) <= column:
+                continue
+            stamp = parse_timestamp(row[column])
+            if stamp is None:
+                continue  # Header or junk line
+            if first is None:
+                first = stamp
+            now = (stamp - first) / speedup
+            if horizon is not None and now > horizon:
+                return
+            yield now
+
+
+def sample_arrivals(arrivals, k, seed=None):
+    """
+    Uniform sample of at most `k` arrival times, pulled one at a time
+    
+    Reservoir sampling: memory stays at `k` however long the workload runs.
+    """
+    rng = random.Random(seed)
+    sample = []
+    for i, arrival in enumerate(arrivals):
+        if i < k:
+            sample.append(arrival)
+        else:
+            j = rng.randrange(i + 1)
+            if j < k:
+                sample[j] = arrival
+    return sample
+
+
+# ===== QUANTILE SKETCHES =====
+
+class QuantileSketch:
+    """
+    Streaming KLL quantile sketch with bounded memory
+    
+    Values go into level 0; a full level is sorted and every other value
+    (random offset) moves up one level at twice the weight. It never holds
+    more than about 3*k values (600 with the default k=200) however many
+    are added, and any quantile
+    is within about +-1.65% of its true rank with 99% confidence (Karnin,
+    Lang & Liberty 2016). Sketches of the same k merge into one with the same
+    bound, and round-trip through to_dict() for JSON results. min, max,
+    count and mean are exact.
+    """
+    
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.rng = random.Random(seed)
+        self.levels = [[]]
+        self.held = 0
+        self.limit = self.capacity(0)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+    
+    def capacity(self, level):
+        """How many values a level holds before it compacts - smaller further down"""
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+    
+    def add(self, value):
+        """Add one value"""
+        self.levels[0].append(value)
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.held += 1
+        if self.held >= self.limit:
+            self.compact()
+    
+    def compact(self):
+        """Halve the lowest full levels, pushing survivors up, until back under the limit"""
+        for level in range(len(self.levels)):
+            items = self.levels[level]
+            if len(items) < self.capacity(level):
+                continue
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+                self.limit = sum(self.capacity(h) for h in range(len(self.levels)))
+            items.sort()
+            keep = items.pop() if len(items) % 2 else None  # Odd one out stays behind
+            self.levels[level + 1].extend(items[self.rng.randrange(2)::2])
+            self.levels[level] = [] if keep is None else [keep]
+            self.held = self.size()
+            if self.held < self.limit:
+                break
+    
+    def merge(self, other):
+        """Fold another sketch into this one"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.limit = sum(self.capacity(h) for h in range(len(self.levels)))
+        self.held = self.size()
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        while self.held >= self.limit:
+            self.compact()
+        return self
+    
+    def quantile(self, q):
+        """Value at fraction q of the way through the data, 0.0 if empty"""
+        if not self.count:
+            return 0.0
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        weighted = sorted((value, 1 << level) for level, items in enumerate(self.levels) for value in items)
+        target = q * sum(weight for _, weight in weighted)
+        seen = 0
+        for value, weight in weighted:
+            seen += weight
+            if seen >= target:
+                return value
+        return self.max
+    
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+    
+    def size(self):
+        """Values actually held"""
+        return sum(len(items) for items in self.levels)
+    
+    def to_dict(self):
+        return {'k': self.k, 'count': self.count, 'total': self.total,
+                'min': self.min if self.count else None, 'max': self.max if self.count else None,
+                'levels': self.levels}
+    
+    @classmethod
+    def from_dict(cls, data, seed=None):
+        sketch = cls(data['k'], seed)
+        sketch.levels = [list(items) for items in data['levels']]
+        sketch.limit = sum(sketch.capacity(h) for h in range(len(sketch.levels)))
+        sketch.held = sketch.size()
+        sketch.count = data['count']
+        sketch.total = data['total']
+        if sketch.count:
+            sketch.min = data['min']
+            sketch.max = data['max']
+        return sketch
+
+
+def merge_sketches(sketches):
+    """One sketch from many (objects or to_dict() output), e.g. from shards or sweep workers"""
+    merged = None
+    for sketch in sketches:
+        if isinstance(sketch, dict):
+            sketch = QuantileSketch.from_dict(sketch)
+        merged = QuantileSketch(sketch.k).merge(sketch) if merged is None else merged.merge(sketch)
+    return merged or QuantileSketch()
+
+
+# ===== POPULATION SIMULATION =====
+
+POPULATION_HORIZON = 30  # Seconds of arrivals in the population demo
+FAULT_HORIZON = 90  # Seconds of arrivals in the fault injection demo
+CLIENT_TIMEOUT = 1.0  # Seconds a client waits for an answer in the timeout demo
+CRN_REPLICATIONS = 20  # Replications in the N-way comparison demo
+TAIL_RUNS = 20000  # Sampled clients per policy in the rare-event demo
+ADAPTIVE_DURATION = 60  # Seconds of the adaptive concurrency demo
+CHAIN_HOPS = 3  # Services a request passes through in the deadline demo
+CHAIN_DEADLINE = 8.0  # Seconds: end-to-end budget and SLO in the deadline demo
+COALESCE_KEYS = 20  # Distinct hot keys requested in the coalescing demo
+
+class ServiceTime:
+    """
+    How long the server works on one attempt
+    
+    `mean` is in seconds; `sigma` is the spread of the lognormal, which gives
+    the long tail real request durations have.
+    """
+    
+    DISTRIBUTIONS = ("constant", "exponential", "lognormal")
+    
+    def __init__(self, distribution="lognormal", mean=0.2, sigma=0.8):
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown service time distribution '{distribution}'")
+        self.distribution = distribution
+        self.mean = mean
+        self.sigma = sigma
+    
+    def sample(self, rng):
+        """Seconds of work for one attempt on an idle server"""
+        if self.distribution == "constant":
+            return self.mean
+        if self.distribution == "exponential":
+            return rng.expovariate(1 / self.mean)
+        # mu chosen so the distribution's mean is self.mean
+        return rng.lognormvariate(math.log(self.mean) - self.sigma ** 2 / 2, self.sigma)
+    
+    def quantile(self, q):
+        """Duration that a fraction q of attempts finish within on an idle server"""
+        if self.distribution == "constant":
+            return self.mean
+        if self.distribution == "exponential":
+            return -self.mean * math.log(1 - q)
+        return math.exp(math.log(self.mean) - self.sigma ** 2 / 2 + self.sigma * NormalDist().inv_cdf(q))
+
+
+class ServerModel:
+    """
+    Shared server for the population simulation
+    
+    Load is the number of attempts seen in the last `window` seconds, and each
+    attempt fails with the same failure curve the demos use at that load.
+    Failures over capacity come back as 429/503 with a Retry-After hint.
+    An optional FaultTimeline takes capacity away over time, and an optional
+    ServiceTime makes attempts take time instead of answering instantly.
+    `curve` replaces the default failure bands, e.g. with ones fitted to
+    real access logs by calibrate_server().
+    
+    With `coalesce_keys` set, each attempt asks for one of that many keys and
+    joins an execution already in flight for the same key instead of
+    starting its own - the answer is shared and no new work is done.
+    
+    With `admission` set, the server stops taking on everything: attempts
+    wait in a queue it drains at `capacity` per second, and the
+    AdmissionControl sheds the ones it won't queue with a 503 up front.
+    """
+    
+    def __init__(self, capacity=SERVER_CAPACITY, window=1.0, faults=None, service=None, coalesce_keys=None,
+                 curve=FAILURE_CURVE, admission=None):
+        self.capacity = capacity
+        self.window = window
+        self.curve = curve
+        self.faults = faults
+        self.service = service
+        self.coalesce_keys = coalesce_keys
+        self.recent = deque()
+        self.inflight = {}  # key -> (end, status, Retry-After) of the execution serving it
+        self.coalesced = 0
+        self.admission = admission
+        self.queue = AdmissionQueue() if admission is not None else None
+        self.shed = 0  # Attempts turned away by admission control
+    
+    def load(self, now):
+        """Attempts per second over the last window"""
+        while self.recent and self.recent[0] <= now - self.window:
+            self.recent.popleft()
+        return len(self.recent) / self.window
+    
+    def capacity_at(self, now):
+        """Capacity left over by the faults at `now`"""
+        if self.faults is None:
+            return self.capacity
+        return self.capacity * self.faults.capacity_factor(now)
+    
+    def handle(self, now, rng):
+        """Serve one attempt: (status code, Retry-After seconds or None)"""
+        self.recent.append(now)
+        load = self.load(now)
+        
+        capacity = self.capacity_at(now)
+        if capacity <= 0:
+            return 503, None  # Hard down, nobody there to send a hint
+        
+        return self.respond(load, capacity, rng.random() <= failure_rate_for_load(load, 0, capacity, self.curve))
+    
+    def respond(self, load, capacity, failed):
+        """Status code and Retry-After for an attempt that did or didn't fail at this load"""
+        if not failed:
+            return 200, None
+        
+        load_ratio = load / capacity
+        if load_ratio <= 1.0:
+            return 500, None  # Plain error, nothing to hint
+        
+        # Whole seconds until the excess has drained, like a real Retry-After header
+        retry_after = math.ceil(self.window * (load_ratio - 1))
+        return (429 if load_ratio <= 2.0 else 503), retry_after
+    
+    def service_time(self, now, status, rng):
+        """
+        Seconds the server spends on an attempt it answered with `status`
+        
+        Shed attempts (429/503) are rejected before any work is done. The
+        rest queue behind each other once load passes capacity, so their
+        time stretches by the overload ratio.
+        """
+        if self.service is None or status in (429, 503):
+            return 0.0
+        capacity = self.capacity_at(now)
+        slowdown = max(1.0, self.load(now) / capacity) if capacity > 0 else 1.0
+        return self.service.sample(rng) * slowdown
+    
+    def enqueue(self, now, rng, priority=0):
+        """
+        Admit or shed one attempt: (status, Retry-After, seconds until the answer, seconds of new work)
+        
+        The queue is fluid: it drains at capacity between arrivals, so an
+        admitted attempt's queue delay is known the moment it arrives.
+        Admitted attempts fail along the curve at the load the server
+        actually works at, which the queue holds to capacity at most.
+        """
+        self.recent.append(now)
+        capacity = self.capacity_at(now)
+        if capacity <= 0:
+            return 503, None, 0.0, 0.0
+        
+        queue = self.queue
+        queue.backlog = max(0.0, queue.backlog - (now - queue.drained_at) * capacity)
+        queue.drained_at = now
+        admitted, delay = self.admission.admit(queue, now, capacity, self.load(now), priority, rng)
+        if not admitted:
+            self.shed += 1
+            return 503, max(1, math.ceil(queue.backlog / capacity)), delay, 0.0
+        
+        queue.backlog += 1
+        queue.accepted.append(now)
+        while queue.accepted[0] <= now - self.window:
+            queue.accepted.popleft()
+        load = min(capacity, len(queue.accepted) / self.window)
+        failed = rng.random() <= failure_rate_for_load(load, 0, capacity, self.curve)
+        status, retry_after = self.respond(load, capacity, failed)
+        work = self.service.sample(rng) if self.service is not None else 0.0
+        return status, retry_after, delay + work, work
+    
+    def serve(self, now, rng, priority=0):
+        """
+        One attempt end to end: (status, Retry-After, seconds until the answer, seconds of new work)
+        
+        `priority` only matters to admission control: 0 is the most
+        important, higher numbers are shed first.
+        """
+        if self.coalesce_keys:
+            key = rng.randrange(self.coalesce_keys)
+            shared = self.inflight.get(key)
+            if shared is not None and shared[0] > now:
+                end, status, retry_after = shared
+                self.coalesced += 1
+                return status, retry_after, end - now, 0.0
+        
+        if self.admission is not None:
+            status, retry_after, service, work = self.enqueue(now, rng, priority)
+        else:
+            status, retry_after = self.handle(now, rng)
+            service = work = self.service_time(now, status, rng)
+        if self.coalesce_keys and service > 0:
+            self.inflight[key] = (now + service, status, retry_after)
+        return status, retry_after, service, work
+
+
+class RetryPolicy:
+    """How a client spaces its retries"""
+    
+    def __init__(self, name, base_wait=1.0, max_attempts=5, backoff=True, jitter=0.0, retry_after=None,
+                 timeout=None, hedge_after=None, max_wait=None, deadline=None):
+        self.name = name
+        self.base_wait = base_wait
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.jitter = jitter  # Extra random wait as a fraction of the base
+        self.retry_after = retry_after  # None = ignore hints, 'max' or 'min' = blend with own schedule
+        self.timeout = timeout  # Seconds before the client abandons an attempt, None = wait forever
+        self.hedge_after = hedge_after  # Send a second copy if no answer after this long, None = never
+        self.max_wait = max_wait  # Cap on any one wait, jitter included, None = no cap
+        self.deadline = deadline  # Seconds from the first attempt that all retries must fit in, None = no budget
+    
+    def wait(self, attempt, rng, retry_after=None):
+        """Wait after failed attempt number `attempt` (0-based), given the server's hint"""
+        base = self.base_wait * (2 ** attempt) if self.backoff else self.base_wait
+        if self.jitter:
+            base += rng.uniform(0, base * self.jitter)
+        if self.max_wait is not None:
+            base = min(base, self.max_wait)
+        
+        if retry_after is None or self.retry_after is None:
+            return base
+        if self.retry_after == 'max':
+            return max(base, retry_after)  # Never sooner than the server asked
+        return min(base, retry_after)  # Whichever is sooner - may come back before the server asked
+    
+    def deadline_at(self, start):
+        """When a request first sent at `start` runs out of budget"""
+        return math.inf if self.deadline is None else start + self.deadline
+
+
+def standard_policies(base_wait, max_attempts, max_wait=None):
+    """The strategies the demos compare"""
+    return [
+        RetryPolicy("No Backoff", 0.1, max_attempts, backoff=False),
+        RetryPolicy("Backoff", base_wait, max_attempts, max_wait=max_wait),
+        RetryPolicy("Backoff + Jitter", base_wait, max_attempts, jitter=0.5, max_wait=max_wait),
+        RetryPolicy("Retry-After", base_wait, max_attempts, jitter=0.5, retry_after='max', max_wait=max_wait)
+    ]
+
+
+class PopulationSimulation:
+    """
+    Discrete-event simulation of many clients retrying against one server
+    
+    Arrivals are pulled from the workload generator only when the clock
+    reaches them and finished clients are forgotten, so memory follows the
+    number of clients still retrying, not the length of the run.
+    """
+    
+    def __init__(self, workload, policy, server=None, horizon=None, seed=None, common_random=False):
+        self.workload = iter(workload)
+        self.policy = policy
+        self.server = server or ServerModel()
+        self.horizon = horizon  # No new arrivals after this time
+        # Common random numbers: each client's n-th attempt gets the same draws under every policy
+        self.common_random = common_random
+        self.rng = CounterRandom(seed) if common_random else random.Random(seed)
+        self.now = 0.0
+        self.events = []  # Heap of (time, seq, client, arrived_at, attempt, copy a hedge races or None)
+        self.seq = itertools.count()
+        self.next_arrival = None
+        self.pull_arrival()
+        
+        self.clients = 0
+        self.succeeded = 0
+        self.gave_up = 0
+        self.attempts = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        # Distributions in bounded memory, however many clients come through
+        self.sketches = {name: QuantileSketch(seed=seed) for name in ("latency", "attempts", "wait")}
+        self.last_done = 0.0  # When the last client succeeded or gave up
+        self.status_counts = {}
+        self.timeouts = 0
+        self.busy_time = 0.0  # Server seconds spent on attempts
+        self.wasted_work = 0.0  # ...of which after the client had already timed out
+        self.hedges = 0
+        self.deadline_drops = 0  # Retries not sent because they could not finish within the deadline
+        self.slo_misses = 0  # Clients that gave up or finished after the deadline
+        self.timeline = []  # Per second: [attempts, successes]
+    
+    def pull_arrival(self):
+        """Fetch the next arrival from the workload"""
+        arrival = next(self.workload, None)
+        if arrival is not None and self.horizon is not None and arrival > self.horizon:
+            arrival = None
+        self.next_arrival = arrival
+    
+    def finished(self):
+        """True once every client has succeeded or given up"""
+        return not self.events and self.next_arrival is None
+    
+    def advance(self, until):
+        """Process every event up to simulated time `until`"""
+        while True:
+            arrival = self.next_arrival
+            if self.events and (arrival is None or self.events[0][0] <= arrival):
+                if self.events[0][0] > until:
+                    break
+                when, _, client, arrived_at, attempt, first = heapq.heappop(self.events)
+            elif arrival is not None:
+                if arrival > until:
+                    break
+                when, client, arrived_at, attempt, first = arrival, self.admit(), arrival, 0, None
+                self.pull_arrival()
+            else:
+                break
+            
+            self.now = when
+            self.attempt(when, client, arrived_at, attempt, first)
+        
+        self.now = max(self.now, until)
+    
+    def run(self):
+        """Run until every client is done and return the results"""
+        self.advance(math.inf)
+        return self.results()
+    
+    def admit(self):
+        """Number the client arriving now"""
+        self.clients += 1
+        return self.clients - 1
+    
+    def policy_for(self, client):
+        """How this client retries - the same for everyone here"""
+        return self.policy
+    
+    def client_done(self, client, attempts, latency):
+        """Called once per client when it succeeds (latency in seconds) or gives up (latency None)"""
+    
+    def priority_for(self, client, attempt):
+        """Priority of an attempt for the server's admission control: first tries outrank retries"""
+        return 0 if attempt == 0 else 1
+    
+    def attempt(self, now, client, arrived_at, attempt, first=None):
+        """One client attempt hitting the server; `first` is the copy a hedge races against"""
+        if self.common_random:
+            self.rng.at(client, attempt, 0 if first is None else 1)
+        self.attempts += 1
+        self.timeline_slot(now)[0] += 1
+        policy = self.policy_for(client)
+        
+        status, retry_after, wait, work = self.server.serve(now, self.rng, self.priority_for(client, attempt))
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        copy = (now, status, retry_after, wait, work)
+        
+        hedge_after = policy.hedge_after
+        if first is None and hedge_after is not None and self.answered(copy, policy)[0] > now + hedge_after:
+            # Still waiting at the hedge delay: send a second copy then and take whichever answers first
+            heapq.heappush(self.events, (now + hedge_after, next(self.seq), client, arrived_at, attempt, copy))
+            return
+        if first is not None:
+            self.hedges += 1
+        
+        done, status, retry_after = self.settle([copy] if first is None else [first, copy], policy)
+        if status == 200:
+            latency = done - arrived_at
+            self.succeeded += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            self.sketches['latency'].add(latency)
+            self.sketches['attempts'].add(attempt + 1)
+            self.last_done = max(self.last_done, done)
+            self.timeline_slot(done)[1] += 1
+            if done > policy.deadline_at(arrived_at):
+                self.slo_misses += 1
+            self.client_done(client, attempt + 1, latency)
+            return
+        
+        if attempt + 1 < policy.max_attempts:
+            wait = policy.wait(attempt, self.rng, retry_after)
+            if done + wait < policy.deadline_at(arrived_at):
+                self.sketches['wait'].add(wait)
+                heapq.heappush(self.events, (done + wait, next(self.seq), client, arrived_at, attempt + 1, None))
+                return
+            self.deadline_drops += 1  # The retry would start after the caller stopped waiting
+        
+        self.gave_up += 1
+        self.slo_misses += 1
+        self.sketches['attempts'].add(attempt + 1)
+        self.last_done = max(self.last_done, done)
+        self.client_done(client, attempt + 1, None)
+    
+    def answered(self, copy, policy):
+        """(time, status, Retry-After) the client sees for one copy - no status if it timed out"""
+        start, status, retry_after, wait, _ = copy
+        timeout = policy.timeout
+        if timeout is not None and wait > timeout:
+            return start + timeout, None, None
+        return start + wait, status, retry_after
+    
+    def settle(self, copies, policy):
+        """
+        Book the server work of one or two racing copies and return the answer kept
+        
+        The earliest success wins and the other copy is cancelled when it
+        arrives. Without a success the client waits for every copy. Work
+        still running after the client timed out is wasted.
+        """
+        answers = [self.answered(copy, policy) for copy in copies]
+        wins = [answer for answer in answers if answer[1] == 200]
+        kept = min(wins, key=lambda answer: answer[0]) if wins else max(answers, key=lambda answer: answer[0])
+        
+        timeout = policy.timeout
+        for start, _, _, wait, work in copies:
+            if wins and start + wait > kept[0]:
+                work = min(work, kept[0] - start)  # Cancelled once the winner answered
+            elif timeout is not None and wait > timeout:
+                self.timeouts += 1
+                self.wasted_work += max(0.0, work - timeout)
+            self.busy_time += work
+        return kept
+    
+    def timeline_slot(self, now):
+        """[attempts, successes] counters for the second containing `now`"""
+        index = int(now)
+        while len(self.timeline) <= index:
+            self.timeline.append([0, 0])
+        return self.timeline[index]
+    
+    def results(self):
+        """Summary of the run so far"""
+        finished = self.succeeded + self.gave_up
+        return {
+            'policy': self.policy.name,
+            'clients': self.clients,
+            'succeeded': self.succeeded,
+            'gave_up': self.gave_up,
+            'attempts': self.attempts,
+            'success_rate': self.succeeded / finished if finished else 0.0,
+            'amplification': self.attempts / self.clients if self.clients else 0.0,
+            'mean_latency': self.total_latency / self.succeeded if self.succeeded else 0.0,
+            'max_latency': self.max_latency,
+            'p50_latency': self.sketches['latency'].quantile(0.5),
+            'p99_latency': self.sketches['latency'].quantile(0.99),
+            'p99_wait': self.sketches['wait'].quantile(0.99),
+            'peak_load': max((second[0] for second in self.timeline), default=0),
+            'drain_time': self.last_done,
+            'goodput': self.succeeded / self.last_done if self.last_done else float(self.succeeded),
+            'status_counts': dict(self.status_counts),
+            'timeouts': self.timeouts,
+            'busy_time': self.busy_time,
+            'wasted_work': self.wasted_work,
+            'wasted_fraction': self.wasted_work / self.busy_time if self.busy_time else 0.0,
+            'hedges': self.hedges,
+            'deadline_drops': self.deadline_drops,
+            'slo_misses': self.slo_misses,
+            'slo_miss_rate': self.slo_misses / finished if finished else 0.0,
+            'coalesced': self.server.coalesced,
+            'shed': self.server.shed,
+            'shed_rate': self.server.shed / self.attempts if self.attempts else 0.0,
+            # Executions the server ran beyond one per client
+            'extra_load': (self.attempts - self.server.coalesced) / self.clients - 1 if self.clients else 0.0,
+            'duration': self.now if math.isfinite(self.now) else len(self.timeline),
+            'timeline': self.timeline,
+            'sketches': {name: sketch.to_dict() for name, sketch in self.sketches.items()}
+        }
+
+
+def compare_policies(make_workload, policies, make_server=ServerModel, horizon=None, seed=None):
+    """Run each policy against an identical workload and server"""
+    return [PopulationSimulation(make_workload(), policy, make_server(), horizon, seed).run()
+            for policy in policies]
+
+
+# ===== FAULT INJECTION =====
+
+class FaultTimeline:
+    """
+    Scripted server faults
+    
+    Each fault scales server capacity by a factor for a while (0 = outage)
+    and can ramp back to full capacity over `recovery` seconds afterwards.
+    """
+    
+    def __init__(self):
+        self.faults = []  # (start, end, factor, recovery, label)
+    
+    def outage(self, start, duration):
+        """Server completely down"""
+        self.faults.append((start, start + duration, 0.0, 0.0, "outage"))
+        return self
+    
+    def brownout(self, start, duration, capacity_fraction, recovery=0.0):
+        """Capacity drops to capacity_fraction, then recovers linearly over `recovery` seconds"""
+        self.faults.append((start, start + duration, capacity_fraction, recovery, "brownout"))
+        return self
+    
+    def capacity_factor(self, now):
+        """Fraction of normal capacity available at `now`"""
+        factor = 1.0
+        for start, end, level, recovery, _ in self.faults:
+            if start <= now < end:
+                factor = min(factor, level)
+            elif end <= now < end + recovery:
+                factor = min(factor, level + (1 - level) * (now - end) / recovery)
+        return factor
+    
+    def cleared_at(self):
+        """When the last fault, including its recovery ramp, is over"""
+        return max((end + recovery for _, end, _, recovery, _ in self.faults), default=0.0)
+    
+    def windows(self):
+        """(start, end, label) of every fault and recovery ramp, for drawing"""
+        for start, end, _, recovery, label in self.faults:
+            yield start, end, label
+            if recovery:
+                yield end, end + recovery, "recovery"
+
+
+def default_fault_timeline():
+    """The scripted incident of the fault demo: outage, brownout, slow recovery"""
+    return FaultTimeline().outage(10, 5).brownout(15, 10, 0.4, recovery=15)
+
+
+def recovery_report(result, capacity, cleared_at, horizon, settle=5):
+    """
+    How long a policy's offered load stays above capacity once the faults end
+    
+    Recovered means `settle` seconds in a row at or under capacity while
+    arrivals are still coming. If that never happens the run is metastable:
+    retries alone keep the server overloaded after the trigger is gone.
+    """
+    timeline = result['timeline']
+    calm = 0
+    for second in range(int(math.ceil(cleared_at)), int(horizon)):
+        attempts = timeline[second][0] if second < len(timeline) else 0
+        calm = calm + 1 if attempts <= capacity else 0
+        if calm == settle:
+            recovered_at = second - settle + 1
+            return {'metastable': False, 'recovered_at': recovered_at, 'time_to_recover': recovered_at - cleared_at}
+    return {'metastable': True, 'recovered_at': None, 'time_to_recover': None}
+
+
+def run_fault_scenario(rate, faults, policies, capacity=SERVER_CAPACITY, horizon=FAULT_HORIZON, seed=None):
+    """Poisson traffic through a fault timeline, one result (with recovery report) per policy"""
+    results = compare_policies(lambda: poisson_arrivals(rate, horizon, seed), policies,
+                               lambda: ServerModel(capacity, faults=faults), horizon, seed)
+    for result in results:
+        result.update(recovery_report(result, capacity, faults.cleared_at(), horizon))
+    return results
+
+
+# ===== DEADLINE BUDGETS =====
+
+class CallFrame:
+    """One caller's call to the next hop, across all of its retries"""
+    
+    __slots__ = ("hop", "parent", "root", "start", "deadline", "attempt", "done")
+    
+    def __init__(self, hop, parent, start, deadline):
+        self.hop = hop
+        self.parent = parent  # The call this one serves, None for the client's own
+        self.root = parent.root if parent is not None else self
+        self.start = start
+        self.deadline = deadline
+        self.attempt = 0
+        self.done = False
+
+
+class CallChainSimulation:
+    """
+    Requests through a chain of services, each retrying its call to the next
+    
+    The client calls hop 0, which does its work and calls hop 1, and so on.
+    Every caller retries with the same policy, so retries multiply down the
+    chain, and gives up on a call once its deadline budget is spent. With
+    `propagate`, the caller's deadline travels with the call: hops turn away
+    requests whose deadline has passed and nobody retries past it. Without
+    it every hop starts a fresh budget and keeps working for callers that
+    have already given up.
+    
+    A request misses its SLO if it fails or takes longer than `slo`
+    seconds (default: the policy's deadline).
+    """
+    
+    def __init__(self, workload, policy, servers, horizon=None, seed=None, propagate=False, slo=None):
+        self.workload = iter(workload)
+        self.policy = policy
+        self.servers = servers
+        self.server = servers[-1]  # The deepest hop, where amplification piles up
+        self.horizon = horizon
+        self.propagate = propagate
+        self.slo = slo if slo is not None else policy.deadline
+        self.rng = random.Random(seed)
+        self.now = 0.0
+        self.events = []  # Heap of (time, seq, handler, frame, succeeded, Retry-After)
+        self.seq = itertools.count()
+        self.next_arrival = None
+        self.pull_arrival()
+        
+        self.clients = 0
+        self.succeeded = 0
+        self.slo_misses = 0
+        self.attempts = 0
+        self.hop_attempts = [0] * len(servers)
+        self.orphan_attempts = 0  # Attempts made after the client had already given up
+        self.expired_drops = 0  # Attempts turned away because their propagated deadline had passed
+        self.deadline_drops = 0  # Retries not sent because they could not finish in time
+        self.busy_time = 0.0
+        self.wasted_work = 0.0
+        self.latency = QuantileSketch(seed=seed)
+        self.timeline = []  # Per second: [attempts at the deepest hop, client successes]
+    
+    def pull_arrival(self):
+        """Fetch the next arrival from the workload"""
+        arrival = next(self.workload, None)
+        if arrival is not None and self.horizon is not None and arrival > self.horizon:
+            arrival = None
+        self.next_arrival = arrival
+    
+    def finished(self):
+        """True once every request has succeeded or given up and nothing is left in flight"""
+        return not self.events and self.next_arrival is None
+    
+    def advance(self, until):
+        """Process every event up to simulated time `until`"""
+        while True:
+            arrival = self.next_arrival
+            if self.events and (arrival is None or self.events[0][0] <= arrival):
+                if self.events[0][0] > until:
+                    break
+                self.now, _, handler, frame, succeeded, retry_after = heapq.heappop(self.events)
+                handler(self.now, frame, succeeded, retry_after)
+            elif arrival is not None:
+                if arrival > until:
+                    break
+                self.now = arrival
+                self.clients += 1
+                self.pull_arrival()
+                self.call(arrival, CallFrame(0, None, arrival, self.policy.deadline_at(arrival)))
+            else:
+                break
+        
+        self.now = max(self.now, until)
+    
+    def run(self):
+        """Run until every request is done and return the results"""
+        self.advance(math.inf)
+        return self.results()
+    
+    def schedule(self, when, handler, frame, succeeded=None, retry_after=None):
+        heapq.heappush(self.events, (when, next(self.seq), handler, frame, succeeded, retry_after))
+    
+    def call(self, now, frame):
+        """Start a call: its first attempt now, and the caller's give-up timer"""
+        if math.isfinite(frame.deadline):
+            self.schedule(frame.deadline, self.expire, frame)
+        self.schedule(now, self.send, frame)
+    
+    def send(self, now, frame, *_):
+        """An attempt of `frame` reaching its hop"""
+        if self.propagate and now >= frame.deadline:
+            self.expired_drops += 1  # Nobody is waiting for this any more, don't start it
+            self.reply(now, frame, False)
+            return
+        
+        self.attempts += 1
+        self.hop_attempts[frame.hop] += 1
+        if frame.hop == len(self.servers) - 1:
+            self.timeline_slot(now)[0] += 1
+        status, retry_after, wait, work = self.servers[frame.hop].serve(now, self.rng)
+        self.busy_time += work
+        if frame.root.done:
+            self.orphan_attempts += 1
+            self.wasted_work += work
+        
+        if status != 200 or frame.hop == len(self.servers) - 1:
+            self.schedule(now + wait, self.reply, frame, status == 200, retry_after)
+            return
+        
+        # This hop did its part, now it calls the next one on its own budget - or what's left of the caller's
+        done = now + wait
+        deadline = self.policy.deadline_at(done)
+        if self.propagate:
+            deadline = min(deadline, frame.deadline)
+        self.call(done, CallFrame(frame.hop + 1, frame, done, deadline))
+    
+    def reply(self, now, frame, succeeded, retry_after=None):
+        """The answer to the latest attempt of `frame` reaching its caller"""
+        if frame.done:
+            return  # The caller gave up on it already
+        if not succeeded and frame.attempt + 1 < self.policy.max_attempts:
+            wait = self.policy.wait(frame.attempt, self.rng, retry_after)
+            if now + wait < frame.deadline:
+                frame.attempt += 1
+                self.schedule(now + wait, self.send, frame)
+                return
+            self.deadline_drops += 1
+        self.finish(now, frame, succeeded)
+    
+    def expire(self, now, frame, *_):
+        """The caller's deadline for `frame` ran out"""
+        if not frame.done:
+            self.finish(now, frame, False)
+    
+    def finish(self, now, frame, succeeded):
+        """Settle a call and pass the outcome up to whoever is waiting on it"""
+        frame.done = True
+        if frame.parent is not None:
+            self.reply(now, frame.parent, succeeded)
+            return
+        if succeeded:
+            self.succeeded += 1
+            self.latency.add(now - frame.start)
+            self.timeline_slot(now)[1] += 1
+        if not succeeded or (self.slo is not None and now - frame.start > self.slo):
+            self.slo_misses += 1
+    
+    def timeline_slot(self, now):
+        """[attempts, successes] counters for the second containing `now`"""
+        index = int(now)
+        while len(self.timeline) <= index:
+            self.timeline.append([0, 0])
+        return self.timeline[index]
+    
+    def results(self):
+        """Summary of the run so far"""
+        return {
+            'policy': self.policy.name,
+            'clients': self.clients,
+            'succeeded': self.succeeded,
+            'success_rate': self.succeeded / self.clients if self.clients else 0.0,
+            'slo_misses': self.slo_misses,
+            'slo_miss_rate': self.slo_misses / self.clients if self.clients else 0.0,
+            'attempts': self.attempts,
+            'hop_attempts': list(self.hop_attempts),
+            'amplification': self.attempts / self.clients if self.clients else 0.0,
+            'orphan_attempts': self.orphan_attempts,
+            'expired_drops': self.expired_drops,
+            'deadline_drops': self.deadline_drops,
+            'busy_time': self.busy_time,
+            'wasted_work': self.wasted_work,
+            'wasted_fraction': self.wasted_work / self.busy_time if self.busy_time else 0.0,
+            'p50_latency': self.latency.quantile(0.5),
+            'p99_latency': self.latency.quantile(0.99),
+            'peak_load': max((second[0] for second in self.timeline), default=0),
+            'timeline': self.timeline
+        }
+
+
+def deadline_policies(base_wait, max_attempts, max_wait, deadline):
+    """(policy, propagate) pairs the deadline demo compares, from no limits to a propagated budget"""
+    return [
+        (RetryPolicy("Uncapped", base_wait, max_attempts, jitter=0.5), False),
+        (RetryPolicy("Capped", base_wait, max_attempts, jitter=0.5, max_wait=max_wait), False),
+        (RetryPolicy("Deadline per Hop", base_wait, max_attempts, jitter=0.5, max_wait=max_wait, deadline=deadline),
+         False),
+        (RetryPolicy("Propagated", base_wait, max_attempts, jitter=0.5, max_wait=max_wait, deadline=deadline), True)
+    ]
+
+
+def load_saved(result, baseline):
+    """Fraction of the baseline's attempts a policy did not send"""
+    return 1 - result['attempts'] / baseline['attempts'] if baseline['attempts'] else 0.0
+
+
+# ===== ADAPTIVE CONCURRENCY =====
+
+class AdaptivePolicy:
+    """
+    How a long-lived client adapts its own send rate, TCP style
+    
+    Additive increase: every success adds `additive`/rate, so the rate
+    climbs by `additive` req/s per second of successes. Multiplicative
+    decrease: an overload answer (429/503) multiplies the rate by
+    `multiplicative`, at most once per `cooldown` seconds - one cut per
+    round trip, like TCP. Plain 500s are noise, not congestion.
+    With `gradient`, the rate also shrinks each second by the ratio of
+    long-term to recent average latency, so it backs off while queues are
+    building instead of waiting for the errors.
+    """
+    
+    def __init__(self, name, additive=1.0, multiplicative=0.5, cooldown=1.0, gradient=False, adaptive=True,
+                 min_rate=0.1):
+        self.name = name
+        self.additive = additive
+        self.multiplicative = multiplicative
+        self.cooldown = cooldown
+        self.gradient = gradient
+        self.adaptive = adaptive  # False = send at the demanded rate no matter what
+        self.min_rate = min_rate
+    
+    def on_success(self, state, now, latency, max_rate):
+        if not self.adaptive:
+            return
+        rate = state.rate
+        if self.gradient and latency > 0:
+            if state.recent_latency is None:
+                state.recent_latency = state.long_latency = latency
+            state.recent_latency += 0.2 * (latency - state.recent_latency)
+            state.long_latency += 0.02 * (latency - state.long_latency)
+            # Spread the per-second gradient over this second's successes
+            rate *= max(0.5, min(1.0, state.long_latency / state.recent_latency)) ** (1 / rate)
+        state.rate = min(max_rate, rate + self.additive / rate)
+    
+    def on_overload(self, state, now):
+        if self.adaptive and now - state.last_decrease >= self.cooldown:
+            state.rate = max(self.min_rate, state.rate * self.multiplicative)
+            state.last_decrease = now
+
+
+class ClientRate:
+    """One adaptive client's send rate and what its policy remembers"""
+    
+    __slots__ = ("rate", "last_decrease", "recent_latency", "long_latency")
+    
+    def __init__(self, rate):
+        self.rate = rate
+        self.last_decrease = -math.inf
+        self.recent_latency = None  # Latency averages for the gradient
+        self.long_latency = None
+
+
+def standard_adaptive_policies(demand):
+    """The client-side rate control strategies the AIMD demo compares, climbing to `demand` in ~10s"""
+    return [
+        AdaptivePolicy("Fixed Rate", adaptive=False),
+        AdaptivePolicy("AIMD", additive=demand / 10),
+        AdaptivePolicy("AIMD + Gradient", additive=demand / 10, gradient=True)
+    ]
+
+
+def jain_index(values):
+    """Jain's fairness index: 1 when everyone gets the same (or there is nobody), 1/n when one gets everything"""
+    values = list(values)
+    if not values:
+        return 1.0
+    squares = sum(v * v for v in values)
+    return sum(values) ** 2 / (len(values) * squares) if squares else 1.0
+
+
+def convergence_time(series, tolerance=0.2, smooth=3):
+    """
+    First second after which the series stays within `tolerance` of its steady level
+    
+    The steady level is the mean of the last quarter; a `smooth`-second
+    rolling mean keeps single noisy seconds from resetting the clock.
+    None if it never settles.
+    """
+    if len(series) < 4:
+        return None
+    tail = series[-max(1, len(series) // 4):]
+    steady = sum(tail) / len(tail)
+    converged = None
+    for second in range(len(series)):
+        window = series[max(0, second - smooth + 1):second + 1]
+        if abs(sum(window) / len(window) - steady) <= tolerance * max(steady, 1e-9):
+            if converged is None:
+                converged = second
+        else:
+            converged = None
+    return converged
+
+
+class AdaptiveSimulation:
+    """
+    Long-lived clients pacing their own requests against one shared server
+    
+    Each client wants `demand` req/s and sends one request every 1/rate
+    seconds (+-10% so they don't march in lockstep); its AdaptivePolicy
+    moves the rate on every answer. Starting rates are spread at random so
+    convergence and fairness have something to show.
+    """
+    
+    def __init__(self, num_clients, policy, demand, server=None, duration=60, seed=None):
+        self.policy = policy
+        self.demand = demand
+        self.server = server or ServerModel()
+        self.duration = duration
+        self.rng = random.Random(seed)
+        self.now = 0.0
+        self.states = [ClientRate(demand if not policy.adaptive else self.rng.uniform(policy.min_rate, demand))
+                       for _ in range(num_clients)]
+        self.events = [(self.rng.random(), client) for client in range(num_clients)]
+        heapq.heapify(self.events)
+        
+        self.attempts = 0
+        self.succeeded = 0
+        self.steady_start = duration * 0.75  # The last quarter is measured as steady state
+        self.steady_rates = [0.0] * num_clients  # Each client's rate summed over steady seconds
+        self.timeline = []  # Per second: [attempts, successes]
+    
+    def finished(self):
+        return not self.events
+    
+    def advance(self, until):
+        """Process every send up to simulated time `until`"""
+        while self.events and self.events[0][0] <= until:
+            when, client = heapq.heappop(self.events)
+            while len(self.timeline) <= int(when):
+                self.sample_rates(len(self.timeline))
+                self.timeline.append([0, 0])
+            self.now = when
+            self.send(when, client)
+        self.now = max(self.now, min(until, self.duration))
+    
+    def run(self):
+        self.advance(math.inf)
+        return self.results()
+    
+    def send(self, now, client):
+        state = self.states[client]
+        self.attempts += 1
+        self.timeline_slot(now)[0] += 1
+        
+        status, _, wait, _ = self.server.serve(now, self.rng)
+        if status == 200:
+            self.succeeded += 1
+            self.timeline_slot(now)[1] += 1
+            self.policy.on_success(state, now + wait, wait, self.demand)
+        elif status in (429, 503):
+            self.policy.on_overload(state, now + wait)
+        
+        next_send = now + self.rng.uniform(0.9, 1.1) / state.rate
+        if next_send < self.duration:
+            heapq.heappush(self.events, (next_send, client))
+    
+    def sample_rates(self, second):
+        """Add up every client's rate once per steady-state second, for fairness"""
+        if second >= self.steady_start:
+            for client, state in enumerate(self.states):
+                self.steady_rates[client] += state.rate
+    
+    def timeline_slot(self, now):
+        index = int(now)
+        while len(self.timeline) <= index:
+            self.timeline.append([0, 0])
+        return self.timeline[index]
+    
+    def results(self):
+        """Convergence time, fairness and utilization of the run"""
+        offered = [second[0] for second in self.timeline]
+        steady = self.timeline[int(self.steady_start):]
+        seconds = max(1, len(steady))
+        capacity = self.server.capacity
+        return {
+            'policy': self.policy.name,
+            'clients': len(self.states),
+            'attempts': self.attempts,
+            'succeeded': self.succeeded,
+            'success_rate': self.succeeded / self.attempts if self.attempts else 0.0,
+            'convergence_time': convergence_time(offered),
+            'fairness': jain_index(self.steady_rates),
+            'utilization': sum(second[0] for second in steady) / seconds / capacity,
+            'goodput_utilization': sum(second[1] for second in steady) / seconds / capacity,
+            'peak_load': max(offered, default=0),
+            'timeline': self.timeline
+        }
+
+
+# ===== CLIENT CLASSES =====
+
+class ClientClass:
+    """One kind of client in a mixed population: when they arrive and how they retry"""
+    
+    def __init__(self, name, policy, workload, priority=0):
+        self.name = name
+        self.policy = policy
+        self.workload = workload  # Arrival times, like any PopulationSimulation workload
+        self.priority = priority  # For admission control: 0 is the most important
+
+
+class ClassStats:
+    """Running totals for one client class"""
+    
+    __slots__ = ("clients", "succeeded", "gave_up", "attempts", "latency")
+    
+    def __init__(self, seed=None):
+        self.clients = 0
+        self.succeeded = 0
+        self.gave_up = 0
+        self.attempts = 0
+        self.latency = QuantileSketch(seed=seed)
+
+
+class MixedPopulationSimulation(PopulationSimulation):
+    """
+    Several client classes, each with its own arrivals and retry policy, sharing one server
+    
+    Everything runs exactly like PopulationSimulation; each client just
+    retries the way its class does, and the results break down per class.
+    Fairness is Jain's index over the classes' success rates: 1 when every
+    class gets the same share of its requests through, lower when one
+    class's retries crowd the others out.
+    """
+    
+    def __init__(self, classes, server=None, horizon=None, seed=None, name="Mixed"):
+        self.classes = classes
+        self.client_class = {}  # client -> class index, while it is still retrying
+        self.next_class = None
+        self.class_stats = [ClassStats(seed) for _ in classes]
+        arrivals = heapq.merge(*(zip(c.workload, itertools.repeat(i)) for i, c in enumerate(classes)))
+        super().__init__(arrivals, RetryPolicy(name), server, horizon, seed)
+    
+    def pull_arrival(self):
+        """Fetch the next arrival of any class"""
+        arrival = next(self.workload, None)
+        if arrival is not None and self.horizon is not None and arrival[0] > self.horizon:
+            arrival = None
+        self.next_arrival, self.next_class = arrival if arrival is not None else (None, None)
+    
+    def admit(self):
+        client = super().admit()
+        self.client_class[client] = self.next_class
+        self.class_stats[self.next_class].clients += 1
+        return client
+    
+    def policy_for(self, client):
+        return self.classes[self.client_class[client]].policy
+    
+    def priority_for(self, client, attempt):
+        """The class's priority, plus one for retries"""
+        return self.classes[self.client_class[client]].priority + super().priority_for(client, attempt)
+    
+    def attempt(self, now, client, arrived_at, attempt, first=None):
+        self.class_stats[self.client_class[client]].attempts += 1
+        super().attempt(now, client, arrived_at, attempt, first)
+    
+    def client_done(self, client, attempts, latency):
+        stats = self.class_stats[self.client_class.pop(client)]
+        if latency is None:
+            stats.gave_up += 1
+        else:
+            stats.succeeded += 1
+            stats.latency.add(latency)
+    
+    def class_results(self):
+        """Per-class goodput, latency percentiles and share of the server's attempts"""
+        duration = self.last_done or 1.0
+        rows = []
+        for client_class, stats in zip(self.classes, self.class_stats):
+            finished = stats.succeeded + stats.gave_up
+            label = client_class.name
+            if client_class.policy.name != label:
+                label = f"{label} ({client_class.policy.name})"
+            rows.append({
+                'policy': label,
+                'class': client_class.name,
+                'clients': stats.clients,
+                'succeeded': stats.succeeded,
+                'gave_up': stats.gave_up,
+                'attempts': stats.attempts,
+                'success_rate': stats.succeeded / finished if finished else 0.0,
+                'amplification': stats.attempts / stats.clients if stats.clients else 0.0,
+                'attempt_share': stats.attempts / self.attempts if self.attempts else 0.0,
+                'goodput': stats.succeeded / duration,
+                'p50_latency': stats.latency.quantile(0.5),
+                'p99_latency': stats.latency.quantile(0.99)
+            })
+        return rows
+    
+    def results(self):
+        results = super().results()
+        classes = self.class_results()
+        results['classes'] = classes
+        results['fairness'] = jain_index(row['success_rate'] for row in classes if row['clients'])
+        return results
+
+
+def standard_client_classes(num_clients, base_wait, max_attempts, horizon, seed=None, aggressive_batch=False,
+                            max_wait=None):
+    """
+    Interactive users, SDK clients and a batch job, scaled by num_clients
+    
+    Interactive users arrive at 20% of num_clients per second and SDK
+    clients at 10%; the batch job bursts at 40% for 5s out of every 10.
+    With `aggressive_batch` the batch job retries every half second
+    without backing off and keeps at it ten times as long, the way a
+    hand-rolled retry loop does, so its load outlasts its own bursts.
+    """
+    seed = seed if seed is not None else random.randrange(1 << 30)
+    batch_policy = (RetryPolicy("Tight Loop", 0.5, max_attempts * 10, backoff=False) if aggressive_batch
+                    else RetryPolicy("Backoff + Jitter", base_wait, max_attempts, jitter=0.5, max_wait=max_wait))
+    return [
+        ClientClass("Interactive", RetryPolicy("Backoff + Jitter", base_wait, min(max_attempts, 3), jitter=0.5,
+                                               max_wait=max_wait),
+                    poisson_arrivals(num_clients * 0.2, horizon, seed)),
+        ClientClass("SDK", RetryPolicy("Retry-After", base_wait, max_attempts, jitter=0.5, retry_after='max',
+                                       max_wait=max_wait),
+                    poisson_arrivals(num_clients * 0.1, horizon, seed + 1)),
+        ClientClass("Batch", batch_policy, on_off_arrivals(num_clients * 0.4, 5, 5, horizon, seed + 2), priority=1)
+    ]
+
+
+# ===== ADMISSION CONTROL =====
+
+class AdmissionControl:
+    """
+    How an overloaded server decides which attempts to take on
+    
+    Admitted attempts queue for a server that works through `capacity` of
+    them per second; the rest are shed at once with a 503 and a
+    Retry-After of how long the queue needs to drain. `limit` is the most
+    attempts the queue holds, `target` the queue delay in seconds that
+    counts as congested.
+    
+    fifo: first come, first served, shedding arrivals once the queue is full.
+    lifo: FIFO until the queue is congested, then newest first. The newest
+        attempt goes next while the server keeps up with arrivals; the rest
+        are buried under newer ones and dropped from the bottom of the
+        stack once `limit` newer attempts have been served.
+    codel: bounded FIFO that also sheds attempts which would wait longer
+        than `interval`, or longer than `target` once the queue stayed
+        above target for a whole interval (CoDel's "standing queue").
+    priority: FIFO, but priority p only gets 1/(p + 1) of the queue, so
+        retries (priority 1) are shed before first attempts (priority 0).
+    """
+    
+    STRATEGIES = ("fifo", "lifo", "codel", "priority")
+    NAMES = {"fifo": "Bounded FIFO", "lifo": "Adaptive LIFO", "codel": "CoDel", "priority": "Priority"}
+    
+    def __init__(self, strategy="fifo", limit=100, target=0.1, interval=0.5, name=None):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown admission strategy '{strategy}', expected one of: {', '.join(self.STRATEGIES)}")
+        self.strategy = strategy
+        self.name = name or self.NAMES[strategy]
+        self.limit = limit
+        self.target = target
+        self.interval = interval
+    
+    def admit(self, queue, now, capacity, load, priority, rng):
+        """
+        (admitted, seconds before the answer) for an attempt arriving at the queue's current backlog
+        
+        Attempts shed on arrival are answered at once; only a buried LIFO
+        attempt waits before it learns it was dropped.
+        """
+        delay = queue.backlog / capacity
+        if self.strategy == "fifo":
+            return self.queued(queue.backlog < self.limit, delay)
+        if self.strategy == "priority":
+            return self.queued(queue.backlog < self.limit / (priority + 1), delay)
+        
+        if self.strategy == "lifo":
+            if delay <= self.target:
+                return True, delay
+            if rng.random() * load <= capacity:
+                return True, 1 / capacity  # Top of the stack: next in line
+            return False, self.limit / capacity  # Buried until it falls off the bottom
+        
+        # CoDel: the minimum delay over an interval tells a standing queue from a passing burst
+        if now >= queue.interval_end:
+            queue.standing = queue.min_delay > self.target
+            queue.min_delay = delay
+            queue.interval_end = now + self.interval
+        else:
+            queue.min_delay = min(queue.min_delay, delay)
+        return self.queued(queue.backlog < self.limit and delay <= (self.target if queue.standing else self.interval),
+                           delay)
+    
+    @staticmethod
+    def queued(admitted, delay):
+        """Queue delay for an admitted attempt, none for one shed on arrival"""
+        return admitted, delay if admitted else 0.0
+
+
+class AdmissionQueue:
+    """One server's queue as admission control sees it"""
+    
+    __slots__ = ("backlog", "drained_at", "accepted", "min_delay", "interval_end", "standing")
+    
+    def __init__(self):
+        self.backlog = 0.0  # Attempts waiting, drained continuously at capacity
+        self.drained_at = 0.0
+        self.accepted = deque()  # When recent attempts were admitted, for the failure curve
+        self.min_delay = 0.0  # CoDel: lowest queue delay seen this interval
+        self.interval_end = 0.0
+        self.standing = False
+
+
+def admission_name(admission):
+    """Display name of a server strategy, None being the server that takes everything"""
+    return admission.name if admission is not None else "Accept All"
+
+
+def standard_admissions(capacity=SERVER_CAPACITY):
+    """The server-side strategies the admission demo compares, each queue holding ~2s of work"""
+    limit = capacity * 2
+    return [
+        None,
+        AdmissionControl("fifo", limit),
+        AdmissionControl("lifo", limit),
+        AdmissionControl("codel", limit),
+        AdmissionControl("priority", limit)
+    ]
+
+
+def admission_matrix(make_workload, policies, admissions, make_server=ServerModel, horizon=None, seed=None):
+    """
+    Every client policy against every server strategy, on identical workloads
+    
+    `make_server` takes the admission control as a keyword. Returns one
+    result per pair, strategy by strategy, each tagged with 'admission'.
+    """
+    rows = []
+    for admission in admissions:
+        results = compare_policies(make_workload, policies, lambda: make_server(admission=admission), horizon, seed)
+        for result in results:
+            result['admission'] = admission_name(admission)
+        rows.extend(results)
+    return rows
+
+
+def admission_table(rows, column, fmt="{:.1f}"):
+    """Text grid of one result column: a line per server strategy, a column per client policy"""
+    policies = list(dict.fromkeys(row['policy'] for row in rows))
+    admissions = list(dict.fromkeys(row['admission'] for row in rows))
+    cells = {(row['admission'], row['policy']): row[column] for row in rows}
+    first = max(len(name) for name in admissions)
+    widths = [max(len(policy), 8) for policy in policies]
+    lines = [" " * first + "".join(f"  {policy:>{w}}" for policy, w in zip(policies, widths))]
+    for admission in admissions:
+        values = (cells.get((admission, policy)) for policy in policies)
+        lines.append(f"{admission:<{first}}" + "".join(f"  {'-' if v is None else fmt.format(v):>{w}}"
+                                                       for v, w in zip(values, widths)))
+    return lines
+
+
+# ===== GOODPUT CURVE =====
+
+def log_sweep(low=1, high=10000, points_per_decade=4):
+    """Client counts spaced evenly on a log scale"""
+    decades = math.log10(high / low)
+    steps = max(1, int(round(decades * points_per_decade)))
+    return sorted({int(round(low * 10 ** (decades * i / steps))) for i in range(steps + 1)})
+
+
+def goodput_point(clients, policies, capacity=SERVER_CAPACITY, horizon=20, warmup=5, seed=None, max_simulated_rate=500):
+    """
+    Offered load, goodput and amplification of each policy at one arrival rate
+    
+    Failure only depends on load relative to capacity, so rates above
+    max_simulated_rate are simulated scaled down (rate and capacity divided
+    by the same factor) and the measured rates scaled back up. Only the
+    steady-state seconds between warmup and horizon are measured.
+    """
+    scale = max(1.0, clients / max_simulated_rate)
+    rate = clients / scale
+    results = compare_policies(lambda: poisson_arrivals(rate, horizon, seed), policies,
+                               lambda: ServerModel(capacity / scale), horizon, seed)
+    
+    rows = []
+    for result in results:
+        steady = result['timeline'][warmup:horizon]
+        seconds = horizon - warmup
+        rows.append({
+            'clients': clients,
+            'policy': result['policy'],
+            'offered_load': sum(second[0] for second in steady) / seconds * scale,
+            'goodput': sum(second[1] for second in steady) / seconds * scale,
+            'amplification': result['amplification'],
+            'success_rate': result['success_rate'],
+            'p99_latency': result['p99_latency']
+        })
+    return rows
+
+
+def goodput_curve(policies, client_counts, capacity=SERVER_CAPACITY, seed=None):
+    """goodput_point() for every client count, as one flat list of rows"""
+    return [row for clients in client_counts for row in goodput_point(clients, policies, capacity, seed=seed)]
+
+
+def export_rows_csv(rows, path):
+    """Write result rows (dicts with the same keys) as CSV"""
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+# ===== COMMON RANDOM NUMBERS =====
+
+MASK64 = (1 << 64) - 1
+
+
+def splitmix64(x):
+    """One round of the SplitMix64 mixer: any 64-bit int to a well-scrambled one"""
+    x = (x + 0x9E3779B97F4A7C15) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+class CounterRandom(random.Random):
+    """
+    Counter-based random numbers for common random numbers
+    
+    Draws are a hash of (seed, client, attempt, copy, draw number), so they
+    don't depend on what other clients drew before. Under every policy a
+    client's n-th attempt fails or succeeds on the same numbers, and the
+    difference between policies is no longer buried in sampling noise.
+    """
+    
+    def seed(self, a=None, version=2):
+        if a is None:
+            a = random.getrandbits(64)
+        self.key = splitmix64((a if isinstance(a, int) else hash(a)) & MASK64)
+        self.at(0, 0)
+    
+    def at(self, client, attempt, copy=0):
+        """Move to the draws of one attempt"""
+        self.base = splitmix64(self.key ^ splitmix64((client << 20) ^ (attempt << 4) ^ copy))
+        self.draw = 0
+    
+    def random(self):
+        self.draw += 1
+        return (splitmix64(self.base + self.draw) >> 11) * (1.0 / (1 << 53))
+    
+    def getstate(self):
+        return self.key, self.base, self.draw
+    
+    def setstate(self, state):
+        self.key, self.base, self.draw = state
+
+
+# Exact two-sided t critical values for 1-5 degrees of freedom, where the expansion is too rough
+T_TABLE = {
+    0.90: (6.314, 2.920, 2.353, 2.132, 2.015),
+    0.95: (12.706, 4.303, 3.182, 2.776, 2.571),
+    0.99: (63.657, 9.925, 5.841, 4.604, 4.032)
+}
+
+
+def t_critical(df, confidence=0.95):
+    """
+    Two-sided Student t critical value
+    
+    Tabulated up to 5 degrees of freedom for the usual confidence levels;
+    otherwise a Cornish-Fisher expansion, within 0.3% from 6 upwards.
+    """
+    if confidence in T_TABLE and df <= len(T_TABLE[confidence]):
+        return T_TABLE[confidence][df - 1]
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    return (z + (z ** 3 + z) / (4 * df) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3))
+
+
+CRN_METRICS = ("success_rate", "amplification", "p99_latency", "peak_load")
+
+
+def replicate_policies(make_workload, policies, make_server=ServerModel, horizon=None, seed=0,
+                       common_random=True, metrics=CRN_METRICS):
+    """One replication: every policy on the same arrivals and (with CRN) the same random draws"""
+    return [{metric: result[metric] for metric in metrics}
+            for result in (PopulationSimulation(make_workload(seed), policy, make_server(), horizon, seed,
+                                                common_random).run()
+                           for policy in policies)]
+
+
+def crn_differences(replications, names, baseline=0, metrics=CRN_METRICS, confidence=0.95):
+    """
+    Mean difference of each policy from the baseline, with a confidence interval
+    
+    `replications` is a list of replicate_policies() outputs. Alongside the
+    paired interval, `variance_reduction` estimates how many times more
+    replications independent streams would need for the same width:
+    Var(a) + Var(b) over Var(a - b).
+    """
+    n = len(replications)
+    rows = []
+    for index, name in enumerate(names):
+        if index == baseline:
+            continue
+        for metric in metrics:
+            a = [rep[index][metric] for rep in replications]
+            b = [rep[baseline][metric] for rep in replications]
+            diffs = [x - y for x, y in zip(a, b)]
+            mean = sum(diffs) / n
+            
+            def variance(values):
+                centre = sum(values) / n
+                return sum((v - centre) ** 2 for v in values) / (n - 1) if n > 1 else 0.0
+            
+            paired = variance(diffs)
+            half_width = t_critical(n - 1, confidence) * math.sqrt(paired / n) if n > 1 else math.inf
+            rows.append({
+                'policy': name,
+                'baseline': names[baseline],
+                'metric': metric,
+                'value': sum(a) / n,
+                'difference': mean,
+                'ci_low': mean - half_width,
+                'ci_high': mean + half_width,
+                'replications': n,
+                'variance_reduction': (variance(a) + variance(b)) / paired if paired else math.inf
+            })
+    return rows
+
+
+def compare_with_crn(make_workload, policies, make_server=ServerModel, horizon=None, replications=20, seed=0,
+                     baseline=0, metrics=CRN_METRICS, confidence=0.95):
+    """N-way comparison with common random numbers: difference rows from crn_differences()"""
+    runs = [replicate_policies(make_workload, policies, make_server, horizon, seed + r, True, metrics)
+            for r in range(replications)]
+    return crn_differences(runs, [policy.name for policy in policies], baseline, metrics, confidence)
+
+
+# ===== RARE EVENTS =====
+
+class TailSampler:
+    """
+    Importance sampling of one client's rare outcomes
+    
+    The client retries against the load a population run recorded (its
+    timeline of attempts per second); one client barely changes that load,
+    so it stays fixed. With `tilt`, every attempt fails with probability at
+    least `tilt` instead of the true p, and the outcome is reweighted by the
+    likelihood ratio (p/q per failure, (1-p)/(1-q) per success). Rare
+    outcomes become common and the weighted estimate stays unbiased.
+    """
+    
+    def __init__(self, timeline, policy, capacity=SERVER_CAPACITY, arrivals=None, horizon=None):
+        self.timeline = timeline
+        self.policy = policy
+        self.capacity = capacity
+        self.arrivals = arrivals  # Arrival times to draw from; None = uniform over the horizon
+        self.horizon = horizon or len(timeline)
+        self.server = ServerModel(capacity)  # Only for its status codes and Retry-After hints
+    
+    def load_at(self, now):
+        second = int(now)
+        return self.timeline[second][0] if second < len(self.timeline) else 0
+    
+    def client(self, arrival, rng, tilt=None):
+        """One client: (latency, or inf if it gave up; likelihood ratio weight)"""
+        now = arrival
+        weight = 1.0
+        for attempt in range(self.policy.max_attempts):
+            load = self.load_at(now)
+            p = failure_rate_for_load(load, 0, self.capacity)
+            q = p if tilt is None else max(p, tilt)
+            failed = rng.random() <= q
+            weight *= p / q if failed else (1 - p) / (1 - q)
+            if not failed:
+                return now - arrival, weight
+            if attempt + 1 < self.policy.max_attempts:
+                _, retry_after = self.server.respond(load, self.capacity, True)
+                now += self.policy.wait(attempt, rng, retry_after)
+        return math.inf, weight
+    
+    def sample(self, runs, tilt=None, seed=None):
+        """(latency, weight) of `runs` clients arriving like the recorded workload"""
+        rng = random.Random(seed)
+        return [self.client(rng.choice(self.arrivals) if self.arrivals else rng.uniform(0, self.horizon), rng, tilt)
+                for _ in range(runs)]
+
+
+def default_tilt(max_attempts):
+    """Failure probability that makes running out of attempts a coin flip"""
+    return 0.5 ** (1 / max_attempts)
+
+
+def tail_probability(samples, threshold=math.inf, confidence=0.95):
+    """
+    Weighted estimate of P(latency >= threshold) with a normal-approximation interval
+    
+    The default threshold counts clients that gave up. `relative_error` is
+    the interval half-width over the estimate.
+    """
+    n = len(samples)
+    values = [weight if latency >= threshold else 0.0 for latency, weight in samples]
+    mean = sum(values) / n
+    std_error = math.sqrt(sum((v - mean) ** 2 for v in values) / (n - 1) / n) if n > 1 else math.inf
+    half_width = NormalDist().inv_cdf(0.5 + confidence / 2) * std_error
+    return {
+        'probability': mean,
+        'ci_low': max(0.0, mean - half_width),
+        'ci_high': mean + half_width,
+        'std_error': std_error,
+        'hits': sum(1 for v in values if v),
+        'runs': n,
+        'relative_error': half_width / mean if mean else math.inf
+    }
+
+
+def weighted_quantile(samples, q):
+    """Latency that a fraction q of clients finish within, from weighted samples (inf if beyond give-up)"""
+    n = len(samples)
+    tail = 0.0
+    for latency, weight in sorted(samples, reverse=True):
+        tail += weight / n
+        if tail >= 1 - q:
+            return latency
+    return 0.0
+
+
+def tail_report(result, policy, capacity=SERVER_CAPACITY, arrivals=None, horizon=None, runs=20000, seed=None,
+                tilt=None):
+    """
+    Rare-event tails of one population result: importance sampling next to plain Monte Carlo
+    
+    Both use the same number of sampled clients. `speedup` is how many
+    times more plain runs it would take to match the sampled interval.
+    """
+    sampler = TailSampler(result['timeline'], policy, capacity, arrivals, horizon)
+    tilt = default_tilt(policy.max_attempts) if tilt is None else tilt
+    tilted = sampler.sample(runs, tilt, seed)
+    plain = sampler.sample(runs, None, seed)
+    
+    exhausted = tail_probability(tilted)
+    p = exhausted['probability']
+    plain_variance = p * (1 - p) / runs
+    return {
+        'policy': policy.name,
+        'exhausted': exhausted,
+        'exhausted_plain': tail_probability(plain),
+        'p999_latency': weighted_quantile(tilted, 0.999),
+        'p999_latency_plain': weighted_quantile(plain, 0.999),
+        'speedup': plain_variance / exhausted['std_error'] ** 2 if exhausted['std_error'] else math.inf
+    }
+
+
+# ===== WHAT-IF PREVIEW =====
+
+PREVIEW_DEBOUNCE_MS = 60  # Quiet time after the last keystroke before the preview reruns
+PREVIEW_HORIZON = 10  # Seconds of Poisson arrivals behind the peak load estimate
+
+
+@lru_cache(maxsize=512)
+def preview_outcome(num_clients, max_attempts, use_backoff, server_capacity=SERVER_CAPACITY):
+    """Exact success and attempt distribution - they don't depend on base wait, so cached without it"""
+    return solve_retry_outcome(num_clients, max_attempts, 1.0, use_backoff, server_capacity)
+
+
+def wait_quantile(outcome, base_wait, use_backoff, q=0.99, max_wait=None):
+    """Total wait that a fraction q of single-client runs stay within"""
+    total_wait = 0.0
+    reached = 0.0
+    for attempt, succeeded in enumerate(outcome['attempt_distribution']):
+        total_wait += demo_wait_time(base_wait, attempt, use_backoff, max_wait)
+        reached += succeeded
+        if reached >= q:
+            return total_wait
+    return total_wait  # The rest ran out of attempts after waiting the whole schedule
+
+
+@lru_cache(maxsize=512)
+def preview_peak_load(num_clients, base_wait, max_attempts, server_capacity=SERVER_CAPACITY, max_simulated_rate=100,
+                      max_wait=None):
+    """
+    Peak attempts/s of Backoff + Jitter clients arriving at num_clients/s
+    
+    Scaled down above max_simulated_rate like goodput_point(), and seeded,
+    so the same inputs always give the same number in a few milliseconds.
+    """
+    scale = max(1.0, num_clients / max_simulated_rate)
+    policy = RetryPolicy("Backoff + Jitter", base_wait, max_attempts, jitter=0.5, max_wait=max_wait)
+    sim = PopulationSimulation(poisson_arrivals(num_clients / scale, PREVIEW_HORIZON, 0), policy,
+                               ServerModel(server_capacity / scale), PREVIEW_HORIZON, 0)
+    sim.advance(PREVIEW_HORIZON * 2)  # The peak comes while arrivals last, not from the long retry tail
+    return sim.results()['peak_load'] * scale
+
+
+def preview_estimate(base_wait, num_clients, max_attempts, server_capacity=SERVER_CAPACITY, max_wait=None):
+    """Numbers for the what-if panel: exact success and p99 wait, simulated peak load"""
+    backoff = preview_outcome(num_clients, max_attempts, True, server_capacity)
+    no_backoff = preview_outcome(num_clients, max_attempts, False, server_capacity)
+    return {
+        'success': backoff['success_probability'],
+        'success_no_backoff': no_backoff['success_probability'],
+        'p99_wait': wait_quantile(backoff, base_wait, True, max_wait=max_wait),
+        'peak_load': preview_peak_load(num_clients, base_wait, max_attempts, server_capacity, max_wait=max_wait)
+    }
+
+
+# ===== CALIBRATION =====
+
+# Combined/common access log line ending in the request time, as nginx's $request_time
+ACCESS_LOG_LINE = re.compile(r'\[(?P<time>[^\]]+)\] "[^"]*" (?P<status>\d{3}) .*?(?P<latency>\d+(?:\.\d+)?)\s*$')
+
+
+@lru_cache(maxsize=4096)
+def parse_log_timestamp(value):
+    """parse_timestamp for access logs, whose whole-second stamps repeat line after line"""
+    return parse_timestamp(value)
+
+
+def parse_log_line(line, columns=(0, 1, 2)):
+    """
+    (timestamp, status, latency seconds) from one access log or CSV line
+    
+    Access log lines are recognised by their `[time] "request" status`
+    shape; anything else is read as CSV with the three fields at
+    `columns`. Returns None for headers and junk.
+    """
+    match = ACCESS_LOG_LINE.search(line)
+    if match:
+        fields = match.group('time', 'status', 'latency')
+        stamp = parse_log_timestamp(fields[0])
+    else:
+        row = next(csv.reader([line]), [])
+        if len(row) <= max(columns):
+            return None
+        fields = [row[column] for column in columns]
+        stamp = parse_timestamp(fields[0])
+    
+    try:
+        return (stamp, int(fields[1]), float(fields[2])) if stamp is not None else None
+    except ValueError:
+        return None
+
+
+def read_access_log(path, columns=(0, 1, 2)):
+    """
+    Stream (timestamp, status, latency) entries from a log file
+    
+    The file is memory-mapped and read line by line, so multi-GB logs are
+    never loaded whole.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for line in iter(mapped.readline, b""):
+                entry = parse_log_line(line.decode('utf-8', 'replace'), columns)
+                if entry is not None:
+                    yield entry
+
+
+def is_server_failure(status):
+    """5xx and 429 are the server failing; other 4xx are the client's fault"""
+    return status >= 500 or status == 429
+
+
+def monotone_rates(rates, weights):
+    """Weighted pool-adjacent-violators: the closest non-decreasing sequence to `rates`"""
+    blocks = []  # [rate, weight, bands pooled]
+    for rate, weight in zip(rates, weights):
+        blocks.append([rate, weight, 1])
+        while len(blocks) > 1 and blocks[-2][0] > blocks[-1][0]:
+            rate, weight, size = blocks.pop()
+            last = blocks[-1]
+            total = last[1] + weight
+            last[0] = (last[0] * last[1] + rate * weight) / total if total else max(last[0], rate)
+            last[1] = total
+            last[2] += size
+    return [rate for rate, _, size in blocks for _ in range(size)]
+
+
+def calibrate_server(path, window=1.0, columns=(0, 1, 2), latency_scale=1.0, limits=None, max_candidates=400):
+    """
+    Fit the server model to a real access log or CSV of (timestamp, status, latency)
+    
+    Requests are counted per `window` seconds, which is the load the
+    ServerModel sees. The capacity is the one whose failure bands (the
+    load-ratio limits of FAILURE_CURVE) explain the most of the variation
+    in failure rate between windows; each band's rate is then its share of
+    failed requests, kept non-decreasing in load. Bands the log never
+    reached keep the default rate.
+    
+    Band limits double from one to the next, so a log that doesn't reach
+    every band fits capacity C and C/2 equally well. Ties go to the
+    capacity whose band rates stay closest to FAILURE_CURVE, then to the
+    larger one; 'alternatives' lists one capacity per equally good fit. The service time is a lognormal fitted
+    to the successful requests made while under capacity.
+    """
+    limits = limits or [limit for limit, _ in FAILURE_CURVE[:-1]]
+    windows = {}  # window index -> [requests, failures, successes, latency sum, log latency sum, squared]
+    requests = 0
+    for stamp, status, latency in read_access_log(path, columns):
+        stats = windows.setdefault(int(stamp // window), [0, 0, 0, 0.0, 0.0, 0.0])
+        stats[0] += 1
+        requests += 1
+        if is_server_failure(status):
+            stats[1] += 1
+        elif latency > 0:
+            latency *= latency_scale
+            stats[2] += 1
+            stats[3] += latency
+            stats[4] += math.log(latency)
+            stats[5] += math.log(latency) ** 2
+    if not windows:
+        raise ValueError(f"{path}: no (timestamp, status, latency) lines found")
+    
+    # Windows sorted by load, with prefix sums so each candidate's fit is a few bisects
+    stats = sorted((s[0] / window, s) for s in windows.values())
+    loads = [load for load, _ in stats]
+    count, fails, squares = [0], [0], [0.0]
+    for _, (n, failed, *_rest) in stats:
+        count.append(count[-1] + n)
+        fails.append(fails[-1] + failed)
+        squares.append(squares[-1] + failed * failed / n)
+    
+    def bands(capacity):
+        """Index range of the windows in each failure band at this capacity"""
+        edges = [0] + [bisect_right(loads, capacity * limit) for limit in limits] + [len(loads)]
+        return list(zip(edges, edges[1:]))
+    
+    def unexplained(capacity):
+        """Request-weighted squared error of predicting each window's failure rate by its band's"""
+        error = 0.0
+        for lo, hi in bands(capacity):
+            n = count[hi] - count[lo]
+            if n:
+                error += squares[hi] - squares[lo] - (fails[hi] - fails[lo]) ** 2 / n
+        return error
+    
+    defaults = [next(rate for limit, rate in FAILURE_CURVE if upper <= limit) for upper in list(limits) + [math.inf]]
+    
+    def band_rates(capacity):
+        """(failure rate, requests) per band, the default rate where there were none"""
+        rates, weights = [], []
+        for (lo, hi), default in zip(bands(capacity), defaults):
+            n = count[hi] - count[lo]
+            rates.append((fails[hi] - fails[lo]) / n if n else default)
+            weights.append(n)
+        return rates, weights
+    
+    def distance(capacity):
+        """Request-weighted squared distance of this capacity's band rates from the default curve"""
+        rates, weights = band_rates(capacity)
+        return sum(n * (rate - default) ** 2 for rate, n, default in zip(rates, weights, defaults))
+    
+    # A band edge can only matter between two observed loads, so try capacities that put one there
+    distinct = sorted(set(loads))
+    step = max(1, len(distinct) // max_candidates)
+    candidates = sorted({load / limit for load in distinct[::step] for limit in limits})
+    errors = {candidate: unexplained(candidate) for candidate in candidates}
+    total = squares[-1] - fails[-1] ** 2 / count[-1]
+    best = min(errors.values())
+    ties = [candidate for candidate, error in errors.items() if error <= best + 1e-9 * max(total, 1.0)]
+    capacity = min(ties, key=lambda candidate: (round(distance(candidate), 9), -candidate))
+    # Ties that split the windows into bands differently are different fits, not just the same one
+    fits = {}
+    for candidate in ties:
+        key = tuple(bands(candidate))
+        fits[key] = max(fits.get(key, candidate), candidate)
+    
+    rates, weights = band_rates(capacity)
+    seen = [n > 0 for n in weights]
+    rates = monotone_rates(rates, weights)
+    # Unseen bands: no lower than the last observed band below them, no higher than the first above
+    for i in range(len(rates)):
+        if not seen[i]:
+            below = [rates[j] for j in range(i) if seen[j]]
+            above = [rates[j] for j in range(i + 1, len(rates)) if seen[j]]
+            rates[i] = min(max([rates[i]] + below[-1:]), *(above[:1] or [1.0]))
+    
+    # Service time from successes while under capacity, where the server did not stretch them
+    calm = [s for load, s in stats if load <= capacity and s[2]]
+    successes = sum(s[2] for s in calm)
+    service = None
+    if successes > 1:
+        mean_log = sum(s[4] for s in calm) / successes
+        variance = max(0.0, sum(s[5] for s in calm) / successes - mean_log ** 2)
+        service = {'distribution': "lognormal", 'mean': sum(s[3] for s in calm) / successes,
+                   'sigma': math.sqrt(variance)}
+    
+    return {
+        'capacity': capacity,
+        'alternatives': sorted(fits.values()),
+        'window': window,
+        'curve': [[limit, rate] for limit, rate in zip(list(limits) + [math.inf], rates)],
+        'service': service,
+        'requests': requests,
+        'windows': len(windows),
+        'peak_load': loads[-1],
+        'failure_rate': fails[-1] / count[-1],
+        'explained': 1 - errors[capacity] / total if total > 0 else 1.0
+    }
+
+
+def calibrated_server(calibration, faults=None, **kwargs):
+    """ServerModel with a calibration's capacity, failure curve and service time"""
+    service = calibration.get('service')
+    return ServerModel(calibration['capacity'], calibration['window'], faults,
+                       ServiceTime(**service) if service else None, curve=calibration['curve'], **kwargs)
+
+
+def server_table(calibration):
+    """A calibration as a [server] table to paste into a scenario file"""
+    def number(value):
+        return "inf" if value == math.inf else f"{value:.4g}"
+    
+    lines = ["[server]", f"capacity = {number(calibration['capacity'])}", f"window = {number(calibration['window'])}",
+             "curve = [" + ", ".join(f"[{number(limit)}, {number(rate)}]" for limit, rate in calibration['curve']) + "]"]
+    service = calibration.get('service')
+    if service:
+        lines += ["", "[server.service]", f"distribution = \"{service['distribution']}\"",
+                  f"mean = {number(service['mean'])}", f"sigma = {number(service['sigma'])}"]
+    return "\n".join(lines)
+
+
+# ===== SCENARIO FILES =====
+
+SCENARIO_WORKLOADS = {
+    "burst": burst_arrivals,
+    "poisson": poisson_arrivals,
+    "on_off": on_off_arrivals,
+    "spike": step_spike_arrivals,
+    "diurnal": diurnal_arrivals,
+    "trace": trace_arrivals
+}
+SCENARIO_SUFFIXES = (".toml", ".yaml", ".yml", ".json")
+
+
+def load_scenario(path):
+    """
+    Read a scenario file (TOML, YAML or JSON) into a plain dict
+    
+    A scenario names a workload, a server (capacity, service time,
+    coalescing, admission control), optional faults and the client
+    policies to compare - or client classes, each with its own workload
+    and policy, sharing the server. [[admissions]] crosses several
+    admission strategies with the policies; see scenarios/ for examples.
+    """
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix == ".toml":
+        if tomllib is None:
+            raise RuntimeError(f"{path}: TOML scenarios need Python 3.11+ (tomllib)")
+        with open(path, 'rb') as f:
+            scenario = tomllib.load(f)
+    elif suffix in (".yaml", ".yml"):
+        if yaml is None:
+            raise RuntimeError(f"{path}: YAML scenarios need PyYAML (pip install pyyaml)")
+        with open(path) as f:
+            scenario = yaml.safe_load(f)
+    elif suffix == ".json":
+        with open(path) as f:
+            scenario = json.load(f)
+    else:
+        raise ValueError(f"{path}: unknown scenario format '{suffix}'")
+    
+    if 'name' not in scenario:
+        scenario['name'] = os.path.splitext(os.path.basename(path))[0]
+        scenario['_name_from_file'] = True  # Not part of the content, see scenario_hash()
+    return scenario
+
+
+def scenario_hash(scenario):
+    """
+    Short, format-independent key of a scenario's content
+    
+    A name only taken from the file name is left out, so the same
+    scenario saved under two file names is run once.
+    """
+    content = {key: value for key, value in scenario.items() if not key.startswith("_")}
+    if scenario.get('_name_from_file'):
+        del content['name']
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:12]
+
+
+def scenario_workload(spec, horizon, seed):
+    """Arrival generator for a [workload] table: `kind` plus that generator's arguments"""
+    params = dict(spec)
+    kind = params.pop('kind', "burst")
+    if kind not in SCENARIO_WORKLOADS:
+        raise ValueError(f"Unknown workload kind '{kind}', expected one of: {', '.join(SCENARIO_WORKLOADS)}")
+    make = SCENARIO_WORKLOADS[kind]
+    accepted = inspect.signature(make).parameters
+    if 'horizon' in accepted:
+        params.setdefault('horizon', horizon)
+    if 'seed' in accepted:
+        params.setdefault('seed', seed)
+    return make(**params)
+
+
+def scenario_faults(specs):
+    """FaultTimeline from a list of {kind = "outage" | "brownout", ...} tables, None if empty"""
+    if not specs:
+        return None
+    faults = FaultTimeline()
+    for spec in specs:
+        params = dict(spec)
+        kind = params.pop('kind', None)
+        if kind not in ("outage", "brownout"):
+            raise ValueError(f"Unknown fault kind '{kind}', expected outage or brownout")
+        getattr(faults, kind)(**params)
+    return faults
+
+
+def scenario_policies(scenario):
+    """RetryPolicy per [[policies]] table, or the standard four"""
+    specs = scenario.get('policies')
+    if not specs:
+        return standard_policies(scenario.get('base_wait', 1.0), scenario.get('max_attempts', 5))
+    return [RetryPolicy(**spec) for spec in specs]
+
+
+def scenario_classes(scenario, horizon, seed):
+    """ClientClass per [[classes]] table: a name, a [classes.workload], a [classes.policy] and a priority"""
+    classes = []
+    for i, spec in enumerate(scenario['classes']):
+        name = spec.get('name', f"class {i + 1}")
+        policy = RetryPolicy(**dict({'name': name}, **spec.get('policy', {})))
+        classes.append(ClientClass(name, policy, scenario_workload(spec.get('workload', {}), horizon, seed + i),
+                                   spec.get('priority', 0)))
+    return classes
+
+
+def scenario_admission(spec):
+    """AdmissionControl for an admission table, None for none or strategy = "none" (take everything)"""
+    if not spec or spec.get('strategy') == "none":
+        return None
+    return AdmissionControl(**spec)
+
+
+def run_scenario(scenario):
+    """Run every policy of a scenario against its workload and server (runs in a worker process)"""
+    horizon = scenario.get('horizon', POPULATION_HORIZON)
+    seed = scenario.get('seed', 0)  # Fixed by default so a scenario always gives the same numbers
+    faults = scenario_faults(scenario.get('faults'))
+    
+    server = dict(scenario.get('server', {}))
+    service = server.pop('service', None)
+    admission = scenario_admission(server.pop('admission', None))
+    capacity = server.setdefault('capacity', SERVER_CAPACITY)
+    
+    def make_server(admission=admission):
+        return ServerModel(faults=faults, service=ServiceTime(**service) if service else None, admission=admission,
+                           **server)
+    
+    # [[classes]]: one mixed population instead of a policy comparison, reported per class
+    if scenario.get('classes'):
+        result = MixedPopulationSimulation(scenario_classes(scenario, horizon, seed), make_server(), horizon, seed,
+                                           scenario['name']).run()
+        if faults is not None:
+            result.update(recovery_report(result, capacity, faults.cleared_at(), horizon))
+        return {'name': scenario['name'], 'hash': scenario_hash(scenario), 'scenario': scenario,
+                'results': [result] + result.pop('classes')}
+    
+    policies = scenario_policies(scenario)
+    workload = scenario.get('workload', {})
+    if scenario.get('admissions'):
+        # [[admissions]]: every policy against every server strategy
+        results = admission_matrix(lambda: scenario_workload(workload, horizon, seed), policies,
+                                   [scenario_admission(spec) for spec in scenario['admissions']], make_server,
+                                   horizon, seed)
+    else:
+        results = compare_policies(lambda: scenario_workload(workload, horizon, seed), policies, make_server,
+                                   horizon, seed)
+    if faults is not None:
+        for result in results:
+            result.update(recovery_report(result, capacity, faults.cleared_at(), horizon))
+    run = {'name': scenario['name'], 'hash': scenario_hash(scenario), 'scenario': scenario, 'results': results}
+    
+    # replications = N: also compare against the baseline policy with common random numbers
+    if scenario.get('replications'):
+        run['differences'] = compare_with_crn(lambda rep_seed: scenario_workload(workload, horizon, rep_seed),
+                                              policies, make_server, horizon, scenario['replications'], seed,
+                                              scenario.get('baseline', 0))
+    return run
+
+
+SUMMARY_COLUMNS = ("policy", "admission", "clients", "success_rate", "slo_miss_rate", "shed_rate", "amplification",
+                   "p99_latency", "p99_wait", "peak_load", "drain_time", "goodput", "wasted_fraction", "extra_load",
+                   "metastable", "fairness")
+
+
+def run_scenario_batch(paths, out_dir, workers=None, force=False):
+    """
+    Run scenario files in parallel worker processes
+    
+    Each run is saved as <out_dir>/<hash>.json; a scenario whose hash is
+    already there is not run again unless `force`. Returns one summary row
+    per scenario and policy, also written to <out_dir>/summary.csv.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    runs = {}  # hash -> run
+    pending = {}  # hash -> scenario, once however many files hold it
+    names, keys = {}, {}
+    for path in paths:
+        scenario = load_scenario(path)
+        key = keys[path] = scenario_hash(scenario)
+        names[path] = scenario['name']
+        target = os.path.join(out_dir, f"{key}.json")
+        if os.path.exists(target) and not force:
+            with open(target) as f:
+                runs[key] = json.load(f)
+        else:
+            pending.setdefault(key, scenario)
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = {key: pool.submit(run_scenario, scenario) for key, scenario in pending.items()}
+        for key, job in jobs.items():
+            run = job.result()
+            with open(os.path.join(out_dir, f"{key}.json"), 'w') as f:
+                json.dump(run, f)
+            runs[key] = run
+    
+    # Rows carry each file's own name, even when its content was run under another
+    rows = [dict({'scenario': names[path], 'hash': keys[path]},
+                 **{column: result.get(column) for column in SUMMARY_COLUMNS})
+            for path in paths for result in runs[keys[path]]['results']]
+    if rows:
+        export_rows_csv(rows, os.path.join(out_dir, "summary.csv"))
+    return rows
+
+
+def scenario_files(location):
+    """A scenario file, or every scenario file in a directory"""
+    if os.path.isfile(location):
+        return [location]
+    return sorted(os.path.join(location, name) for name in os.listdir(location)
+                  if name.lower().endswith(SCENARIO_SUFFIXES))
+
+
+# ===== PROFILING =====
+
+class HotPathProfiler:
+    """Lightweight timing spans around the demo hot paths"""
+    
+    def __init__(self):
+        self.enabled = True
+        self.reset()
+    
+    def reset(self):
+        """Forget all timings (called at the start of each run)"""
+        self.totals = {}
+        self.counts = {}
+        self.frame_spans = {}
+        self.frame_events = 0
+        self.frame_start = time.perf_counter()
+        self.last_frame = {'frame_ms': 0.0, 'events': 0, 'spans': {}}
+    
+    @contextmanager
+    def span(self, name):
+        """Time one call of a hot path"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.totals[name] = self.totals.get(name, 0.0) + elapsed
+            self.counts[name] = self.counts.get(name, 0) + 1
+            self.frame_spans[name] = self.frame_spans.get(name, 0.0) + elapsed
+            self.frame_events += 1
+    
+    def end_frame(self):
+        """Close the current frame and keep its numbers for the overlay"""
+        now = time.perf_counter()
+        frame_time = now - self.frame_start
+        spans = dict(self.frame_spans)
+        # Whatever is not drawing, logging or sleeping is simulation logic
+        spans['simulation'] = max(0.0, frame_time - sum(spans.values()))
+        self.last_frame = {'frame_ms': frame_time * 1000, 'events': self.frame_events, 'spans': spans}
+        self.frame_spans = {}
+        self.frame_events = 0
+        self.frame_start = now
+    
+    def summary(self):
+        """One line per span, slowest first"""
+        return [f"{name}: {total * 1000:.1f}ms in {self.counts[name]} calls"
+                for name, total in sorted(self.totals.items(), key=lambda item: -item[1])]
+
+
+class InstrumentedCanvas(tk.Canvas):
+    """Canvas that times item creation for the profiling overlay and drops draws from stale runs"""
+    
+    def __init__(self, master, profiler, allow_draw=lambda: True, **kwargs):
+        super().__init__(master, **kwargs)
+        self.profiler = profiler
+        self.allow_draw = allow_draw
+        self.recorder = None  # RecordingCanvas mirroring every draw while recording
+    
+    def create_item(self, item_type, args, kw):
+        """Create one item through tkinter's create_<item_type>, mirrored and timed"""
+        if not self.allow_draw():
+            return None
+        recorder = self.recorder  # Read once: Stop may detach it from the UI thread meanwhile
+        if recorder is not None:
+            getattr(recorder, f"create_{item_type}")(*args, **kw)
+        with self.profiler.span('canvas.create'):
+            return getattr(super(), f"create_{item_type}")(*args, **kw)
+    
+    # The item types the demos draw (and RecordingCanvas can replay)
+    def create_rectangle(self, *args, **kw):
+        return self.create_item('rectangle', args, kw)
+    
+    def create_oval(self, *args, **kw):
+        return self.create_item('oval', args, kw)
+    
+    def create_line(self, *args, **kw):
+        return self.create_item('line', args, kw)
+    
+    def create_text(self, *args, **kw):
+        return self.create_item('text', args, kw)
+    
+    def create_image(self, *args, **kw):
+        return self.create_item('image', args, kw)
+    
+    def delete(self, *args):
+        if self.allow_draw():
+            recorder = self.recorder
+            if recorder is not None:
+                recorder.delete(*args)
+            super().delete(*args)
+
+
+# ===== RUN SCHEDULING =====
+
+CURRENT_RUN = contextvars.ContextVar('current_run', default=None)
+
+
+class DemoRun:
+    """
+    One run of a demo
+    
+    Code working for a run (its worker thread or task) carries it in
+    CURRENT_RUN. Cancelling the run wakes its sleeps at once, and the app
+    drops whatever it still tries to draw, log or show in the stats.
+    """
+    
+    def __init__(self, demo_type, runner="Thread"):
+        self.demo_type = demo_type
+        self.runner = runner
+        self.cancelled = threading.Event()
+        self.task = None  # Set when the run is an asyncio task
+        self.thread = None  # Set when the run has a worker thread
+        self.recorder = None  # RecordingCanvas of the run's trace, closed by the run itself as it exits
+        self.record_start = 0.0
+    
+    def cancel(self):
+        self.cancelled.set()
+        if self.task is not None:
+            self.task.cancel()
+    
+    def sleep(self, seconds):
+        """Wait unless cancelled first, True if the run is still going"""
+        return not self.cancelled.wait(seconds)
+
+
+class TkAsyncioPump:
+    """
+    Runs an asyncio loop cooperatively inside Tk's event loop
+    
+    Every few milliseconds Tk's `after` runs whatever asyncio callbacks are
+    ready, so demo coroutines in any number of panes share the UI thread.
+    Only their heavy computations go to worker threads (see offload()).
+    """
+    
+    def __init__(self, root, interval_ms=10):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.loop = asyncio.new_event_loop()
+        self.pumping = False
+        self.root.after(self.interval_ms, self.pump)
+    
+    def pump(self):
+        """Run one batch of ready asyncio callbacks, then reschedule"""
+        if not self.pumping:
+            self.pumping = True
+            try:
+                self.loop.call_soon(self.loop.stop)
+                self.loop.run_forever()
+            finally:
+                self.pumping = False
+        self.root.after(self.interval_ms, self.pump)
+    
+    def spawn(self, coroutine):
+        """Schedule a coroutine on the pumped loop"""
+        return self.loop.create_task(coroutine)
+    
+    def finish(self, task):
+        """Run the loop until a cancelled task has unwound, e.g. before its window closes"""
+        if not self.pumping and not task.done():
+            self.loop.run_until_complete(asyncio.wait([task]))
+
+
+# ===== RASTER RENDERING =====
+
+def blend_palette(start_hex, end_hex, steps):
+    """List of hex colors fading from start_hex to end_hex"""
+    start = [int(start_hex[i:i + 2], 16) for i in (1, 3, 5)]
+    end = [int(end_hex[i:i + 2], 16) for i in (1, 3, 5)]
+    palette = []
+    for step in range(steps):
+        t = step / (steps - 1)
+        palette.append("#%02x%02x%02x" % tuple(int(a + (b - a) * t) for a, b in zip(start, end)))
+    return palette
+
+
+class RetryRaster:
+    """
+    Per-client retry timelines as a bitmap
+    
+    One pixel row per client, or a bucket of clients per row when there are
+    more clients than rows. Pixel brightness is how many clients in the row
+    retried in that time slice.
+    """
+    
+    def __init__(self, num_clients, width, max_rows, horizon):
+        self.width = width
+        self.rows = max(1, min(num_clients, max_rows))
+        self.clients_per_row = max(1, math.ceil(num_clients / self.rows))
+        self.horizon = max(horizon, 1e-9)  # A base wait of 0 puts every retry at t=0
+        self.counts = [[0] * width for _ in range(self.rows)]
+    
+    def add(self, client, retry_time):
+        """Mark one retry of one client"""
+        x = min(self.width - 1, int(retry_time / self.horizon * self.width))
+        self.counts[client // self.clients_per_row][x] += 1
+    
+    def photo_data(self, palette):
+        """All rows as one PhotoImage.put() data string"""
+        levels = len(palette) - 1
+        scale = levels / self.clients_per_row
+        rows = []
+        for row in self.counts:
+            # Any retry at all gets at least the first visible level
+            pixels = [palette[min(levels, max(1, int(count * scale)))] if count else palette[0] for count in row]
+            rows.append("{" + " ".join(pixels) + "}")
+        return " ".join(rows)
+
 
 class ExponentialBackoffDemo:
-    def __init__(self, root):
+    def __init__(self, root, pump=None):
         self.root = root
         self.root.title("Exponential Backoff Demo - Team H")
         self.root.geometry("1100x800")
@@ -27,26 +2700,44 @@ class ExponentialBackoffDemo:
         
         # State variables
         self.is_running = False
+        self.active_run = None
         self.speed = 1.0
+        self.profiler = HotPathProfiler()
         
         # Server capacity (max clients it can handle smoothly)
-        self.server_capacity = 50
+        self.server_capacity = SERVER_CAPACITY
+        self.max_wait = DEFAULT_MAX_WAIT
         
         # Colors
-        self.colors = {
-            'bg': '#1a1a2e',
-            'card': '#16213e',
-            'accent': '#0f3460',
-            'success': '#00b894',
-            'error': '#e74c3c',
-            'warning': '#f39c12',
-            'text': '#ffffff',
-            'text_dim': '#a0a0a0',
-            'blue': '#3498db',
-            'purple': '#9b59b6'
-        }
+        self.colors = dict(COLORS)
         
         self.setup_ui()
+        
+        # Asyncio runner, shared with any extra panes
+        self.pump = pump or TkAsyncioPump(self.root)
+        self.offload_pool = ThreadPoolExecutor(max_workers=2)  # Heavy steps of this pane's asyncio runs
+        
+        # What-if preview: recomputed off the UI thread whenever a parameter changes
+        self.preview_pool = ThreadPoolExecutor(max_workers=1)
+        self.preview_job = None
+        self.preview_generation = 0
+        for var in (self.base_wait_var, self.num_clients_var, self.max_attempts_var, self.max_wait_var):
+            var.trace_add('write', self.schedule_preview)
+        self.schedule_preview()
+    
+    @property
+    def is_running(self):
+        """True while a demo runs - seen from a stale run it is always False"""
+        return self._running and self.is_current_run()
+    
+    @is_running.setter
+    def is_running(self, value):
+        self._running = value
+    
+    def is_current_run(self):
+        """False for code still working for a stopped or replaced run"""
+        run = CURRENT_RUN.get()
+        return run is None or run is self.active_run
     
     def calculate_failure_rate(self, num_clients, server_load_modifier=0):
         """
@@ -54,28 +2745,11 @@ class ExponentialBackoffDemo:
         More clients = higher failure rate
         Server capacity is 50 clients
         """
-        # Base failure rate depends on how overloaded the server is
-        load_ratio = num_clients / self.server_capacity
-        
-        if load_ratio <= 0.5:
-            base_rate = 0.1  # 10% failure - light load
-        elif load_ratio <= 1.0:
-            base_rate = 0.3  # 30% failure - normal load
-        elif load_ratio <= 2.0:
-            base_rate = 0.6  # 60% failure - heavy load
-        elif load_ratio <= 4.0:
-            base_rate = 0.8  # 80% failure - very heavy
-        else:
-            base_rate = 0.95  # 95% failure - overloaded
-        
-        # Apply modifier (for backoff recovery)
-        adjusted_rate = max(0.05, min(0.99, base_rate + server_load_modifier))
-        return adjusted_rate
+        return failure_rate_for_load(num_clients, server_load_modifier, self.server_capacity)
     
     def calculate_server_load(self, num_clients):
         """Calculate server load percentage based on number of clients"""
-        load = (num_clients / self.server_capacity) * 50  # 50 clients = 50% load
-        return min(100, int(load))
+        return server_load_for_clients(num_clients, self.server_capacity)
     
     def setup_ui(self):
         """Setup the main UI"""
@@ -151,7 +2825,20 @@ class ExponentialBackoffDemo:
             ("Without Backoff", "no_backoff"),
             ("With Backoff", "with_backoff"),
             ("With Jitter", "with_jitter"),
-            ("Exponential Graph", "graph")
+            ("Jitter Heatmap", "jitter_heatmap"),
+            ("Exponential Graph", "graph"),
+            ("Exact Analysis", "exact"),
+            ("Population Simulation", "population"),
+            ("Fault Injection", "faults"),
+            ("Timeouts & Wasted Work", "timeouts"),
+            ("Hedging & Coalescing", "latency"),
+            ("N-way Comparison (CRN)", "crn"),
+            ("Rare-Event Tails", "tails"),
+            ("Adaptive Concurrency (AIMD)", "aimd"),
+            ("Deadline Budgets", "deadlines"),
+            ("Client Classes", "classes"),
+            ("Admission Control", "admission"),
+            ("Goodput Curve", "goodput")
         ]
         
         for text, value in demos:
@@ -268,6 +2955,38 @@ class ExponentialBackoffDemo:
             bg=self.colors['card']
         ).pack(anchor='e', padx=15)
         
+        # Max Wait (cap on any one backoff wait)
+        param_frame_max_wait = tk.Frame(parent, bg=self.colors['card'])
+        param_frame_max_wait.pack(fill='x', padx=15, pady=3)
+        
+        tk.Label(
+            param_frame_max_wait,
+            text="Max Wait (s):",
+            font=("Helvetica", 9),
+            fg=self.colors['text'],
+            bg=self.colors['card']
+        ).pack(side='left')
+        
+        self.max_wait_var = tk.StringVar(value=str(DEFAULT_MAX_WAIT))
+        tk.Entry(
+            param_frame_max_wait,
+            textvariable=self.max_wait_var,
+            width=5,
+            font=("Helvetica", 9),
+            bg=self.colors['accent'],
+            fg=self.colors['text'],
+            insertbackground=self.colors['text']
+        ).pack(side='right')
+        
+        # Max wait hint
+        tk.Label(
+            parent,
+            text="(cap per retry, blank = no cap)",
+            font=("Helvetica", 8),
+            fg=self.colors['text_dim'],
+            bg=self.colors['card']
+        ).pack(anchor='e', padx=15)
+        
         # Animation Speed
         param_frame3 = tk.Frame(parent, bg=self.colors['card'])
         param_frame3.pack(fill='x', padx=15, pady=3)
@@ -290,6 +3009,87 @@ class ExponentialBackoffDemo:
         )
         speed_combo.pack(side='right')
         
+        # Workload (population simulation)
+        param_frame_workload = tk.Frame(parent, bg=self.colors['card'])
+        param_frame_workload.pack(fill='x', padx=15, pady=3)
+        
+        tk.Label(
+            param_frame_workload,
+            text="Workload:",
+            font=("Helvetica", 9),
+            fg=self.colors['text'],
+            bg=self.colors['card']
+        ).pack(side='left')
+        
+        self.workload_var = tk.StringVar(value="Burst")
+        ttk.Combobox(
+            param_frame_workload,
+            textvariable=self.workload_var,
+            values=["Burst", "Poisson", "On/Off", "Spike", "Diurnal", "Trace CSV"],
+            width=9,
+            state="readonly"
+        ).pack(side='right')
+        self.trace_path = None
+        
+        # Runner: worker thread, or asyncio coroutine on the UI thread
+        param_frame_runner = tk.Frame(parent, bg=self.colors['card'])
+        param_frame_runner.pack(fill='x', padx=15, pady=3)
+        
+        tk.Label(
+            param_frame_runner,
+            text="Runner:",
+            font=("Helvetica", 9),
+            fg=self.colors['text'],
+            bg=self.colors['card']
+        ).pack(side='left')
+        
+        tk.Button(
+            param_frame_runner,
+            text="+ Pane",
+            font=("Helvetica", 8, "bold"),
+            fg=self.colors['text'],
+            bg=self.colors['accent'],
+            activebackground="#0d2d4d",
+            activeforeground=self.colors['text'],
+            border=0,
+            cursor="hand2",
+            command=self.new_pane
+        ).pack(side='right', padx=(4, 0))
+        
+        self.runner_var = tk.StringVar(value="Thread")
+        ttk.Combobox(
+            param_frame_runner,
+            textvariable=self.runner_var,
+            values=["Thread", "Asyncio"],
+            width=7,
+            state="readonly"
+        ).pack(side='right')
+        
+        # Profiling toggles
+        profile_frame = tk.Frame(parent, bg=self.colors['card'])
+        profile_frame.pack(fill='x', padx=15, pady=3)
+        
+        self.overlay_var = tk.BooleanVar(value=False)
+        self.cprofile_var = tk.BooleanVar(value=False)
+        self.record_var = tk.BooleanVar(value=False)
+        
+        for text, variable in (("Overlay", self.overlay_var), ("cProfile", self.cprofile_var),
+                               ("Record", self.record_var)):
+            tk.Checkbutton(
+                profile_frame,
+                text=text,
+                variable=variable,
+                font=("Helvetica", 8),
+                fg=self.colors['text'],
+                bg=self.colors['card'],
+                selectcolor=self.colors['accent'],
+                activebackground=self.colors['card'],
+                activeforeground=self.colors['text']
+            ).pack(side='left')
+        
+        # F12 toggles the overlay
+        self.root.bind("<F12>", lambda e: self.overlay_var.set(not self.overlay_var.get()))
+        
         # Separator
         ttk.Separator(parent, orient='horizontal').pack(fill='x', padx=15, pady=10)
         
@@ -396,13 +3196,17 @@ class ExponentialBackoffDemo:
         ).pack(pady=(15, 5))
         
         # Canvas for animation
-        self.canvas = tk.Canvas(
+        self.canvas = InstrumentedCanvas(
             parent,
+            self.profiler,
+            self.is_current_run,
             bg=self.colors['bg'],
             highlightthickness=0,
             height=450
         )
-        self.canvas.pack(fill=tk.BOTH, expand=True, padx=15, pady=(0, 15))
+        self.canvas.pack(fill=tk.BOTH, expand=True, padx=15, pady=(0, 5))
+        
+        self.setup_timeline(parent)
         
         # Draw initial state after window is fully loaded
         self.root.after(200, self.draw_initial_state)
@@ -410,6 +3214,85 @@ class ExponentialBackoffDemo:
         # Redraw when canvas is resized
         self.canvas.bind("<Configure>", lambda e: self.draw_initial_state() if not self.is_running else None)
     
+    def setup_timeline(self, parent):
+        """Slider for scrubbing through a recorded trace"""
+        timeline_frame = tk.Frame(parent, bg=self.colors['card'])
+        timeline_frame.pack(fill='x', padx=15, pady=(0, 10))
+        
+        tk.Button(
+            timeline_frame,
+            text="Open Trace",
+            font=("Helvetica", 8, "bold"),
+            fg=self.colors['text'],
+            bg=self.colors['accent'],
+            activebackground="#0d2d4d",
+            activeforeground=self.colors['text'],
+            border=0,
+            cursor="hand2",
+            command=self.open_trace
+        ).pack(side='left')
+        
+        self.timeline_var = tk.DoubleVar(value=0.0)
+        self.timeline = tk.Scale(
+            timeline_frame,
+            variable=self.timeline_var,
+            from_=0,
+            to=1,
+            resolution=0.01,
+            orient='horizontal',
+            showvalue=True,
+            state='disabled',
+            command=self.schedule_seek,
+            font=("Helvetica", 8),
+            fg=self.colors['text'],
+            bg=self.colors['card'],
+            troughcolor=self.colors['accent'],
+            highlightthickness=0
+        )
+        self.timeline.pack(side='left', fill='x', expand=True, padx=(8, 0))
+        self.timeline_trace = None
+        self.seek_job = None
+    
+    def open_trace(self):
+        """Load an indexed trace and put it on the timeline"""
+        if self.is_running:
+            self.log("Stop the demo before opening a trace", 'warning')
+            return
+        path = filedialog.askopenfilename(
+            title="Recorded trace",
+            filetypes=[("Indexed traces", f"*{TRACE_SUFFIX}"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        try:
+            trace = IndexedTrace(path)
+        except ValueError as error:
+            self.log(str(error), 'error')
+            return
+        
+        if self.timeline_trace is not None:
+            self.timeline_trace.close()
+        self.timeline_trace = trace
+        self.timeline.config(state='normal', to=max(trace.duration, 0.01))
+        self.timeline_var.set(0.0)
+        self.log(f"Trace {os.path.basename(path)}: {trace.frames} frames over {trace.duration:.1f}s", 'info')
+        self.seek_timeline()
+    
+    def schedule_seek(self, _value=None):
+        """Seek once the slider stops for a moment, not on every intermediate value"""
+        if self.seek_job is None:
+            self.seek_job = self.root.after_idle(self.seek_timeline)
+    
+    def seek_timeline(self):
+        """Show the trace frame at the slider's position"""
+        self.seek_job = None
+        if self.timeline_trace is None or self.is_running:
+            return
+        start = time.perf_counter()
+        shown_at, items = self.timeline_trace.frame_at(self.timeline_var.get())
+        draw_trace_items(self.canvas, items)
+        self.update_stats(status=f"Trace at {shown_at:.2f}s ({(time.perf_counter() - start) * 1000:.0f} ms)")
+    
     def setup_bottom_panel(self, parent):
         """Setup bottom panel with stats and log"""
         # Stats panel
@@ -481,6 +3364,15 @@ class ExponentialBackoffDemo:
         )
         self.stat_server_load.pack(anchor='w')
         
+        self.stat_drain = tk.Label(
+            right_stats,
+            text="Drain: -",
+            font=("Helvetica", 10),
+            fg=self.colors['purple'],
+            bg=self.colors['card']
+        )
+        self.stat_drain.pack(anchor='w')
+        
         self.stat_status = tk.Label(
             right_stats,
             text="Status: Ready",
@@ -490,6 +3382,45 @@ class ExponentialBackoffDemo:
         )
         self.stat_status.pack(anchor='w')
         
+        # What-if preview of the current parameters, before pressing Start
+        preview_stats = tk.Frame(stats_container, bg=self.colors['card'])
+        preview_stats.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        tk.Label(
+            preview_stats,
+            text="What-if (Backoff):",
+            font=("Helvetica", 10, "bold"),
+            fg=self.colors['text_dim'],
+            bg=self.colors['card']
+        ).pack(anchor='w')
+        
+        self.preview_success = tk.Label(
+            preview_stats,
+            text="Success: -",
+            font=("Helvetica", 10),
+            fg=self.colors['success'],
+            bg=self.colors['card']
+        )
+        self.preview_success.pack(anchor='w')
+        
+        self.preview_wait = tk.Label(
+            preview_stats,
+            text="p99 Wait: -",
+            font=("Helvetica", 10),
+            fg=self.colors['text'],
+            bg=self.colors['card']
+        )
+        self.preview_wait.pack(anchor='w')
+        
+        self.preview_peak = tk.Label(
+            preview_stats,
+            text="Peak Load: -",
+            font=("Helvetica", 10),
+            fg=self.colors['warning'],
+            bg=self.colors['card']
+        )
+        self.preview_peak.pack(anchor='w')
+        
         # Log panel
         log_frame = tk.Frame(parent, bg=self.colors['card'], height=120, width=400)
         log_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(5, 0))
@@ -566,19 +3497,79 @@ class ExponentialBackoffDemo:
     
     def log(self, message, tag=None):
         """Add message to log"""
-        self.log_text.config(state='normal')
-        timestamp = time.strftime("%H:%M:%S")
-        
-        if tag:
-            self.log_text.insert(tk.END, f"[{timestamp}] {message}\n", tag)
-        else:
-            self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
+        if not self.is_current_run():
+            return
+        with self.profiler.span('log'):
+            self.log_text.config(state='normal')
+            timestamp = time.strftime("%H:%M:%S")
+            
+            if tag:
+                self.log_text.insert(tk.END, f"[{timestamp}] {message}\n", tag)
+            else:
+                self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
+            
+            self.log_text.see(tk.END)
+            self.log_text.config(state='disabled')
+    
+    def pause(self, seconds):
+        """Wait between animation steps, waking up as soon as the run is stopped"""
+        run = CURRENT_RUN.get()
+        with self.profiler.span('sleep'):
+            if run is None:
+                time.sleep(seconds)
+            else:
+                run.sleep(seconds)
+    
+    def refresh_canvas(self):
+        """Push pending drawing to the screen - one animation frame"""
+        if not self.is_current_run():
+            return
+        if self.overlay_var.get():
+            self.draw_profile_overlay()
+        run = CURRENT_RUN.get()
+        if run is not None and run.recorder is not None:
+            run.recorder.mark_frame(time.perf_counter() - run.record_start)
+        with self.profiler.span('canvas.update'):
+            if run is not None and run.runner == "Asyncio":
+                self.canvas.update_idletasks()  # Already on the UI thread, just redraw
+            else:
+                self.canvas.update()
+        self.profiler.end_frame()
+    
+    def draw_profile_overlay(self):
+        """Draw frame time, events, item count and log backlog in the top-right corner"""
+        frame = self.profiler.last_frame
+        item_count = len(self.canvas.find_all())
+        log_lines = int(self.log_text.index('end-1c').split('.')[0]) - 1
+        
+        lines = [
+            f"frame: {frame['frame_ms']:.1f} ms",
+            f"events/frame: {frame['events']}",
+            f"canvas items: {item_count}",
+            f"log backlog: {log_lines} lines"
+        ]
+        for name, seconds in sorted(frame['spans'].items(), key=lambda item: -item[1]):
+            lines.append(f"{name}: {seconds * 1000:.1f} ms")
         
-        self.log_text.see(tk.END)
-        self.log_text.config(state='disabled')
+        # Don't count the overlay's own drawing
+        self.profiler.enabled = False
+        try:
+            self.canvas.delete("profile_overlay")
+            width = self.canvas.winfo_width() or 700
+            x = width - 190
+            self.canvas.create_rectangle(x, 5, width - 5, 12 + 14 * len(lines),
+                                         fill='black', outline=self.colors['text_dim'], tags="profile_overlay")
+            for i, line in enumerate(lines):
+                self.canvas.create_text(x + 8, 15 + 14 * i, text=line, anchor='w',
+                                       font=("Courier", 8), fill=self.colors['success'], tags="profile_overlay")
+        finally:
+            self.profiler.enabled = True
     
-    def update_stats(self, clients=None, requests=None, failures=None, total_wait=None, server_load=None, status=None):
+    def update_stats(self, clients=None, requests=None, failures=None, total_wait=None, server_load=None, status=None,
+                     drain_time=None, goodput=None):
         """Update statistics display"""
+        if not self.is_current_run():
+            return
         if clients is not None:
             self.stat_clients.config(text=f"Clients: {clients}")
         if requests is not None:
@@ -598,10 +3589,13 @@ class ExponentialBackoffDemo:
                 self.stat_server_load.config(fg=self.colors['success'])
         if status is not None:
             self.stat_status.config(text=f"Status: {status}")
+        if drain_time is not None:
+            self.stat_drain.config(text=f"Drain: {drain_time}s | Goodput: {goodput}/s")
     
     def reset_stats(self):
         """Reset all statistics"""
         self.update_stats(clients=0, requests=0, failures=0, total_wait=0, server_load=0, status="Ready")
+        self.stat_drain.config(text="Drain: -")
     
     def get_speed_multiplier(self):
         """Get animation speed multiplier"""
@@ -614,12 +3608,25 @@ class ExponentialBackoffDemo:
     
     def start_demo(self):
         """Start the selected demo"""
+        self.cancel_run()  # The previous run may still be winding down
         self.is_running = True
         self.start_btn.config(state='disabled')
         self.stop_btn.config(state='normal')
         
         demo_type = self.demo_var.get()
         
+        # Trace replay needs a file, and dialogs must open on the UI thread
+        if demo_type == "population" and self.workload_var.get() == "Trace CSV":
+            self.trace_path = filedialog.askopenfilename(
+                title="Arrival timestamps",
+                filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+            )
+            if not self.trace_path:
+                self.is_running = False
+                self.start_btn.config(state='normal')
+                self.stop_btn.config(state='disabled')
+                return
+        
         # Clear log
         self.log_text.config(state='normal')
         self.log_text.delete(1.0, tk.END)
@@ -630,15 +3637,191 @@ class ExponentialBackoffDemo:
         self.update_stats(status="Running...")
         
         self.log(f"Starting demo: {demo_type}", 'info')
+        self.profiler.reset()
+        
+        run = self.active_run = DemoRun(demo_type, self.runner_var.get())
+        
+        # Mirror every draw into a trace that can be rendered offscreen or scrubbed later
+        if self.record_var.get():
+            filename = f"trace_{demo_type}_{time.strftime('%Y%m%d_%H%M%S')}{TRACE_SUFFIX}"
+            writer = IndexedTraceWriter(filename, self.canvas.winfo_width(), self.canvas.winfo_height(),
+                                        self.colors['bg'])
+            run.recorder = RecordingCanvas(self.canvas.winfo_width(), self.canvas.winfo_height(),
+                                           self.colors['bg'], writer)
+            run.record_start = time.perf_counter()
+        self.canvas.recorder = run.recorder
+        
+        if run.runner == "Asyncio":
+            # Coroutine on the UI thread, pumped by Tk
+            run.task = self.pump.spawn(self.run_demo_async(run))
+            run.task.add_done_callback(lambda task: self.async_run_done(run, task))
+        else:
+            # Run demo in separate thread
+            run.thread = threading.Thread(target=self.run_in_context, args=(run,))
+            run.thread.daemon = True
+            run.thread.start()
+    
+    def run_in_context(self, run):
+        """Worker thread body: everything it does belongs to `run`"""
+        CURRENT_RUN.set(run)
+        try:
+            self.run_demo(run.demo_type)
+        finally:
+            self.close_recorder(run)  # Nothing of this run draws any more
+    
+    async def run_demo_async(self, run):
+        """
+        Asyncio runner: the same demo steps, awaiting each wait instead of sleeping
+        
+        Waits are the demo's own delays, already scaled by Speed, awaited on
+        the pumped loop's wall clock - the animation has to play in real
+        time, so there is no separate virtual clock.
+        """
+        CURRENT_RUN.set(run)  # Tasks have their own context, so this stays local
+        steps, profile = self.prepare_demo(run.demo_type)
+        try:
+            while True:
+                delay = self.next_step(steps, profile)
+                if delay is None:
+                    break
+                if isinstance(delay, Future):
+                    # A heavy step from offload(): wait for its worker, the step picks up the result
+                    await asyncio.wait([asyncio.wrap_future(delay)])
+                    continue
+                with self.profiler.span('sleep'):
+                    await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            steps.close()  # Stopped or reset: unwind the demo, then end the task as cancelled
+            raise
+        self.finish_demo(run.demo_type, profile)
+    
+    def async_run_done(self, run, task):
+        """Done callback of an asyncio run: finish its trace, and report a crash rather than drop it"""
+        self.close_recorder(run)
+        if task.cancelled() or task.exception() is None:
+            return
+        self.log(f"Demo failed: {task.exception()!r}", 'error')
+        if run is self.active_run:
+            self.cancel_run()
+            self.start_btn.config(state='normal')
+            self.stop_btn.config(state='disabled')
+            self.update_stats(status="Failed")
+    
+    def offload(self, fn, *args, **kwargs):
+        """
+        Heavy computation inside a demo step, for use with `yield from`
         
-        # Run demo in separate thread
-        thread = threading.Thread(target=self.run_demo, args=(demo_type,))
-        thread.daemon = True
-        thread.start()
+        The asyncio runner shares the UI thread with every pane, so there
+        `fn` runs on a worker thread while the runner awaits it. Anywhere
+        else it just runs here.
+        """
+        run = CURRENT_RUN.get()
+        if run is None or run.runner != "Asyncio":
+            return fn(*args, **kwargs)
+        job = self.offload_pool.submit(fn, *args, **kwargs)
+        yield job
+        return job.result()
+    
+    def schedule_preview(self, *_):
+        """Rerun the what-if preview once typing pauses"""
+        if self.preview_job is not None:
+            self.root.after_cancel(self.preview_job)
+        self.preview_job = self.root.after(PREVIEW_DEBOUNCE_MS, self.start_preview)
+    
+    def start_preview(self):
+        """Hand the current parameters to the preview worker"""
+        self.preview_job = None
+        self.preview_generation += 1
+        try:
+            base_wait = float(self.base_wait_var.get())
+            num_clients = int(self.num_clients_var.get())
+            max_attempts = int(self.max_attempts_var.get())
+            max_wait = self.read_max_wait()
+        except ValueError:
+            self.show_preview(None)
+            return
+        max_attempts = max(1, min(10, max_attempts))  # Clamped the way a run clamps it
+        if base_wait < 0 or num_clients < 1:
+            self.show_preview(None)
+            return
+        
+        job = self.preview_pool.submit(preview_estimate, base_wait, num_clients, max_attempts, self.server_capacity,
+                                       max_wait)
+        self.root.after(5, self.poll_preview, job, self.preview_generation)
+    
+    def poll_preview(self, job, generation):
+        """Show the worker's answer on the UI thread, unless newer edits made it stale"""
+        if generation != self.preview_generation:
+            return
+        if not job.done():
+            self.root.after(5, self.poll_preview, job, generation)
+            return
+        try:
+            preview = job.result()
+        except Exception:
+            preview = None  # Parameters the estimate can't handle: no preview rather than a broken callback
+        self.show_preview(preview)
+    
+    def show_preview(self, preview):
+        if preview is None:
+            self.preview_success.config(text="Success: -")
+            self.preview_wait.config(text="p99 Wait: -")
+            self.preview_peak.config(text="Peak Load: -")
+            return
+        self.preview_success.config(text=f"Success: {preview['success']:.1%} "
+                                         f"(none: {preview['success_no_backoff']:.0%})")
+        self.preview_wait.config(text=f"p99 Wait: {preview['p99_wait']:.1f}s")
+        self.preview_peak.config(text=f"Peak Load: {preview['peak_load']:.0f}/s")
+    
+    def new_pane(self):
+        """Open another independent demo window that shares this asyncio loop"""
+        pane = ExponentialBackoffDemo(tk.Toplevel(self.root), self.pump)
+        pane.runner_var.set("Asyncio")
+        pane.root.title("Exponential Backoff Demo - Scenario Pane")
+        pane.root.protocol("WM_DELETE_WINDOW", pane.close_pane)
+    
+    def close_pane(self):
+        """Stop this pane's run, and let it finish its trace, before the widgets go away"""
+        run = self.active_run
+        self.cancel_run()
+        if run is not None and run.task is not None:
+            self.pump.finish(run.task)
+        elif run is not None and run.thread is not None:
+            run.thread.join(2.0)  # Its current step may still be computing
+        self.root.destroy()
+    
+    def cancel_run(self):
+        """Stop the active run: wake its sleeps and drop whatever it still draws"""
+        self.is_running = False
+        self.canvas.recorder = None  # Later draws stay out of the trace; the run closes it as it exits
+        if self.active_run is not None:
+            self.active_run.cancel()
+            self.active_run = None
+    
+    def close_recorder(self, run):
+        """Finish `run`'s trace file, if it recorded one - only once nothing of the run draws any more"""
+        recorder, run.recorder = run.recorder, None
+        if recorder is None:
+            return
+        if self.canvas.recorder is recorder:
+            self.canvas.recorder = None
+        recorder.mark_frame(time.perf_counter() - run.record_start)
+        recorder.sink.close()
+        try:
+            # From the UI thread, where it shows even when the run was stopped
+            self.root.after(0, self.report_trace, recorder.sink)
+        except (tk.TclError, RuntimeError):
+            pass  # The window is already gone
+    
+    def report_trace(self, sink):
+        """Log where a finished trace went"""
+        if self.log_text.winfo_exists():
+            self.log(f"Trace saved to {sink.path} ({sink.frames} frames) - scrub it with Open Trace, "
+                     f"or render with --render OUT_DIR --trace {sink.path}", 'info')
     
     def stop_demo(self):
         """Stop the current demo"""
-        self.is_running = False
+        self.cancel_run()
         self.start_btn.config(state='normal')
         self.stop_btn.config(state='disabled')
         self.update_stats(status="Stopped")
@@ -646,7 +3829,7 @@ class ExponentialBackoffDemo:
     
     def reset_demo(self):
         """Reset the demo"""
-        self.is_running = False
+        self.cancel_run()
         self.start_btn.config(state='normal')
         self.stop_btn.config(state='disabled')
         
@@ -663,10 +3846,22 @@ class ExponentialBackoffDemo:
     
     def run_demo(self, demo_type):
         """Run the selected demo"""
+        steps, profile = self.prepare_demo(demo_type)
+        while True:
+            delay = self.next_step(steps, profile)
+            if delay is None:
+                break
+            self.pause(delay)
+        self.finish_demo(demo_type, profile)
+    
+    def prepare_demo(self, demo_type):
+        """Read the parameters and create the demo's steps (and a profiler if requested)"""
         try:
             base_wait = float(self.base_wait_var.get())
             num_clients = int(self.num_clients_var.get())
             max_attempts = int(self.max_attempts_var.get())
+            if base_wait < 0 or num_clients < 1:
+                raise ValueError("Base wait must be >= 0 and clients >= 1")
             # Limit attempts to reasonable range
             max_attempts = max(1, min(10, max_attempts))
         except ValueError:
@@ -674,25 +3869,106 @@ class ExponentialBackoffDemo:
             base_wait = 1
             num_clients = 100
             max_attempts = 5
+        try:
+            self.max_wait = self.read_max_wait()
+        except ValueError:
+            self.log(f"Invalid max wait! Using {DEFAULT_MAX_WAIT}s.", 'error')
+            self.max_wait = DEFAULT_MAX_WAIT
         
         self.update_stats(clients=num_clients)
         
+        profile = cProfile.Profile() if self.cprofile_var.get() else None
+        return self.run_selected_demo(demo_type, base_wait, num_clients, max_attempts), profile
+    
+    def read_max_wait(self):
+        """Max Wait field in seconds, None when left blank; ValueError unless it is a positive number"""
+        text = self.max_wait_var.get().strip()
+        if not text:
+            return None
+        max_wait = float(text)
+        if not math.isfinite(max_wait) or max_wait <= 0:
+            raise ValueError(f"Max wait must be a positive number of seconds, not {text}")
+        return max_wait
+    
+    def next_step(self, steps, profile=None):
+        """Run the demo up to its next wait and return it, None once the demo is done"""
+        if profile is None:
+            return next(steps, None)
+        return profile.runcall(next, steps, None)
+    
+    def finish_demo(self, demo_type, profile):
+        """Report profiling results and mark the demo completed"""
+        if profile is not None:
+            self.dump_profile(profile, demo_type)
+        
+        if self.overlay_var.get():
+            for line in self.profiler.summary():
+                self.log(f"[PROFILE] {line}", 'info')
+        
+        if self.is_running:
+            self.root.after(0, self.demo_complete, CURRENT_RUN.get())
+    
+    def run_selected_demo(self, demo_type, base_wait, num_clients, max_attempts):
+        """
+        Steps of the demo for the selected mode
+        
+        Demos are generators that yield how long to wait between frames, so the
+        thread runner and the asyncio runner can both drive them.
+        """
         if demo_type == "comparison":
-            self.run_comparison_demo(base_wait, num_clients, max_attempts)
+            return self.run_comparison_demo(base_wait, num_clients, max_attempts)
         elif demo_type == "no_backoff":
-            self.run_single_demo(base_wait, num_clients, max_attempts, use_backoff=False)
+            return self.run_single_demo(base_wait, num_clients, max_attempts, use_backoff=False)
         elif demo_type == "with_backoff":
-            self.run_single_demo(base_wait, num_clients, max_attempts, use_backoff=True)
+            return self.run_single_demo(base_wait, num_clients, max_attempts, use_backoff=True)
         elif demo_type == "with_jitter":
-            self.run_jitter_demo(base_wait, num_clients, max_attempts)
+            return self.run_jitter_demo(base_wait, num_clients, max_attempts)
+        elif demo_type == "jitter_heatmap":
+            return self.run_heatmap_demo(base_wait, num_clients, max_attempts)
         elif demo_type == "graph":
-            self.run_graph_demo(base_wait, max_attempts)
-        
-        if self.is_running:
-            self.root.after(0, self.demo_complete)
+            return self.run_graph_demo(base_wait, max_attempts)
+        elif demo_type == "exact":
+            return self.run_exact_demo(base_wait, num_clients, max_attempts)
+        elif demo_type == "population":
+            return self.run_population_demo(base_wait, num_clients, max_attempts)
+        elif demo_type == "faults":
+            return self.run_fault_demo(base_wait, num_clients, max_attempts)
+        elif demo_type == "timeouts":
+            return self.run_timeout_demo(base_wait, num_clients, max_attempts)
+        elif demo_type == "latency":
+            return self.run_latency_demo(base_wait, num_clients, max_attempts)
+        elif demo_type == "crn":
+            return self.run_crn_demo(base_wait, num_clients, max_attempts)
+        elif demo_type == "tails":
+            return self.run_tail_demo(base_wait, num_clients, max_attempts)
+        elif demo_type == "aimd":
+            return self.run_aimd_demo(base_wait, num_clients, max_attempts)
+        elif demo_type == "deadlines":
+            return self.run_deadline_demo(base_wait, num_clients, max_attempts)
+        elif demo_type == "classes":
+            return self.run_class_demo(base_wait, num_clients, max_attempts)
+        elif demo_type == "admission":
+            return self.run_admission_demo(base_wait, num_clients, max_attempts)
+        elif demo_type == "goodput":
+            return self.run_goodput_demo(base_wait, num_clients, max_attempts)
+        return iter(())
     
-    def demo_complete(self):
+    def dump_profile(self, profile, demo_type):
+        """Save cProfile stats of a run and log the top entries"""
+        filename = f"profile_{demo_type}_{time.strftime('%Y%m%d_%H%M%S')}.prof"
+        profile.dump_stats(filename)
+        self.log(f"cProfile stats saved to {filename}", 'info')
+        
+        stats = pstats.Stats(profile)
+        top = sorted(stats.stats.items(), key=lambda item: -item[1][3])[:5]
+        for (path, line, func), (_, calls, _, cumulative, _) in top:
+            self.log(f"[CPROFILE] {func}: {cumulative * 1000:.1f}ms cumulative, {calls} calls", 'info')
+    
+    def demo_complete(self, run=None):
         """Called when demo completes"""
+        if run is not self.active_run:
+            return  # Stopped or replaced while this was queued
+        self.active_run = None
         self.is_running = False
         self.start_btn.config(state='normal')
         self.stop_btn.config(state='disabled')
@@ -762,7 +4038,7 @@ class ExponentialBackoffDemo:
             
             # ----- LEFT SIDE: No backoff -----
             left_requests += 1
-            left_server_load = min(100, left_server_load + 10)  # Load increases!
+            left_server_load = next_demo_load(left_server_load, use_backoff=False)  # Load increases!
             
             # Update load bar
             self.canvas.delete("left_load")
@@ -778,7 +4054,7 @@ class ExponentialBackoffDemo:
             )
             
             # Calculate failure based on load
-            failure_rate = self.calculate_failure_rate(num_clients, (left_server_load - 50) * 0.01)
+            failure_rate = demo_failure_rate(num_clients, left_server_load, False, self.server_capacity)
             success_left = random.random() > failure_rate
             
             if success_left:
@@ -801,7 +4077,7 @@ class ExponentialBackoffDemo:
             
             # ----- RIGHT SIDE: With backoff -----
             right_requests += 1
-            wait_right = base_wait * (2 ** attempt)
+            wait_right = capped_backoff(base_wait, attempt, self.max_wait)
             right_total_time += wait_right
             
             # Show waiting
@@ -810,11 +4086,11 @@ class ExponentialBackoffDemo:
                 text=f"Waiting {wait_right}s...",
                 font=("Helvetica", 10), fill=self.colors['warning'], tags="wait_anim"
             )
-            self.canvas.update()
+            self.refresh_canvas()
             
             # During wait, server load decreases!
-            time.sleep(min(wait_right * 0.4, 2.0) * speed)
-            right_server_load = max(20, right_server_load - 15)
+            yield min(wait_right * 0.4, 2.0) * speed
+            right_server_load = next_demo_load(right_server_load, use_backoff=True)
             
             # Update right load bar
             self.canvas.delete("right_load")
@@ -832,7 +4108,7 @@ class ExponentialBackoffDemo:
             self.canvas.delete("wait_anim")
             
             # Better success rate as server recovers
-            failure_rate = self.calculate_failure_rate(num_clients, (right_server_load - 80) * 0.01)
+            failure_rate = demo_failure_rate(num_clients, right_server_load, True, self.server_capacity)
             success_right = random.random() > failure_rate
             
             if success_right:
@@ -861,8 +4137,8 @@ class ExponentialBackoffDemo:
                 server_load=right_server_load
             )
             
-            self.canvas.update()
-            time.sleep(0.5 * speed)
+            self.refresh_canvas()
+            yield 0.5 * speed
             
             if right_success:
                 break
@@ -882,6 +4158,23 @@ class ExponentialBackoffDemo:
         self.canvas.create_text(3 * width // 4, summary_y + 15, text="Server Recovered!" if right_success else "Still Failed", font=("Helvetica", 11, "bold"), fill="white")
         self.canvas.create_text(3 * width // 4, summary_y + 35, text=f"Requests: {right_requests} | Wait: {right_total_time}s", font=("Helvetica", 9), fill="white")
         self.canvas.create_text(3 * width // 4, summary_y + 55, text=f"Final Load: {right_server_load}%", font=("Helvetica", 9), fill="white")
+        
+        # ===== SERVER HINTS =====
+        # Same burst of clients, blind backoff vs honoring the server's Retry-After
+        if self.is_running:
+            policies = standard_policies(base_wait, max_attempts, self.max_wait)
+            blind, hinted = compare_policies(lambda: burst_arrivals(num_clients), policies[2:],
+                                             lambda: ServerModel(self.server_capacity), seed=random.randrange(1 << 30))
+            for result in (blind, hinted):
+                self.log(f"[{result['policy'].upper()}] {num_clients} clients drain in {result['drain_time']:.1f}s, "
+                         f"goodput {result['goodput']:.1f}/s, statuses {result['status_counts']}", 'info')
+            
+            self.canvas.create_text(width // 2, summary_y - 15,
+                                   text=f"{num_clients} clients - blind backoff: drain {blind['drain_time']:.1f}s, "
+                                        f"{blind['goodput']:.1f} ok/s | Retry-After: drain {hinted['drain_time']:.1f}s, "
+                                        f"{hinted['goodput']:.1f} ok/s",
+                                   font=("Helvetica", 9), fill=self.colors['purple'])
+            self.update_stats(drain_time=round(hinted['drain_time'], 1), goodput=round(hinted['goodput'], 1))
     
     def run_single_demo(self, base_wait, num_clients, max_attempts, use_backoff):
         """Run single mode demo with server load visualization"""
@@ -931,14 +4224,11 @@ class ExponentialBackoffDemo:
                 break
             
             total_requests += 1
-            wait_time = base_wait * (2 ** attempt) if use_backoff else 0.1
+            wait_time = demo_wait_time(base_wait, attempt, use_backoff, self.max_wait)
             total_wait += wait_time
             
             # Update server load
-            if use_backoff:
-                server_load = max(20, server_load - 15)
-            else:
-                server_load = min(100, server_load + 10)
+            server_load = next_demo_load(server_load, use_backoff)
             
             # Draw load bar
             self.canvas.delete("server_load")
@@ -978,14 +4268,11 @@ class ExponentialBackoffDemo:
                                        text=f"Waiting: {current_wait:.1f}s / {wait_time}s",
                                        font=("Helvetica", 11, "bold"), fill=self.colors['text'], tags="wait_text")
                 
-                self.canvas.update()
-                time.sleep(min(wait_time / steps, 0.15) * speed)
+                self.refresh_canvas()
+                yield min(wait_time / steps, 0.15) * speed
             
             # Check success based on load
-            if use_backoff:
-                failure_rate = self.calculate_failure_rate(num_clients, (server_load - 80) * 0.01)
-            else:
-                failure_rate = self.calculate_failure_rate(num_clients, (server_load - 50) * 0.01)
+            failure_rate = demo_failure_rate(num_clients, server_load, use_backoff, self.server_capacity)
             
             success = random.random() > failure_rate
             
@@ -1022,7 +4309,7 @@ class ExponentialBackoffDemo:
                                        font=("Helvetica", 14, "bold"), fill=self.colors['success'])
                 break
             
-            time.sleep(0.4 * speed)
+            yield 0.4 * speed
         
         # Total time
         self.canvas.create_text(width // 2, height - 30, text=f"Total waiting time: {total_wait}s",
@@ -1058,6 +4345,13 @@ class ExponentialBackoffDemo:
         bar_width = 400
         bar_height = 30
         bar_x = 180  # Back to original position
+        bar_spacing = 40
+        
+        # Arrival histogram of the whole population goes under the samples
+        hist_top = bar_y + 4 * bar_spacing + 5
+        hist_bottom = height - 95
+        bucket_width = 0.1
+        best_peak = num_clients
         
         if num_clients <= 4:
             self.log(f"Simulating {num_clients} client(s)...", 'info')
@@ -1073,7 +4367,7 @@ class ExponentialBackoffDemo:
             
             # Round label
             self.canvas.delete("round_label")
-            base = base_wait * (2 ** round_num)
+            base = capped_backoff(base_wait, round_num, self.max_wait)
             self.canvas.create_text(width // 2, 115, text=f"Round {round_num + 1} | Base wait: {base}s",
                                    font=("Helvetica", 11, "bold"), fill=self.colors['warning'], tags="round_label")
             
@@ -1083,7 +4377,7 @@ class ExponentialBackoffDemo:
                 if not self.is_running:
                     break
                 
-                y = bar_y + i * 50
+                y = bar_y + i * bar_spacing
                 
                 jitter = random.uniform(0, base * 0.5)
                 total_wait = base + jitter
@@ -1102,26 +4396,777 @@ class ExponentialBackoffDemo:
                 self.canvas.create_rectangle(bar_x, y, bar_x + progress, y + bar_height,
                                             fill=color, outline="", tags="client_bars")
                 
-                # Time label
-                self.canvas.create_text(bar_x + bar_width + 60, y + bar_height // 2,
-                                       text=f"{total_wait:.2f}s", font=("Helvetica", 10, "bold"),
-                                       fill=self.colors['text'], tags="client_bars")
+                # Time label
+                self.canvas.create_text(bar_x + bar_width + 60, y + bar_height // 2,
+                                       text=f"{total_wait:.2f}s", font=("Helvetica", 10, "bold"),
+                                       fill=self.colors['text'], tags="client_bars")
+                
+                self.log(f"{client}: {total_wait:.2f}s (base {base}s + jitter {jitter:.2f}s)", 'info')
+            
+            # Every client, not just the samples
+            start = time.perf_counter()
+            counts = jitter_arrival_histogram(num_clients, base, bucket_width)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            peak = max(counts)
+            best_peak = min(best_peak, peak)
+            self.draw_arrival_histogram(counts, peak, num_clients, bar_x, hist_top, bar_width, hist_bottom)
+            
+            self.log(f"All {num_clients}: peak {num_clients} -> {peak} arrivals per {bucket_width * 1000:.0f}ms "
+                     f"({num_clients / max(peak, 1):.1f}x lower, computed in {elapsed_ms:.1f}ms)", 'success')
+            
+            self.update_stats(requests=num_clients * (round_num + 1), server_load=self.calculate_server_load(peak))
+            self.refresh_canvas()
+            yield 1.5 * speed
+        
+        # Final message
+        self.canvas.create_rectangle(50, height - 80, width - 50, height - 20, fill=self.colors['success'], outline="")
+        self.canvas.create_text(width // 2, height - 60, text=f"Jitter spreads {num_clients} {client_word} over time!",
+                               font=("Helvetica", 12, "bold"), fill="white")
+        self.canvas.create_text(width // 2, height - 40,
+                               text=f"Result: peak {num_clients} -> {best_peak} arrivals per {bucket_width * 1000:.0f}ms "
+                                    f"({num_clients / max(best_peak, 1):.1f}x less congestion)",
+                               font=("Helvetica", 10), fill="white")
+    
+    def draw_arrival_histogram(self, counts, peak, num_clients, x, top, width, bottom):
+        """Bar chart of arrivals per bucket, scaled so the no-jitter spike is full height"""
+        self.canvas.delete("histogram")
+        if bottom - top < 20:
+            return
+        
+        # The no-jitter spike: everyone in one bucket
+        self.canvas.create_line(x, top, x + width, top, fill=self.colors['error'], dash=(3, 3), tags="histogram")
+        self.canvas.create_text(x - 10, top, text=f"no jitter: {num_clients}", anchor='e',
+                               font=("Helvetica", 8), fill=self.colors['error'], tags="histogram")
+        
+        # Merge buckets so each gets at least 2 pixels
+        group = math.ceil(len(counts) / (width / 2))
+        columns = [max(counts[i:i + group]) for i in range(0, len(counts), group)]
+        column_width = width / len(columns)
+        
+        scale = max(num_clients, 1)  # No clients draws an empty chart
+        for i, count in enumerate(columns):
+            y = bottom - (count / scale) * (bottom - top)
+            self.canvas.create_rectangle(x + i * column_width, y, x + (i + 1) * column_width - 1, bottom,
+                                        fill=self.colors['purple'], outline="", tags="histogram")
+        
+        self.canvas.create_text(x - 10, bottom - (peak / scale) * (bottom - top), text=f"peak: {peak}", anchor='e',
+                               font=("Helvetica", 8), fill=self.colors['success'], tags="histogram")
+    
+    def run_heatmap_demo(self, base_wait, num_clients, max_attempts):
+        """Raster of every client's retry timeline, without and with jitter"""
+        self.canvas.delete("all")
+        speed = self.get_speed_multiplier()
+        
+        width = self.canvas.winfo_width() or 700
+        height = self.canvas.winfo_height() or 450
+        
+        # Header
+        self.canvas.create_rectangle(50, 10, width - 50, 50, fill=self.colors['purple'], outline="")
+        self.canvas.create_text(width // 2, 30, text=f"RETRY HEATMAP: {num_clients} CLIENTS",
+                               font=("Helvetica", 16, "bold"), fill="white")
+        
+        # Two rasters stacked: no jitter on top, jitter below
+        image_x = 90
+        image_width = max(100, width - image_x - 30)
+        panel_height = max(40, (height - 150) // 2)
+        num_rounds = max_attempts
+        # Latest possible retry
+        horizon = sum(capped_backoff(base_wait, r, self.max_wait) * 1.5 for r in range(num_rounds))
+        
+        panels = []
+        for i, (label, color) in enumerate((("No Jitter", self.colors['error']), ("Jitter", self.colors['success']))):
+            top = 65 + i * (panel_height + 20)
+            raster = RetryRaster(num_clients, image_width, panel_height, horizon)
+            image = tk.PhotoImage(width=image_width, height=raster.rows)
+            image.put(self.colors['bg'], to=(0, 0, image_width, raster.rows))
+            self.canvas.create_image(image_x, top, image=image, anchor='nw')
+            self.canvas.create_rectangle(image_x, top, image_x + image_width, top + raster.rows,
+                                        outline=self.colors['accent'])
+            self.canvas.create_text(image_x - 10, top + raster.rows // 2, text=label, anchor='e',
+                                   font=("Helvetica", 10, "bold"), fill=color)
+            panels.append((raster, image, blend_palette(self.colors['bg'], color, 16)))
+        
+        # Keep the images alive while they are on the canvas
+        self.heatmap_images = [image for _, image, _ in panels]
+        
+        raster = panels[0][0]
+        if raster.clients_per_row > 1:
+            self.log(f"{num_clients} clients bucketed {raster.clients_per_row} per row", 'info')
+        else:
+            self.log(f"{num_clients} clients, one pixel row each", 'info')
+        
+        no_jitter_time = 0.0
+        jitter_times = [0.0] * num_clients
+        
+        for round_num in range(num_rounds):
+            if not self.is_running:
+                break
+            
+            base = capped_backoff(base_wait, round_num, self.max_wait)
+            no_jitter_time += base
+            
+            no_jitter_raster, jitter_raster = panels[0][0], panels[1][0]
+            for client in range(num_clients):
+                no_jitter_raster.add(client, no_jitter_time)
+                jitter_times[client] += base + random.uniform(0, base * 0.5)
+                jitter_raster.add(client, jitter_times[client])
+            
+            # One bulk write per raster instead of one canvas item per client
+            for raster, image, palette in panels:
+                image.put(raster.photo_data(palette), to=(0, 0))
+            
+            self.log(f"Round {round_num + 1}: all clients at {no_jitter_time:.1f}s without jitter, "
+                     f"spread {min(jitter_times, default=0):.1f}s - {max(jitter_times, default=0):.1f}s with jitter", 'info')
+            self.update_stats(requests=num_clients * (round_num + 1))
+            self.refresh_canvas()
+            yield 1.0 * speed
+        
+        # Time axis
+        axis_y = 65 + 2 * (panel_height + 20) - 10
+        self.canvas.create_text(image_x, axis_y, text="0s", anchor='w', font=("Helvetica", 9), fill=self.colors['text_dim'])
+        self.canvas.create_text(image_x + image_width, axis_y, text=f"{horizon:.0f}s", anchor='e',
+                               font=("Helvetica", 9), fill=self.colors['text_dim'])
+        self.canvas.create_text(width // 2, axis_y, text="Time", font=("Helvetica", 9), fill=self.colors['text_dim'])
+    
+    def run_graph_demo(self, base_wait, max_attempts):
+        """Show exponential growth graph"""
+        self.canvas.delete("all")
+        speed = self.get_speed_multiplier()
+        
+        width = self.canvas.winfo_width() or 700
+        height = self.canvas.winfo_height() or 450
+        
+        # Header
+        self.canvas.create_rectangle(50, 10, width - 50, 50, fill=self.colors['blue'], outline="")
+        self.canvas.create_text(width // 2, 30, text="EXPONENTIAL GROWTH VISUALIZATION",
+                               font=("Helvetica", 16, "bold"), fill="white")
+        
+        # Graph area
+        graph_x = 100
+        graph_y = 80
+        graph_width = width - 200
+        graph_height = height - 180
+        
+        # Draw axes
+        self.canvas.create_line(graph_x, graph_y + graph_height, graph_x + graph_width, graph_y + graph_height,
+                               fill=self.colors['text'], width=2)  # X axis
+        self.canvas.create_line(graph_x, graph_y, graph_x, graph_y + graph_height,
+                               fill=self.colors['text'], width=2)  # Y axis
+        
+        # Labels
+        self.canvas.create_text(graph_x + graph_width // 2, graph_y + graph_height + 30,
+                               text="Attempt Number", font=("Helvetica", 10), fill=self.colors['text'])
+        self.canvas.create_text(graph_x - 40, graph_y + graph_height // 2,
+                               text="Wait\nTime\n(s)", font=("Helvetica", 10), fill=self.colors['text'])
+        
+        # Calculate points using max_attempts
+        max_wait = capped_backoff(base_wait, max_attempts - 1, self.max_wait)
+        
+        points = []
+        for i in range(max_attempts):
+            wait = capped_backoff(base_wait, i, self.max_wait)
+            x = graph_x + (i / (max_attempts - 1)) * graph_width if max_attempts > 1 else graph_x
+            y = graph_y + graph_height - (wait / max_wait) * graph_height
+            points.append((x, y, wait, i + 1))
+        
+        # Draw grid lines and labels
+        for i in range(max_attempts):
+            x = graph_x + (i / (max_attempts - 1)) * graph_width
+            self.canvas.create_line(x, graph_y + graph_height, x, graph_y + graph_height + 5,
+                                   fill=self.colors['text'])
+            self.canvas.create_text(x, graph_y + graph_height + 15, text=str(i + 1),
+                                   font=("Helvetica", 9), fill=self.colors['text'])
+        
+        # Animate the graph
+        self.log("Showing exponential growth...", 'info')
+        
+        prev_point = None
+        for i, (x, y, wait, attempt) in enumerate(points):
+            if not self.is_running:
+                break
+            
+            # Draw line from previous point
+            if prev_point:
+                self.canvas.create_line(prev_point[0], prev_point[1], x, y,
+                                       fill=self.colors['warning'], width=3)
+            
+            # Draw point
+            self.canvas.create_oval(x - 8, y - 8, x + 8, y + 8, fill=self.colors['error'], outline="")
+            
+            # Draw label
+            self.canvas.create_text(x, y - 20, text=f"{wait}s",
+                                   font=("Helvetica", 10, "bold"), fill=self.colors['text'])
+            
+            # Update info box
+            self.canvas.delete("info_box")
+            info_x = width - 150
+            info_y = 100
+            self.canvas.create_rectangle(info_x - 60, info_y, info_x + 60, info_y + 80,
+                                        fill=self.colors['card'], outline=self.colors['accent'], tags="info_box")
+            self.canvas.create_text(info_x, info_y + 15, text=f"Attempt: {attempt}",
+                                   font=("Helvetica", 10), fill=self.colors['text'], tags="info_box")
+            self.canvas.create_text(info_x, info_y + 35, text=f"Wait: {wait}s",
+                                   font=("Helvetica", 12, "bold"), fill=self.colors['warning'], tags="info_box")
+            self.canvas.create_text(info_x, info_y + 55, text=f"= {base_wait} x 2^{i}",
+                                   font=("Helvetica", 9), fill=self.colors['text_dim'], tags="info_box")
+            
+            self.log(f"Attempt {attempt}: wait = {base_wait} x 2^{i} = {wait}s", 'info')
+            self.update_stats(requests=attempt, total_wait=sum(p[2] for p in points[:i+1]))
+            
+            prev_point = (x, y)
+            self.refresh_canvas()
+            yield 1.0 * speed
+        
+        # Summary
+        total = sum(p[2] for p in points)
+        self.canvas.create_rectangle(50, height - 70, width - 50, height - 20,
+                                     fill=self.colors['accent'], outline="")
+        self.canvas.create_text(width // 2, height - 55, text="Key Insight: Wait time DOUBLES with each attempt",
+                               font=("Helvetica", 11, "bold"), fill=self.colors['warning'])
+        self.canvas.create_text(width // 2, height - 35, text=f"Total wait after {max_attempts} attempts: {total}s",
+                               font=("Helvetica", 10), fill=self.colors['text'])
+    
+    def run_exact_demo(self, base_wait, num_clients, max_attempts):
+        """Show the exact outcome distribution of both policies, checked against Monte Carlo"""
+        self.canvas.delete("all")
+        
+        width = self.canvas.winfo_width() or 700
+        height = self.canvas.winfo_height() or 450
+        
+        # Header
+        self.canvas.create_rectangle(50, 10, width - 50, 50, fill=self.colors['blue'], outline="")
+        self.canvas.create_text(width // 2, 30, text="EXACT ANALYSIS (NO SIMULATION)",
+                               font=("Helvetica", 16, "bold"), fill="white")
+        
+        self.log(f"Solving {num_clients} clients, {max_attempts} attempts exactly...", 'info')
+        
+        # Solve both policies and time it
+        start = time.perf_counter()
+        results = [solve_retry_outcome(num_clients, max_attempts, base_wait, use_backoff, self.server_capacity,
+                                       self.max_wait)
+                   for use_backoff in (False, True)]
+        solve_us = (time.perf_counter() - start) * 1e6
+        
+        # Divider
+        self.canvas.create_line(width // 2, 60, width // 2, height - 80, fill=self.colors['text_dim'], width=2, dash=(5, 5))
+        
+        chart_top = 110
+        chart_bottom = height - 130
+        
+        for side, result in enumerate(results):
+            left = side * width // 2 + 30
+            right = (side + 1) * width // 2 - 30
+            center = (left + right) // 2
+            
+            if result['use_backoff']:
+                title, title_color = "With Backoff", self.colors['success']
+            else:
+                title, title_color = "No Backoff", self.colors['error']
+            self.canvas.create_text(center, 75, text=title, font=("Helvetica", 13, "bold"), fill=title_color)
+            
+            # One bar per attempt plus one for running out of attempts
+            probs = result['attempt_distribution'] + [result['exhausted_probability']]
+            slot = (right - left) / len(probs)
+            for i, prob in enumerate(probs):
+                x0 = left + i * slot + slot * 0.15
+                x1 = left + (i + 1) * slot - slot * 0.15
+                y0 = chart_bottom - prob * (chart_bottom - chart_top)
+                exhausted = i == len(probs) - 1
+                self.canvas.create_rectangle(x0, y0, x1, chart_bottom,
+                                            fill=self.colors['error'] if exhausted else self.colors['success'], outline="")
+                self.canvas.create_text((x0 + x1) / 2, y0 - 10, text=f"{prob:.0%}",
+                                       font=("Helvetica", 8), fill=self.colors['text'])
+                self.canvas.create_text((x0 + x1) / 2, chart_bottom + 12, text="X" if exhausted else str(i + 1),
+                                       font=("Helvetica", 9, "bold"), fill=self.colors['text_dim'])
+            
+            self.canvas.create_text(center, chart_bottom + 32,
+                                   text=f"Success: {result['success_probability']:.1%} | "
+                                        f"Avg attempts: {result['expected_attempts']:.2f}",
+                                   font=("Helvetica", 10, "bold"), fill=self.colors['text'])
+            self.canvas.create_text(center, chart_bottom + 50,
+                                   text=f"Expected total wait: {result['expected_total_wait']:.2f}s",
+                                   font=("Helvetica", 10), fill=self.colors['warning'])
+            
+            self.log(f"[{title.upper()}] success {result['success_probability']:.2%}, "
+                     f"avg attempts {result['expected_attempts']:.2f}, "
+                     f"avg wait {result['expected_total_wait']:.2f}s", 'success')
+        
+        self.refresh_canvas()
+        
+        # Ground-truth check of the stochastic engine
+        runs = 5000
+        worst_gap = 0.0
+        for result in results:
+            if not self.is_running:
+                break
+            estimate = monte_carlo_retry_outcome(num_clients, max_attempts, base_wait, result['use_backoff'],
+                                                 runs, server_capacity=self.server_capacity, max_wait=self.max_wait)
+            gap = abs(estimate['success_probability'] - result['success_probability'])
+            worst_gap = max(worst_gap, gap)
+            label = "BACKOFF" if result['use_backoff'] else "NO BACKOFF"
+            self.log(f"[{label}] Monte Carlo ({runs} runs): {estimate['success_probability']:.2%} "
+                     f"vs exact {result['success_probability']:.2%}", 'info')
+            yield 0  # Let other panes draw between the checks
+        
+        self.update_stats(requests=0, total_wait=round(results[1]['expected_total_wait'], 2))
+        
+        # Summary
+        self.canvas.create_rectangle(50, height - 70, width - 50, height - 20,
+                                     fill=self.colors['accent'], outline="")
+        self.canvas.create_text(width // 2, height - 55, text=f"Solved exactly in {solve_us:.0f} microseconds",
+                               font=("Helvetica", 11, "bold"), fill=self.colors['warning'])
+        self.canvas.create_text(width // 2, height - 35,
+                               text=f"Monte Carlo ({runs} runs each) agrees within {worst_gap:.1%}",
+                               font=("Helvetica", 10), fill=self.colors['text'])
+    
+    
+    def make_workload(self, num_clients, seed):
+        """
+        Arrival generator for the selected workload
+        
+        For streaming workloads Number of Clients is the arrival rate per
+        second, so 50 = capacity and 100+ = overload like everywhere else.
+        """
+        workload = self.workload_var.get()
+        horizon = POPULATION_HORIZON
+        
+        if workload == "Poisson":
+            return poisson_arrivals(num_clients, horizon, seed)
+        elif workload == "On/Off":
+            return on_off_arrivals(num_clients * 2, 5, 5, horizon, seed)
+        elif workload == "Spike":
+            return step_spike_arrivals(num_clients / 2, num_clients * 4, 10, 3, horizon, seed)
+        elif workload == "Diurnal":
+            return diurnal_arrivals(num_clients, horizon, 0.8, horizon, seed)
+        elif workload == "Trace CSV" and self.trace_path:
+            return trace_arrivals(self.trace_path, horizon=horizon)
+        return burst_arrivals(num_clients)
+    
+    def run_population_demo(self, base_wait, num_clients, max_attempts):
+        """Many clients and all policies against a shared server, second by second"""
+        workload = self.workload_var.get()
+        
+        # Same arrivals for every policy so only the retry strategy differs
+        seed = random.randrange(1 << 30)
+        policies = standard_policies(base_wait, max_attempts, self.max_wait)
+        sims = [PopulationSimulation(self.make_workload(num_clients, seed), policy,
+                                     ServerModel(self.server_capacity), POPULATION_HORIZON, seed)
+                for policy in policies]
+        
+        self.log(f"Workload: {workload}, server capacity {self.server_capacity}/s", 'info')
+        
+        duration = POPULATION_HORIZON + sum(capped_backoff(base_wait, a, self.max_wait) * 1.5 for a in range(max_attempts))
+        legend_x = yield from self.animate_simulations(f"POPULATION SIMULATION: {workload.upper()} WORKLOAD",
+                                                       sims, duration, max(self.server_capacity, num_clients) * 2)
+        
+        # Summary per policy
+        for i, (sim, color) in enumerate(zip(sims, self.policy_colors())):
+            result = sim.results()
+            y = 180 + i * 64
+            self.canvas.create_text(legend_x, y, text=result['policy'], anchor='w',
+                                   font=("Helvetica", 10, "bold"), fill=color)
+            self.canvas.create_text(legend_x, y + 18, text=f"Success: {result['success_rate']:.1%}", anchor='w',
+                                   font=("Helvetica", 9), fill=self.colors['text'])
+            self.canvas.create_text(legend_x, y + 34, text=f"Req/client: {result['amplification']:.2f}", anchor='w',
+                                   font=("Helvetica", 9), fill=self.colors['text'])
+            self.canvas.create_text(legend_x, y + 50, text=f"Drain: {result['drain_time']:.1f}s | "
+                                                         f"{result['goodput']:.1f} ok/s", anchor='w',
+                                   font=("Helvetica", 9), fill=self.colors['text'])
+            self.log(f"[{result['policy'].upper()}] {result['clients']} clients, {result['success_rate']:.1%} success, "
+                     f"{result['amplification']:.2f} requests/client, peak {result['peak_load']}/s, "
+                     f"drained in {result['drain_time']:.1f}s", 'success' if result['success_rate'] > 0.9 else 'warning')
+        
+        hinted = sims[3].results()
+        self.update_stats(drain_time=round(hinted['drain_time'], 1), goodput=round(hinted['goodput'], 1))
+    
+    def run_fault_demo(self, base_wait, num_clients, max_attempts):
+        """Steady traffic through an outage, a brownout and a slow recovery"""
+        faults = default_fault_timeline()
+        cleared_at = faults.cleared_at()
+        
+        seed = random.randrange(1 << 30)
+        policies = standard_policies(base_wait, max_attempts, self.max_wait)
+        sims = [PopulationSimulation(poisson_arrivals(num_clients, FAULT_HORIZON, seed), policy,
+                                     ServerModel(self.server_capacity, faults=faults), FAULT_HORIZON, seed)
+                for policy in policies]
+        
+        self.log(f"Poisson traffic at {num_clients}/s, server capacity {self.server_capacity}/s", 'info')
+        for start, end, label in faults.windows():
+            self.log(f"Fault: {label} from {start}s to {end}s", 'warning')
+        if num_clients >= self.server_capacity:
+            self.log("Traffic alone exceeds capacity - try 25-45 clients/s to see metastable failure", 'warning')
+        
+        legend_x = yield from self.animate_simulations("FAULT INJECTION: OUTAGE + BROWNOUT", sims, FAULT_HORIZON,
+                                                       max(self.server_capacity, num_clients) * 3, faults)
+        
+        # Time-to-recover per policy
+        for i, (sim, color) in enumerate(zip(sims, self.policy_colors())):
+            result = sim.results()
+            result.update(recovery_report(result, self.server_capacity, cleared_at, FAULT_HORIZON))
+            if result['metastable']:
+                verdict, tag = "METASTABLE - never recovered", 'error'
+            else:
+                verdict, tag = f"Recovered {result['time_to_recover']:.0f}s after faults", 'success'
+            
+            y = 180 + i * 50
+            self.canvas.create_text(legend_x, y, text=result['policy'], anchor='w',
+                                   font=("Helvetica", 10, "bold"), fill=color)
+            self.canvas.create_text(legend_x, y + 17, text=verdict, anchor='w', font=("Helvetica", 8),
+                                   fill=self.colors[tag])
+            self.canvas.create_text(legend_x, y + 32, text=f"Success: {result['success_rate']:.1%}", anchor='w',
+                                   font=("Helvetica", 8), fill=self.colors['text'])
+            self.log(f"[{result['policy'].upper()}] {verdict}, {result['success_rate']:.1%} success", tag)
+    
+    def run_timeout_demo(self, base_wait, num_clients, max_attempts):
+        """Attempts that take time, clients that stop waiting, and the server work thrown away"""
+        workload = self.workload_var.get()
+        service = ServiceTime("lognormal", mean=0.2)
+        
+        seed = random.randrange(1 << 30)
+        policies = standard_policies(base_wait, max_attempts, self.max_wait)
+        for policy in policies:
+            policy.timeout = CLIENT_TIMEOUT
+        sims = [PopulationSimulation(self.make_workload(num_clients, seed), policy,
+                                     ServerModel(self.server_capacity, service=service), POPULATION_HORIZON, seed)
+                for policy in policies]
+        
+        self.log(f"Workload: {workload}, lognormal service time (mean {service.mean}s, "
+                 f"slower when overloaded), client timeout {CLIENT_TIMEOUT}s", 'info')
+        
+        duration = POPULATION_HORIZON + sum((capped_backoff(base_wait, a, self.max_wait) + CLIENT_TIMEOUT) * 1.5
+                                            for a in range(max_attempts))
+        legend_x = yield from self.animate_simulations(f"TIMEOUTS & WASTED WORK: {workload.upper()} WORKLOAD",
+                                                       sims, duration, max(self.server_capacity, num_clients) * 2)
+        
+        # Wasted capacity per policy
+        for i, (sim, color) in enumerate(zip(sims, self.policy_colors())):
+            result = sim.results()
+            y = 180 + i * 64
+            self.canvas.create_text(legend_x, y, text=result['policy'], anchor='w',
+                                   font=("Helvetica", 10, "bold"), fill=color)
+            self.canvas.create_text(legend_x, y + 18, text=f"Success: {result['success_rate']:.1%}", anchor='w',
+                                   font=("Helvetica", 9), fill=self.colors['text'])
+            self.canvas.create_text(legend_x, y + 34, text=f"Timeouts: {result['timeouts']}", anchor='w',
+                                   font=("Helvetica", 9), fill=self.colors['text'])
+            self.canvas.create_text(legend_x, y + 50, text=f"Wasted work: {result['wasted_fraction']:.1%}", anchor='w',
+                                   font=("Helvetica", 9),
+                                   fill=self.colors['error' if result['wasted_fraction'] > 0.1 else 'text'])
+            self.log(f"[{result['policy'].upper()}] {result['success_rate']:.1%} success, {result['timeouts']} timeouts, "
+                     f"{result['wasted_work']:.0f}s of {result['busy_time']:.0f}s server work "
+                     f"({result['wasted_fraction']:.1%}) spent on abandoned requests",
+                     'warning' if result['wasted_fraction'] > 0.1 else 'success')
+        
+        hinted = sims[3].results()
+        self.update_stats(drain_time=round(hinted['drain_time'], 1), goodput=round(hinted['goodput'], 1))
+    
+    def run_latency_demo(self, base_wait, num_clients, max_attempts):
+        """Hedged requests and server-side coalescing against plain backoff: p99 latency vs extra load"""
+        workload = self.workload_var.get()
+        service = ServiceTime("lognormal", mean=0.2)
+        hedge_after = service.quantile(0.95)
+        
+        seed = random.randrange(1 << 30)
+        strategies = [
+            (RetryPolicy("No Backoff", 0.1, max_attempts, backoff=False), None),
+            (RetryPolicy("Backoff + Jitter", base_wait, max_attempts, jitter=0.5, max_wait=self.max_wait), None),
+            (RetryPolicy("Hedged (p95)", base_wait, max_attempts, jitter=0.5, hedge_after=hedge_after,
+                         max_wait=self.max_wait), None),
+            (RetryPolicy("Coalesced", base_wait, max_attempts, jitter=0.5, max_wait=self.max_wait), COALESCE_KEYS)
+        ]
+        sims = [PopulationSimulation(self.make_workload(num_clients, seed), policy,
+                                     ServerModel(self.server_capacity, service=service, coalesce_keys=keys),
+                                     POPULATION_HORIZON, seed)
+                for policy, keys in strategies]
+        
+        self.log(f"Workload: {workload}, lognormal service time (mean {service.mean}s), "
+                 f"hedge after p95 = {hedge_after:.2f}s, {COALESCE_KEYS} coalescable keys", 'info')
+        
+        duration = POPULATION_HORIZON + sum(capped_backoff(base_wait, a, self.max_wait) * 1.5 for a in range(max_attempts))
+        legend_x = yield from self.animate_simulations(f"HEDGING & COALESCING: {workload.upper()} WORKLOAD",
+                                                       sims, duration, max(self.server_capacity, num_clients) * 2)
+        
+        # Tail latency against the extra work each strategy costs the server
+        for i, (sim, color) in enumerate(zip(sims, self.policy_colors())):
+            result = sim.results()
+            y = 180 + i * 64
+            self.canvas.create_text(legend_x, y, text=result['policy'], anchor='w',
+                                   font=("Helvetica", 10, "bold"), fill=color)
+            self.canvas.create_text(legend_x, y + 18, text=f"p50: {result['p50_latency']:.2f}s | "
+                                                         f"p99: {result['p99_latency']:.2f}s", anchor='w',
+                                   font=("Helvetica", 9), fill=self.colors['text'])
+            self.canvas.create_text(legend_x, y + 34, text=f"Extra load: {result['extra_load']:+.0%}", anchor='w',
+                                   font=("Helvetica", 9), fill=self.colors['text'])
+            self.canvas.create_text(legend_x, y + 50, text=f"Success: {result['success_rate']:.1%}", anchor='w',
+                                   font=("Helvetica", 9), fill=self.colors['text'])
+            extras = {'hedges': "hedges sent", 'coalesced': "attempts coalesced"}
+            detail = "".join(f", {result[key]} {label}" for key, label in extras.items() if result[key])
+            self.log(f"[{result['policy'].upper()}] p99 {result['p99_latency']:.2f}s, "
+                     f"extra load {result['extra_load']:+.0%}{detail}", 'info')
+    
+    def run_crn_demo(self, base_wait, num_clients, max_attempts):
+        """N-way comparison with common random numbers: every policy against Backoff, with confidence intervals"""
+        self.canvas.delete("all")
+        
+        width = self.canvas.winfo_width() or 700
+        height = self.canvas.winfo_height() or 450
+        workload = self.workload_var.get()
+        
+        # Header
+        self.canvas.create_rectangle(50, 10, width - 50, 50, fill=self.colors['accent'], outline="")
+        self.canvas.create_text(width // 2, 30, text=f"N-WAY COMPARISON: {workload.upper()} WORKLOAD",
+                               font=("Helvetica", 16, "bold"), fill="white")
+        
+        policies = [
+            RetryPolicy("No Backoff", 0.1, max_attempts, backoff=False),
+            RetryPolicy("Backoff", base_wait, max_attempts),
+            RetryPolicy("Jitter 25%", base_wait, max_attempts, jitter=0.25),
+            RetryPolicy("Jitter 50%", base_wait, max_attempts, jitter=0.5),
+            RetryPolicy("Full Jitter", base_wait, max_attempts, jitter=1.0),
+            RetryPolicy("Retry-After", base_wait, max_attempts, jitter=0.5, retry_after='max')
+        ]
+        names = [policy.name for policy in policies]
+        colors = [self.colors['error'], self.colors['blue'], self.colors['warning'], self.colors['success'],
+                  self.colors['text'], self.colors['purple']]
+        metrics = [("success_rate", "Success rate vs Backoff", "{:+.1%}"),
+                   ("amplification", "Requests/client vs Backoff", "{:+.2f}")]
+        
+        # One forest plot per metric: a row per policy, point = mean difference, bar = 95% CI
+        top = 95
+        row_height = (height - top - 60) // (len(names) - 1)
+        panels = [(170, width // 2 - 10), (width // 2 + 90, width - 30)]
+        
+        for (_, title, _), (left, right) in zip(metrics, panels):
+            self.canvas.create_text((left + right) // 2, top - 22, text=title, font=("Helvetica", 10, "bold"),
+                                   fill=self.colors['text'])
+        for i, name in enumerate(names[:1] + names[2:]):
+            y = top + i * row_height + row_height // 2
+            for left, _ in panels:
+                self.canvas.create_text(left - 8, y, text=name, anchor='e', font=("Helvetica", 9),
+                                       fill=colors[names.index(name)])
+        
+        self.log(f"{len(names)} policies, {CRN_REPLICATIONS} replications, common random numbers, "
+                 f"baseline Backoff", 'info')
+        
+        seed = random.randrange(1 << 30)
+        replications = []
+        rows = []
+        for r in range(CRN_REPLICATIONS):
+            if not self.is_running:
+                break
+            replications.append((yield from self.offload(
+                replicate_policies, lambda rep_seed: self.make_workload(num_clients, rep_seed), policies,
+                lambda: ServerModel(self.server_capacity), POPULATION_HORIZON, seed + r)))
+            if len(replications) < 2:
+                continue  # No interval from a single replication
+            
+            rows = crn_differences(replications, names, baseline=1, metrics=[metric for metric, _, _ in metrics])
+            self.canvas.delete("forest")
+            for (metric, _, fmt), (left, right) in zip(metrics, panels):
+                panel_rows = [row for row in rows if row['metric'] == metric]
+                reach = max(max(abs(row['ci_low']), abs(row['ci_high'])) for row in panel_rows) or 1.0
+                
+                def to_x(value):
+                    return (left + right) / 2 + value / reach * (right - left) / 2
                 
-                self.log(f"{client}: {total_wait:.2f}s (base {base}s + jitter {jitter:.2f}s)", 'info')
+                self.canvas.create_line(to_x(0), top - 8, to_x(0), top + row_height * len(panel_rows),
+                                       fill=self.colors['text_dim'], dash=(3, 3), tags="forest")
+                for i, row in enumerate(panel_rows):
+                    y = top + i * row_height + row_height // 2
+                    color = colors[names.index(row['policy'])]
+                    self.canvas.create_line(to_x(row['ci_low']), y, to_x(row['ci_high']), y, fill=color, width=3,
+                                           tags="forest")
+                    self.canvas.create_oval(to_x(row['difference']) - 4, y - 4, to_x(row['difference']) + 4, y + 4,
+                                           fill=color, outline="", tags="forest")
+                    self.canvas.create_text(to_x(row['difference']), y - 12, text=fmt.format(row['difference']),
+                                           font=("Helvetica", 8), fill=self.colors['text'], tags="forest")
             
-            self.update_stats(requests=display_count * (round_num + 1))
-            self.canvas.update()
-            time.sleep(1.5 * speed)
-        
-        # Final message
-        self.canvas.create_rectangle(50, height - 80, width - 50, height - 20, fill=self.colors['success'], outline="")
-        self.canvas.create_text(width // 2, height - 60, text=f"Jitter spreads {num_clients} {client_word} over time!",
-                               font=("Helvetica", 12, "bold"), fill="white")
-        self.canvas.create_text(width // 2, height - 40, text="Result: Less server congestion, better performance",
-                               font=("Helvetica", 10), fill="white")
+            self.canvas.create_text(width // 2, height - 25, text=f"{len(replications)} replications, 95% intervals",
+                                   font=("Helvetica", 9), fill=self.colors['text_dim'], tags="forest")
+            self.update_stats(requests=len(replications))
+            self.refresh_canvas()
+            yield 0
+        
+        for row in rows:
+            significant = row['ci_low'] > 0 or row['ci_high'] < 0
+            self.log(f"[{row['policy'].upper()}] {row['metric']} {row['difference']:+.4f} "
+                     f"[{row['ci_low']:+.4f}, {row['ci_high']:+.4f}] vs Backoff, "
+                     f"{row['variance_reduction']:.0f}x fewer replications than independent streams",
+                     'success' if significant else 'info')
     
-    def run_graph_demo(self, base_wait, max_attempts):
-        """Show exponential growth graph"""
+    def run_tail_demo(self, base_wait, num_clients, max_attempts):
+        """Rare outcomes - running out of attempts, p99.9 completion - by importance sampling"""
+        workload = self.workload_var.get()
+        
+        seed = random.randrange(1 << 30)
+        policies = standard_policies(base_wait, max_attempts, self.max_wait)
+        sims = [PopulationSimulation(self.make_workload(num_clients, seed), policy,
+                                     ServerModel(self.server_capacity), POPULATION_HORIZON, seed)
+                for policy in policies]
+        # Enough recorded arrival times to draw every sampled client from
+        arrivals = sample_arrivals(self.make_workload(num_clients, seed), TAIL_RUNS, seed)
+        
+        self.log(f"Workload: {workload}. Sampling {TAIL_RUNS} clients per policy against the recorded load, "
+                 f"failures tilted to {default_tilt(max_attempts):.0%}", 'info')
+        
+        duration = POPULATION_HORIZON + sum(capped_backoff(base_wait, a, self.max_wait) * 1.5 for a in range(max_attempts))
+        legend_x = yield from self.animate_simulations(f"RARE-EVENT TAILS: {workload.upper()} WORKLOAD",
+                                                       sims, duration, max(self.server_capacity, num_clients) * 2)
+        
+        for i, (sim, policy, color) in enumerate(zip(sims, policies, self.policy_colors())):
+            if not self.is_running:
+                break
+            report = yield from self.offload(tail_report, sim.results(), policy, self.server_capacity, arrivals,
+                                             POPULATION_HORIZON, TAIL_RUNS, seed + i)
+            exhausted, plain = report['exhausted'], report['exhausted_plain']
+            p999 = report['p999_latency']
+            p999_text = "gave up" if math.isinf(p999) else f"{p999:.1f}s"
+            
+            y = 180 + i * 64
+            self.canvas.create_text(legend_x, y, text=policy.name, anchor='w',
+                                   font=("Helvetica", 10, "bold"), fill=color)
+            self.canvas.create_text(legend_x, y + 18, text=f"P(gave up): {exhausted['probability']:.1e} "
+                                                         f"+-{exhausted['relative_error']:.0%}", anchor='w',
+                                   font=("Helvetica", 9), fill=self.colors['text'])
+            self.canvas.create_text(legend_x, y + 34, text=f"Plain MC: {plain['hits']} hits +-"
+                                                         f"{min(plain['relative_error'], 9.99):.0%}", anchor='w',
+                                   font=("Helvetica", 9), fill=self.colors['text_dim'])
+            self.canvas.create_text(legend_x, y + 50, text=f"p99.9: {p999_text} | {report['speedup']:.0f}x fewer runs",
+                                   anchor='w', font=("Helvetica", 9), fill=self.colors['text'])
+            self.log(f"[{policy.name.upper()}] P(all {max_attempts} attempts fail) = {exhausted['probability']:.2e} "
+                     f"[{exhausted['ci_low']:.2e}, {exhausted['ci_high']:.2e}]; plain Monte Carlo saw "
+                     f"{plain['hits']} of {plain['runs']} and needs {report['speedup']:.0f}x the runs "
+                     f"for the same interval. p99.9 completion: {p999_text}", 'info')
+            self.refresh_canvas()
+            yield 0
+    
+    def run_aimd_demo(self, base_wait, num_clients, max_attempts):
+        """Long-lived clients that pace themselves: fixed rate vs AIMD vs AIMD with a latency gradient"""
+        # Everyone together wants twice what the server can take
+        demand = 2 * self.server_capacity / max(num_clients, 1)
+        service = ServiceTime("lognormal", mean=0.1)
+        
+        seed = random.randrange(1 << 30)
+        sims = [AdaptiveSimulation(num_clients, policy, demand, ServerModel(self.server_capacity, service=service),
+                                   ADAPTIVE_DURATION, seed)
+                for policy in standard_adaptive_policies(demand)]
+        
+        self.log(f"{num_clients} long-lived clients wanting {demand:.2f} req/s each "
+                 f"({num_clients * demand:.0f} req/s total vs capacity {self.server_capacity}/s)", 'info')
+        
+        legend_x = yield from self.animate_simulations("ADAPTIVE CONCURRENCY: AIMD", sims, ADAPTIVE_DURATION,
+                                                       round(self.server_capacity * 3))
+        
+        for i, (sim, color) in enumerate(zip(sims, self.policy_colors())):
+            result = sim.results()
+            converged = result['convergence_time']
+            converged_text = "never settled" if converged is None else f"settled in {converged}s"
+            
+            y = 180 + i * 64
+            self.canvas.create_text(legend_x, y, text=result['policy'], anchor='w',
+                                   font=("Helvetica", 10, "bold"), fill=color)
+            self.canvas.create_text(legend_x, y + 18, text=f"Load: {result['utilization']:.0%} | "
+                                                         f"Goodput: {result['goodput_utilization']:.0%}", anchor='w',
+                                   font=("Helvetica", 9), fill=self.colors['text'])
+            self.canvas.create_text(legend_x, y + 34, text=converged_text.capitalize(), anchor='w',
+                                   font=("Helvetica", 9), fill=self.colors['text'])
+            self.canvas.create_text(legend_x, y + 50, text=f"Fairness (Jain): {result['fairness']:.3f}", anchor='w',
+                                   font=("Helvetica", 9), fill=self.colors['text'])
+            self.log(f"[{result['policy'].upper()}] steady load {result['utilization']:.0%} of capacity, goodput "
+                     f"{result['goodput_utilization']:.0%}, {result['success_rate']:.1%} success, {converged_text}, "
+                     f"fairness {result['fairness']:.3f}", 'success' if result['utilization'] <= 1.1 else 'warning')
+    
+    def run_deadline_demo(self, base_wait, num_clients, max_attempts):
+        """Capped backoff and deadline budgets through a chain of services: SLO misses vs load saved"""
+        workload = self.workload_var.get()
+        service = ServiceTime("lognormal", mean=0.05)
+        # Cap at a few base waits even when Max Wait is blank, or "Capped" would match "Uncapped"
+        max_wait = min(math.inf if self.max_wait is None else self.max_wait, 4 * base_wait)
+        
+        seed = random.randrange(1 << 30)
+        sims = [CallChainSimulation(self.make_workload(num_clients, seed), policy,
+                                    [ServerModel(self.server_capacity, service=service) for _ in range(CHAIN_HOPS)],
+                                    POPULATION_HORIZON, seed, propagate, slo=CHAIN_DEADLINE)
+                for policy, propagate in deadline_policies(base_wait, max_attempts, max_wait, CHAIN_DEADLINE)]
+        
+        self.log(f"Workload: {workload} through {CHAIN_HOPS} services, each retrying up to {max_attempts} attempts", 'info')
+        self.log(f"Waits capped at {max_wait:g}s, deadline and SLO {CHAIN_DEADLINE:g}s end to end", 'info')
+        
+        # Long enough for the slowest schedule - the Uncapped baseline ignores Max Wait by design
+        duration = min(POPULATION_HORIZON * 4, POPULATION_HORIZON + CHAIN_HOPS * max(
+            sum(capped_backoff(base_wait, a, sim.policy.max_wait) * 1.5 for a in range(max_attempts)) for sim in sims))
+        legend_x = yield from self.animate_simulations(f"DEADLINE BUDGETS: {workload.upper()} WORKLOAD, LAST HOP",
+                                                       sims, duration, max(self.server_capacity, num_clients) * 2)
+        
+        # SLO misses against the load each step saves over uncapped retries
+        baseline = sims[0].results()
+        for i, (sim, color) in enumerate(zip(sims, self.policy_colors())):
+            result = sim.results()
+            saved = load_saved(result, baseline)
+            y = 180 + i * 64
+            self.canvas.create_text(legend_x, y, text=result['policy'], anchor='w',
+                                   font=("Helvetica", 10, "bold"), fill=color)
+            self.canvas.create_text(legend_x, y + 18, text=f"SLO missed: {result['slo_miss_rate']:.1%}", anchor='w',
+                                   font=("Helvetica", 9), fill=self.colors['text'])
+            self.canvas.create_text(legend_x, y + 34, text=f"Load saved: {saved:.0%}", anchor='w',
+                                   font=("Helvetica", 9), fill=self.colors['text'])
+            self.canvas.create_text(legend_x, y + 50, text=f"Orphaned: {result['orphan_attempts']}", anchor='w',
+                                   font=("Helvetica", 9),
+                                   fill=self.colors['error' if result['orphan_attempts'] else 'text'])
+            self.log(f"[{result['policy'].upper()}] {result['slo_miss_rate']:.1%} missed the {CHAIN_DEADLINE:g}s SLO, "
+                     f"{result['amplification']:.1f} attempts/request ({saved:.0%} saved), "
+                     f"{result['orphan_attempts']} attempts after the client gave up, "
+                     f"{result['expired_drops']} turned away as expired",
+                     'warning' if result['orphan_attempts'] else 'success')
+    
+    def run_class_demo(self, base_wait, num_clients, max_attempts):
+        """Interactive users, SDKs and a batch job on one server, with the batch job polite or not"""
+        seed = random.randrange(1 << 30)
+        sims = [MixedPopulationSimulation(standard_client_classes(num_clients, base_wait, max_attempts,
+                                                                  POPULATION_HORIZON, seed, aggressive, self.max_wait),
+                                          ServerModel(self.server_capacity), POPULATION_HORIZON, seed, name)
+                for name, aggressive in (("Polite Batch", False), ("Aggressive Batch", True))]
+        
+        self.log(f"{num_clients * 0.2:g} interactive and {num_clients * 0.1:g} SDK arrivals/s, plus a batch job "
+                 f"bursting at {num_clients * 0.4:g}/s for 5s out of every 10", 'info')
+        
+        # Long enough for the slowest backoff schedule and for the batch job's retry loop
+        duration = POPULATION_HORIZON + max(sum(capped_backoff(base_wait, a, self.max_wait) * 1.5
+                                                for a in range(max_attempts)), max_attempts * 10 * 0.5)
+        legend_x = yield from self.animate_simulations("CLIENT CLASSES: ONE SERVER, THREE KINDS OF CLIENT",
+                                                       sims, duration, max(self.server_capacity, num_clients) * 3)
+        
+        # Each class's success with the polite batch job -> with the aggressive one
+        polite, aggressive = (sim.results() for sim in sims)
+        self.canvas.create_text(legend_x, 150, text="Success: polite -> aggressive", anchor='w',
+                               font=("Helvetica", 9), fill=self.colors['text_dim'])
+        for i, (before, after) in enumerate(zip(polite['classes'], aggressive['classes'])):
+            y = 172 + i * 40
+            worse = after['success_rate'] < before['success_rate'] - 0.02
+            self.canvas.create_text(legend_x, y, text=after['class'], anchor='w',
+                                   font=("Helvetica", 10, "bold"), fill=self.colors['text'])
+            self.canvas.create_text(legend_x, y + 16, text=f"{before['success_rate']:.0%} -> {after['success_rate']:.0%}, "
+                                                          f"p99 {after['p99_latency']:.1f}s", anchor='w',
+                                   font=("Helvetica", 9), fill=self.colors['error' if worse else 'text'])
+        
+        batch_share = (polite['classes'][-1]['attempt_share'], aggressive['classes'][-1]['attempt_share'])
+        y = 172 + len(polite['classes']) * 40
+        self.canvas.create_text(legend_x, y, text=f"Batch load: {batch_share[0]:.0%} -> {batch_share[1]:.0%}",
+                               anchor='w', font=("Helvetica", 9), fill=self.colors['text'])
+        self.canvas.create_text(legend_x, y + 16, text=f"Fairness: {polite['fairness']:.2f} -> {aggressive['fairness']:.2f}",
+                               anchor='w', font=("Helvetica", 9),
+                               fill=self.colors['error' if aggressive['fairness'] < polite['fairness'] else 'text'])
+        
+        for result in (polite, aggressive):
+            for row in result['classes']:
+                self.log(f"[{result['policy'].upper()}] {row['policy']}: {row['success_rate']:.1%} success, "
+                         f"goodput {row['goodput']:.1f}/s, p50 {row['p50_latency']:.2f}s, p99 {row['p99_latency']:.2f}s, "
+                         f"{row['attempt_share']:.0%} of attempts", 'info')
+            self.log(f"[{result['policy'].upper()}] Jain fairness across classes: {result['fairness']:.3f}",
+                     'warning' if result['fairness'] < 0.95 else 'success')
+        self.update_stats(drain_time=round(aggressive['drain_time'], 1), goodput=round(aggressive['goodput'], 1))
+    
+    def run_admission_demo(self, base_wait, num_clients, max_attempts):
+        """Every server overload strategy against every client retry policy: goodput and p99 latency"""
         self.canvas.delete("all")
         speed = self.get_speed_multiplier()
         
@@ -1129,99 +5174,910 @@ class ExponentialBackoffDemo:
         height = self.canvas.winfo_height() or 450
         
         # Header
-        self.canvas.create_rectangle(50, 10, width - 50, 50, fill=self.colors['blue'], outline="")
-        self.canvas.create_text(width // 2, 30, text="EXPONENTIAL GROWTH VISUALIZATION",
+        self.canvas.create_rectangle(50, 10, width - 50, 50, fill=self.colors['accent'], outline="")
+        self.canvas.create_text(width // 2, 30, text="ADMISSION CONTROL: SERVER STRATEGY x CLIENT POLICY",
                                font=("Helvetica", 16, "bold"), fill="white")
         
-        # Graph area
-        graph_x = 100
-        graph_y = 80
-        graph_width = width - 200
-        graph_height = height - 180
-        
-        # Draw axes
-        self.canvas.create_line(graph_x, graph_y + graph_height, graph_x + graph_width, graph_y + graph_height,
-                               fill=self.colors['text'], width=2)  # X axis
-        self.canvas.create_line(graph_x, graph_y, graph_x, graph_y + graph_height,
-                               fill=self.colors['text'], width=2)  # Y axis
-        
-        # Labels
-        self.canvas.create_text(graph_x + graph_width // 2, graph_y + graph_height + 30,
-                               text="Attempt Number", font=("Helvetica", 10), fill=self.colors['text'])
-        self.canvas.create_text(graph_x - 40, graph_y + graph_height // 2,
-                               text="Wait\nTime\n(s)", font=("Helvetica", 10), fill=self.colors['text'])
+        workload = self.workload_var.get()
+        service = ServiceTime("lognormal", mean=0.2)
+        seed = random.randrange(1 << 30)
+        policies = standard_policies(base_wait, max_attempts, self.max_wait)
+        for policy in policies:
+            policy.timeout = CLIENT_TIMEOUT
+        admissions = standard_admissions(self.server_capacity)
+        
+        # Grid: a row per server strategy, a column per client policy
+        grid_x = 150
+        grid_y = 90
+        cell_width = (width - grid_x - 30) // len(policies)
+        cell_height = min(70, (height - grid_y - 40) // len(admissions))
+        palette = blend_palette(self.colors['card'], self.colors['success'], 16)
+        
+        for c, (policy, color) in enumerate(zip(policies, self.policy_colors())):
+            self.canvas.create_text(grid_x + (c + 0.5) * cell_width, grid_y - 14, text=policy.name,
+                                   font=("Helvetica", 10, "bold"), fill=color)
+        for r, admission in enumerate(admissions):
+            self.canvas.create_text(grid_x - 10, grid_y + (r + 0.5) * cell_height, text=admission_name(admission),
+                                   anchor='e', font=("Helvetica", 10, "bold"), fill=self.colors['text'])
+        self.canvas.create_text(width // 2, height - 18, text=f"Shade: goodput as a share of capacity "
+                                                             f"({self.server_capacity}/s). Clients give up after "
+                                                             f"{CLIENT_TIMEOUT:g}s, queues hold 2s of work.",
+                               font=("Helvetica", 9), fill=self.colors['text_dim'])
+        
+        self.log(f"Workload: {workload}, lognormal service time (mean {service.mean}s), client timeout "
+                 f"{CLIENT_TIMEOUT}s; {len(admissions)} server strategies x {len(policies)} client policies", 'info')
+        
+        best = None
+        requests = 0
+        for r, admission in enumerate(admissions):
+            for c, policy in enumerate(policies):
+                if not self.is_running:
+                    return
+                
+                result = PopulationSimulation(self.make_workload(num_clients, seed), policy,
+                                              ServerModel(self.server_capacity, service=service, admission=admission),
+                                              POPULATION_HORIZON, seed).run()
+                requests += result['attempts']
+                
+                x0, y0 = grid_x + c * cell_width, grid_y + r * cell_height
+                share = min(1.0, result['goodput'] / self.server_capacity)
+                self.canvas.create_rectangle(x0 + 2, y0 + 2, x0 + cell_width - 2, y0 + cell_height - 2,
+                                            fill=palette[round(share * (len(palette) - 1))], outline="")
+                self.canvas.create_text(x0 + cell_width / 2, y0 + cell_height / 2 - 9,
+                                       text=f"{result['goodput']:.1f}/s", font=("Helvetica", 11, "bold"),
+                                       fill=self.colors['text'])
+                self.canvas.create_text(x0 + cell_width / 2, y0 + cell_height / 2 + 10,
+                                       text=f"p99 {result['p99_latency']:.1f}s, shed {result['shed_rate']:.0%}",
+                                       font=("Helvetica", 8), fill=self.colors['text'])
+                
+                self.log(f"[{admission_name(admission).upper()} / {policy.name.upper()}] goodput "
+                         f"{result['goodput']:.1f}/s, {result['success_rate']:.1%} success, p99 "
+                         f"{result['p99_latency']:.2f}s, {result['shed_rate']:.0%} shed", 'info')
+                if best is None or result['goodput'] > best[0]['goodput']:
+                    best = (result, admission, x0, y0)
+                self.update_stats(requests=requests)
+                self.refresh_canvas()
+                yield 0.1 * speed
+        
+        result, admission, x0, y0 = best
+        self.canvas.create_rectangle(x0 + 1, y0 + 1, x0 + cell_width - 1, y0 + cell_height - 1,
+                                    outline=self.colors['warning'], width=2)
+        self.log(f"Best goodput: {result['policy']} clients against a server running "
+                 f"{admission_name(admission)}", 'success')
+        self.update_stats(drain_time=round(result['drain_time'], 1), goodput=round(result['goodput'], 1))
+    
+    def run_goodput_demo(self, base_wait, num_clients, max_attempts):
+        """Sweep arrival rates on a log scale: offered load, goodput and amplification per policy"""
+        self.canvas.delete("all")
         
-        # Calculate points using max_attempts
-        max_wait = base_wait * (2 ** (max_attempts - 1))
+        width = self.canvas.winfo_width() or 700
+        height = self.canvas.winfo_height() or 450
         
-        points = []
-        for i in range(max_attempts):
-            wait = base_wait * (2 ** i)
-            x = graph_x + (i / (max_attempts - 1)) * graph_width if max_attempts > 1 else graph_x
-            y = graph_y + graph_height - (wait / max_wait) * graph_height
-            points.append((x, y, wait, i + 1))
+        # Header
+        self.canvas.create_rectangle(50, 10, width - 50, 50, fill=self.colors['accent'], outline="")
+        self.canvas.create_text(width // 2, 30, text="GOODPUT VS OFFERED LOAD",
+                               font=("Helvetica", 16, "bold"), fill="white")
         
-        # Draw grid lines and labels
-        for i in range(max_attempts):
-            x = graph_x + (i / (max_attempts - 1)) * graph_width
-            self.canvas.create_line(x, graph_y + graph_height, x, graph_y + graph_height + 5,
-                                   fill=self.colors['text'])
-            self.canvas.create_text(x, graph_y + graph_height + 15, text=str(i + 1),
+        policies = standard_policies(base_wait, max_attempts, self.max_wait)
+        colors = self.policy_colors()
+        client_counts = log_sweep(1, max(10000, num_clients))
+        seed = random.randrange(1 << 30)
+        
+        # Left: offered load (dashed) and goodput (solid), log-log. Right: amplification.
+        top = 80
+        bottom = height - 70
+        panels = [(60, width // 2 - 20), (width // 2 + 50, width - 30)]
+        x_max = math.log10(client_counts[-1])
+        y_log_max = math.log10(client_counts[-1] * max_attempts)
+        
+        def to_x(panel, clients):
+            left, right = panels[panel]
+            return left + math.log10(clients) / x_max * (right - left)
+        
+        def rate_y(rate):
+            return bottom - min(1.0, math.log10(max(rate, 1)) / y_log_max) * (bottom - top)
+        
+        def amplification_y(value):
+            return bottom - min(1.0, (value - 1) / max(1, max_attempts - 1)) * (bottom - top)
+        
+        for panel, (left, right) in enumerate(panels):
+            self.canvas.create_line(left, bottom, right, bottom, fill=self.colors['text'], width=2)
+            self.canvas.create_line(left, top, left, bottom, fill=self.colors['text'], width=2)
+            for decade in range(int(x_max) + 1):
+                x = to_x(panel, 10 ** decade)
+                self.canvas.create_text(x, bottom + 12, text=f"{10 ** decade:g}", font=("Helvetica", 8),
+                                       fill=self.colors['text_dim'])
+            self.canvas.create_text((left + right) // 2, bottom + 28, text="Clients arriving per second (log)",
+                                   font=("Helvetica", 9), fill=self.colors['text_dim'])
+        
+        self.canvas.create_text(panels[0][0] + 5, top - 12, text="Req/s (log): offered - - -  goodput ---", anchor='w',
+                               font=("Helvetica", 9, "bold"), fill=self.colors['text'])
+        self.canvas.create_text(panels[1][0] + 5, top - 12, text="Retry amplification (attempts/client)", anchor='w',
+                               font=("Helvetica", 9, "bold"), fill=self.colors['text'])
+        self.canvas.create_text(panels[1][0] - 8, amplification_y(max_attempts), text=str(max_attempts), anchor='e',
+                               font=("Helvetica", 8), fill=self.colors['text_dim'])
+        self.canvas.create_text(panels[1][0] - 8, bottom, text="1", anchor='e', font=("Helvetica", 8),
+                               fill=self.colors['text_dim'])
+        
+        # Capacity
+        y = rate_y(self.server_capacity)
+        self.canvas.create_line(panels[0][0], y, panels[0][1], y, fill=self.colors['warning'], dash=(5, 5))
+        self.canvas.create_text(panels[0][0] + 4, y - 8, text=f"capacity {self.server_capacity}/s", anchor='w',
+                               font=("Helvetica", 8), fill=self.colors['warning'])
+        
+        # Legend
+        for i, (policy, color) in enumerate(zip(policies, colors)):
+            x = 60 + i * (width - 90) // 4
+            self.canvas.create_line(x, height - 15, x + 20, height - 15, fill=color, width=3)
+            self.canvas.create_text(x + 26, height - 15, text=policy.name, anchor='w',
                                    font=("Helvetica", 9), fill=self.colors['text'])
         
-        # Animate the graph
-        self.log("Showing exponential growth...", 'info')
+        self.log(f"Sweeping {len(client_counts)} arrival rates from 1 to {client_counts[-1]}/s...", 'info')
         
-        prev_point = None
-        for i, (x, y, wait, attempt) in enumerate(points):
+        rows = []
+        previous = None
+        for clients in client_counts:
             if not self.is_running:
                 break
             
-            # Draw line from previous point
-            if prev_point:
-                self.canvas.create_line(prev_point[0], prev_point[1], x, y,
-                                       fill=self.colors['warning'], width=3)
+            point = yield from self.offload(goodput_point, clients, policies, self.server_capacity, seed=seed)
+            rows.extend(point)
             
-            # Draw point
-            self.canvas.create_oval(x - 8, y - 8, x + 8, y + 8, fill=self.colors['error'], outline="")
+            if previous is not None:
+                for before, after, color in zip(previous, point, colors):
+                    x0, x1 = to_x(0, before['clients']), to_x(0, after['clients'])
+                    self.canvas.create_line(x0, rate_y(before['offered_load']), x1, rate_y(after['offered_load']),
+                                           fill=color, width=1, dash=(4, 3))
+                    self.canvas.create_line(x0, rate_y(before['goodput']), x1, rate_y(after['goodput']),
+                                           fill=color, width=2)
+                    x0, x1 = to_x(1, before['clients']), to_x(1, after['clients'])
+                    self.canvas.create_line(x0, amplification_y(before['amplification']),
+                                           x1, amplification_y(after['amplification']), fill=color, width=2)
+            previous = point
             
-            # Draw label
-            self.canvas.create_text(x, y - 20, text=f"{wait}s",
-                                   font=("Helvetica", 10, "bold"), fill=self.colors['text'])
+            best = max(point, key=lambda row: row['goodput'])
+            self.log(f"{clients}/s: best goodput {best['goodput']:.1f}/s ({best['policy']}), "
+                     f"offered {best['offered_load']:.0f}/s", 'info')
+            self.update_stats(clients=clients, requests=round(sum(row['offered_load'] for row in point)))
+            self.refresh_canvas()
+            yield 0
+        
+        if rows and self.is_running:
+            self.export_rows(rows, "goodput_curve")
+    
+    def export_rows(self, rows, prefix):
+        """Save a sweep's rows as a timestamped CSV under results/, next to the batch runs"""
+        os.makedirs("results", exist_ok=True)
+        filename = os.path.join("results", f"{prefix}_{time.strftime('%Y%m%d_%H%M%S')}.csv")
+        export_rows_csv(rows, filename)
+        self.log(f"Data exported to {filename}", 'success')
+    
+    def policy_colors(self):
+        """Line colors for standard_policies(), in order"""
+        return [self.colors['error'], self.colors['blue'], self.colors['success'], self.colors['purple']]
+    
+    def animate_simulations(self, title, sims, duration, y_max, faults=None):
+        """
+        Advance simulations second by second, plotting attempts/s against capacity
+        
+        Generator for use with `yield from`; returns the x position of the
+        legend column so callers can put their summary under it.
+        """
+        self.canvas.delete("all")
+        speed = self.get_speed_multiplier()
+        
+        width = self.canvas.winfo_width() or 700
+        height = self.canvas.winfo_height() or 450
+        colors = self.policy_colors()
+        
+        # Header
+        self.canvas.create_rectangle(50, 10, width - 50, 50, fill=self.colors['accent'], outline="")
+        self.canvas.create_text(width // 2, 30, text=title, font=("Helvetica", 16, "bold"), fill="white")
+        
+        # Chart: attempts per second over time
+        chart_x = 70
+        chart_y = 80
+        chart_width = width - 260
+        chart_height = height - 150
+        
+        def to_xy(second, value):
+            return (chart_x + second / duration * chart_width,
+                    chart_y + chart_height - min(value, y_max) / y_max * chart_height)
+        
+        # Fault windows behind everything else
+        if faults is not None:
+            for i, (start, end, label) in enumerate(faults.windows()):
+                x0, _ = to_xy(start, 0)
+                x1, _ = to_xy(end, 0)
+                shade = self.colors['error'] if label == "outage" else self.colors['accent']
+                self.canvas.create_rectangle(x0, chart_y, x1, chart_y + chart_height, fill=shade, outline="",
+                                            stipple="gray25" if label == "outage" else "")
+                # Stagger the labels, fault windows are often narrow
+                self.canvas.create_text((x0 + x1) / 2, chart_y + 8 + 12 * i, text=label, font=("Helvetica", 8),
+                                       fill=self.colors['text_dim'])
+        
+        self.canvas.create_line(chart_x, chart_y + chart_height, chart_x + chart_width, chart_y + chart_height,
+                               fill=self.colors['text'], width=2)
+        self.canvas.create_line(chart_x, chart_y, chart_x, chart_y + chart_height, fill=self.colors['text'], width=2)
+        self.canvas.create_text(chart_x + chart_width // 2, chart_y + chart_height + 15, text="Time (s)",
+                               font=("Helvetica", 9), fill=self.colors['text_dim'])
+        self.canvas.create_text(chart_x - 10, chart_y, text=str(y_max), anchor='e',
+                               font=("Helvetica", 8), fill=self.colors['text_dim'])
+        self.canvas.create_text(chart_x - 35, chart_y + chart_height // 2, text="Req\n/s",
+                               font=("Helvetica", 9), fill=self.colors['text_dim'])
+        
+        # Capacity line (follows the faults if there are any)
+        steps = [0, duration] if faults is None else range(int(duration) + 1)
+        points = []
+        for second in steps:
+            factor = faults.capacity_factor(second) if faults is not None else 1.0
+            points.extend(to_xy(second, self.server_capacity * factor))
+        self.canvas.create_line(*points, fill=self.colors['warning'], dash=(5, 5))
+        self.canvas.create_text(points[-2], points[-1] - 8, text="capacity", anchor='e', font=("Helvetica", 8),
+                               fill=self.colors['warning'])
+        
+        # Legend
+        legend_x = chart_x + chart_width + 20
+        for i, (sim, color) in enumerate(zip(sims, colors)):
+            self.canvas.create_line(legend_x, 90 + i * 20, legend_x + 20, 90 + i * 20, fill=color, width=3)
+            self.canvas.create_text(legend_x + 28, 90 + i * 20, text=sim.policy.name, anchor='w',
+                                   font=("Helvetica", 9), fill=self.colors['text'])
+        
+        second = 0
+        while self.is_running and not all(sim.finished() for sim in sims) and second < duration:
+            second += 1
             
-            # Update info box
-            self.canvas.delete("info_box")
-            info_x = width - 150
-            info_y = 100
-            self.canvas.create_rectangle(info_x - 60, info_y, info_x + 60, info_y + 80,
-                                        fill=self.colors['card'], outline=self.colors['accent'], tags="info_box")
-            self.canvas.create_text(info_x, info_y + 15, text=f"Attempt: {attempt}",
-                                   font=("Helvetica", 10), fill=self.colors['text'], tags="info_box")
-            self.canvas.create_text(info_x, info_y + 35, text=f"Wait: {wait}s",
-                                   font=("Helvetica", 12, "bold"), fill=self.colors['warning'], tags="info_box")
-            self.canvas.create_text(info_x, info_y + 55, text=f"= {base_wait} x 2^{i}",
-                                   font=("Helvetica", 9), fill=self.colors['text_dim'], tags="info_box")
+            def advance():
+                for sim in sims:
+                    sim.advance(second)
             
-            self.log(f"Attempt {attempt}: wait = {base_wait} x 2^{i} = {wait}s", 'info')
-            self.update_stats(requests=attempt, total_wait=sum(p[2] for p in points[:i+1]))
+            yield from self.offload(advance)
+            for sim, color in zip(sims, colors):
+                if second > 1:
+                    prev, now = (sim.timeline[i][0] if i < len(sim.timeline) else 0 for i in (second - 2, second - 1))
+                    self.canvas.create_line(*to_xy(second - 1, prev), *to_xy(second, now), fill=color, width=2)
             
-            prev_point = (x, y)
-            self.canvas.update()
-            time.sleep(1.0 * speed)
+            shown = sims[min(2, len(sims) - 1)]
+            self.update_stats(
+                requests=sum(sim.attempts for sim in sims),
+                failures=sum(sim.attempts - sim.succeeded for sim in sims),
+                server_load=self.calculate_server_load(shown.server.load(shown.now))
+            )
+            self.refresh_canvas()
+            yield 0.1 * speed
         
-        # Summary
-        total = sum(p[2] for p in points)
-        self.canvas.create_rectangle(50, height - 70, width - 50, height - 20,
-                                     fill=self.colors['accent'], outline="")
-        self.canvas.create_text(width // 2, height - 55, text="Key Insight: Wait time DOUBLES with each attempt",
-                               font=("Helvetica", 11, "bold"), fill=self.colors['warning'])
-        self.canvas.create_text(width // 2, height - 35, text=f"Total wait after {max_attempts} attempts: {total}s",
-                               font=("Helvetica", 10), fill=self.colors['text'])
+        return legend_x
+
+
+# ===== OFFSCREEN RENDERING =====
+# Demos without a display: record draw calls as a trace, then render the
+# trace to SVG frames or an animated GIF/APNG, many scenarios in parallel.
+
+OFFSCREEN_DEMOS = ["comparison", "no_backoff", "with_backoff", "with_jitter", "graph", "exact", "population", "faults",
+                   "timeouts", "latency", "crn", "tails", "aimd", "deadlines",
+                   "classes", "admission", "goodput"]
+
+
+class StaticVar:
+    """Stand-in for a tk variable when there is no Tk"""
+    
+    def __init__(self, value):
+        self.value = value
+    
+    def get(self):
+        return self.value
+    
+    def set(self, value):
+        self.value = value
+
+
+class RecordingCanvas:
+    """
+    Headless stand-in for the demo canvas
+    
+    Tracks the items the demos create, so deleting by tag works, and records
+    every draw call and frame boundary as a replayable trace - in memory, or
+    streamed to `sink` (an IndexedTraceWriter) for long runs.
+    """
+    
+    def __init__(self, width, height, background, sink=None):
+        self.width = width
+        self.height = height
+        self.background = background
+        self.sink = sink
+        self.next_id = 1
+        self.items = {}  # id -> tags
+        self.events = []
+    
+    def record(self, event):
+        if self.sink is not None:
+            self.sink.write(event)
+        else:
+            self.events.append(event)
+    
+    def winfo_width(self):
+        return self.width
+    
+    def winfo_height(self):
+        return self.height
+    
+    def _create(self, itemType, args, kw):
+        coords = []
+        for arg in args:
+            if isinstance(arg, (tuple, list)):
+                coords.extend(arg)
+            else:
+                coords.append(arg)
+        
+        tags = kw.get('tags', ())
+        tags = tags.split() if isinstance(tags, str) else list(tags)
+        options = {key: list(value) if isinstance(value, tuple) else value
+                   for key, value in kw.items() if key not in ('tags', 'image')}
+        
+        item_id = self.next_id
+        self.next_id += 1
+        self.items[item_id] = tags
+        self.record(['create', item_id, itemType, [float(c) for c in coords], options, tags])
+        return item_id
+    
+    def create_rectangle(self, *args, **kw):
+        return self._create('rectangle', args, kw)
+    
+    def create_oval(self, *args, **kw):
+        return self._create('oval', args, kw)
+    
+    def create_line(self, *args, **kw):
+        return self._create('line', args, kw)
+    
+    def create_text(self, *args, **kw):
+        return self._create('text', args, kw)
+    
+    def create_image(self, *args, **kw):
+        return self._create('image', args, kw)
+    
+    def delete(self, *tags):
+        for tag in tags:
+            self.items = {item_id: item_tags for item_id, item_tags in self.items.items()
+                          if not (tag == "all" or tag == item_id or tag in item_tags)}
+            self.record(['delete', tag])
+    
+    def find_all(self):
+        return tuple(self.items)
+    
+    def update(self):
+        pass
+    
+    def update_idletasks(self):
+        pass
+    
+    def mark_frame(self, elapsed):
+        """Close a frame shown at `elapsed` seconds into the run"""
+        self.record(['frame', elapsed])
+    
+    def trace(self):
+        """The recording as a JSON-ready dict"""
+        return {'width': self.width, 'height': self.height, 'background': self.background, 'events': self.events}
+
+
+class OffscreenDemo(ExponentialBackoffDemo):
+    """
+    The demos without a display
+    
+    Draws into a RecordingCanvas and adds up the waits instead of sleeping,
+    so a whole demo records in milliseconds.
+    """
+    
+    def __init__(self, width=780, height=450, workload="Burst"):
+        # Only the state the demos read - no Tk here
+        self.root = None
+        self.is_running = True
+        self.active_run = None
+        self.server_capacity = SERVER_CAPACITY
+        self.max_wait = DEFAULT_MAX_WAIT
+        self.profiler = HotPathProfiler()
+        self.colors = dict(COLORS)
+        self.canvas = RecordingCanvas(width, height, self.colors['bg'])
+        self.workload_var = StaticVar(workload)
+        self.trace_path = None
+        self.clock = 0.0
+        self.log_lines = []
+    
+    def get_speed_multiplier(self):
+        return 1.0
+    
+    def log(self, message, tag=None):
+        self.log_lines.append(message)
+    
+    def update_stats(self, **stats):
+        pass
+    
+    def export_rows(self, rows, prefix):
+        pass  # Rendering shouldn't leave CSVs behind
+    
+    def refresh_canvas(self):
+        self.canvas.mark_frame(self.clock)
+    
+    def record(self, demo_type, base_wait, num_clients, max_attempts):
+        """Play one demo to the end and return its trace"""
+        if demo_type not in OFFSCREEN_DEMOS:
+            raise ValueError(f"Demo '{demo_type}' can't be rendered offscreen")
+        for delay in self.run_selected_demo(demo_type, base_wait, num_clients, max_attempts):
+            self.clock += delay
+        self.canvas.mark_frame(self.clock)  # Final picture
+        return self.canvas.trace()
+
+
+def save_trace(trace, path):
+    """Write a trace as JSON, or as an indexed trace if the path ends in .ebt"""
+    if path.endswith(TRACE_SUFFIX):
+        writer = IndexedTraceWriter(path, trace['width'], trace['height'], trace['background'])
+        for event in trace['events']:
+            writer.write(event)
+        writer.close()
+        return
+    with open(path, 'w') as f:
+        json.dump(trace, f)
+
+
+def load_trace(path):
+    """Read a JSON or indexed trace into one dict with every event"""
+    if path.endswith(TRACE_SUFFIX):
+        with IndexedTrace(path) as indexed:
+            return {'width': indexed.width, 'height': indexed.height, 'background': indexed.background,
+                    'events': list(indexed.events())}
+    with open(path) as f:
+        return json.load(f)
+
+
+def apply_trace_event(items, event):
+    """Canvas items after one create or delete event; returns `items`, or a new dict after a delete"""
+    if event[0] == 'create':
+        _, item_id, item_type, coords, options, tags = event
+        items[item_id] = (item_type, coords, options, tags)
+    elif event[0] == 'delete':
+        tag = event[1]
+        items = {item_id: item for item_id, item in items.items()
+                 if not (tag == "all" or tag == item_id or tag in item[3])}
+    return items
+
+
+def trace_frames(trace):
+    """Replay a trace: (time, items in drawing order) at every frame"""
+    items = {}  # id -> (type, coords, options, tags); insertion order is stacking order
+    for event in trace['events']:
+        if event[0] == 'frame':
+            yield event[1], list(items.values())
+        else:
+            items = apply_trace_event(items, event)
+
+
+# ===== INDEXED TRACES =====
+# Long recordings on disk with random access: seek to any moment of a
+# multi-million-event run without replaying it from the start.
+
+TRACE_FORMAT = "ebd-trace"
+TRACE_SUFFIX = ".ebt"
+SNAPSHOT_EVENTS = 2000  # Events between state snapshots (more while the canvas holds more items)
+TRACE_BUCKET = 1.0  # Seconds of run time per index bucket
+
+
+class IndexedTraceWriter:
+    """
+    Streams a trace to disk along with what makes it seekable
+    
+    After a header line, one JSON event per line. Once `snapshot_every`
+    events have passed (or as many as there are live items, so snapshots
+    never dominate the file), the next frame is followed by a snapshot of
+    every live item. The index at the end maps each `bucket` seconds of the
+    run to the last snapshot before it, and the file's last line holds the
+    byte offset of the index.
+    """
+    
+    def __init__(self, path, width, height, background, snapshot_every=SNAPSHOT_EVENTS, bucket=TRACE_BUCKET):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.snapshot_every = snapshot_every
+        self.bucket = bucket
+        self.items = {}
+        self.snapshots = []  # (time, byte offset)
+        self.since_snapshot = 0
+        self.frames = 0
+        self.duration = 0.0
+        self.write_line({'format': TRACE_FORMAT, 'version': 1, 'width': width, 'height': height,
+                         'background': background})
+        self.snapshot(0.0)  # Empty canvas before the first event
+    
+    def write_line(self, value):
+        """Append one JSON line, returns its byte offset"""
+        offset = self.file.tell()
+        self.file.write(json.dumps(value, separators=(",", ":")).encode() + b"\n")
+        return offset
+    
+    def write(self, event):
+        self.items = apply_trace_event(self.items, event)
+        self.write_line(event)
+        self.since_snapshot += 1
+        if event[0] == 'frame':
+            self.frames += 1
+            self.duration = max(self.duration, event[1])
+            if self.since_snapshot >= max(self.snapshot_every, len(self.items)):
+                self.snapshot(event[1])
+    
+    def snapshot(self, elapsed):
+        """Every live item as of the frame at `elapsed`"""
+        items = [[item_id, *item] for item_id, item in self.items.items()]
+        self.snapshots.append((elapsed, self.write_line(['snapshot', elapsed, items])))
+        self.since_snapshot = 0
+    
+    def close(self):
+        """Write the index and its offset, then close the file"""
+        buckets = []
+        latest = 0
+        for bucket in range(int(self.duration // self.bucket) + 1):
+            while latest + 1 < len(self.snapshots) and self.snapshots[latest + 1][0] <= bucket * self.bucket:
+                latest += 1
+            buckets.append(latest)
+        offset = self.write_line({'bucket': self.bucket, 'frames': self.frames, 'duration': self.duration,
+                                  'snapshots': self.snapshots, 'buckets': buckets})
+        self.file.write(b"%020d\n" % offset)
+        self.file.close()
+
+
+class IndexedTrace:
+    """
+    Random access into an indexed trace through a memory map
+    
+    frame_at() looks up the time bucket, starts from the last snapshot
+    before the requested moment and replays at most a snapshot interval of
+    events, so a seek costs the same anywhere in the run.
+    """
+    
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.map = None
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            header = json.loads(self.map.readline())
+            self.index_offset = int(self.map[-21:-1])
+            self.index = json.loads(self.line_at(self.index_offset))
+        except (ValueError, OSError):
+            header = None  # Empty, not JSON lines, or the run died before the index was written
+        if not isinstance(header, dict) or header.get('format') != TRACE_FORMAT:
+            self.close()
+            raise ValueError(f"{path}: not an indexed trace, or not closed properly")
+        self.width = header['width']
+        self.height = header['height']
+        self.background = header['background']
+        self.duration = self.index['duration']
+        self.frames = self.index['frames']
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+    
+    def line_at(self, offset):
+        return self.map[offset:self.map.find(b"\n", offset)]
+    
+    def lines_from(self, offset):
+        """Parsed lines from `offset` up to the index"""
+        while offset < self.index_offset:
+            end = self.map.find(b"\n", offset)
+            yield json.loads(self.map[offset:end])
+            offset = end + 1
+    
+    def events(self):
+        """Every recorded event in order, without the snapshots"""
+        header_end = self.map.find(b"\n") + 1
+        return (event for event in self.lines_from(header_end) if event[0] != 'snapshot')
+    
+    def snapshot_before(self, elapsed):
+        """(time, byte offset) of the last snapshot at or before `elapsed`"""
+        snapshots = self.index['snapshots']
+        buckets = self.index['buckets']
+        latest = buckets[min(max(0, int(elapsed // self.index['bucket'])), len(buckets) - 1)]
+        while latest + 1 < len(snapshots) and snapshots[latest + 1][0] <= elapsed:
+            latest += 1
+        return snapshots[latest]
+    
+    def frame_at(self, elapsed):
+        """(time, items in drawing order) of the last frame shown at or before `elapsed`"""
+        shown_at, offset = self.snapshot_before(elapsed)
+        lines = self.lines_from(offset)
+        _, _, snapshot = next(lines)
+        items = {item_id: tuple(item) for item_id, *item in snapshot}
+        pending = []  # Events since the last frame, applied only if the next frame is still in time
+        for event in lines:
+            if event[0] == 'frame':
+                if event[1] > elapsed:
+                    break
+                for change in pending:
+                    items = apply_trace_event(items, change)
+                pending = []
+                shown_at = event[1]
+            elif event[0] != 'snapshot':
+                pending.append(event)
+        return shown_at, list(items.values())
+
+
+def draw_trace_items(canvas, items):
+    """Put one trace frame on a Tk canvas"""
+    canvas.delete("all")
+    for item_type, coords, options, tags in items:
+        if item_type == 'image':
+            continue  # Raster images are not part of traces
+        getattr(canvas, f"create_{item_type}")(*coords, tags=tags, **options)
+
+
+def tk_font(options):
+    """(family, size in points, bold?) from a Tk font option"""
+    font = options.get('font') or ["Helvetica", 10]
+    return font[0], font[1] if len(font) > 1 else 10, len(font) > 2 and "bold" in font[2]
+
+
+def svg_escape(text):
+    return str(text).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+# Tk anchor -> (SVG text-anchor, line offset factor for multi-line text)
+SVG_ANCHORS = {
+    'center': ('middle', -0.5), 'n': ('middle', 0), 's': ('middle', -1),
+    'w': ('start', -0.5), 'e': ('end', -0.5),
+    'nw': ('start', 0), 'ne': ('end', 0), 'sw': ('start', -1), 'se': ('end', -1)
+}
+
+
+def frame_to_svg(items, width, height, background):
+    """One frame of canvas items as an SVG document"""
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+             f'viewBox="0 0 {width} {height}">',
+             f'<rect width="{width}" height="{height}" fill="{background}"/>']
+    
+    for item_type, coords, options, _ in items:
+        fill = options.get('fill', 'black' if item_type in ('line', 'text') else '') or 'none'
+        outline = options.get('outline', 'black') or 'none'
+        stroke_width = options.get('width', 1)
+        dash = f' stroke-dasharray="{",".join(str(d) for d in options["dash"])}"' if options.get('dash') else ''
+        
+        if item_type == 'rectangle':
+            x0, y0, x1, y1 = coords
+            parts.append(f'<rect x="{min(x0, x1)}" y="{min(y0, y1)}" width="{abs(x1 - x0)}" height="{abs(y1 - y0)}" '
+                         f'fill="{fill}" stroke="{outline}" stroke-width="{stroke_width}"{dash}/>')
+        elif item_type == 'oval':
+            x0, y0, x1, y1 = coords
+            parts.append(f'<ellipse cx="{(x0 + x1) / 2}" cy="{(y0 + y1) / 2}" rx="{abs(x1 - x0) / 2}" '
+                         f'ry="{abs(y1 - y0) / 2}" fill="{fill}" stroke="{outline}" stroke-width="{stroke_width}"/>')
+        elif item_type == 'line':
+            points = " ".join(f"{coords[i]},{coords[i + 1]}" for i in range(0, len(coords) - 1, 2))
+            parts.append(f'<polyline points="{points}" fill="none" stroke="{fill}" '
+                         f'stroke-width="{stroke_width}"{dash}/>')
+        elif item_type == 'text':
+            family, size, bold = tk_font(options)
+            text_anchor, offset = SVG_ANCHORS.get(options.get('anchor', 'center'), ('middle', -0.5))
+            lines = str(options.get('text', '')).split("\n")
+            line_height = size * 1.33 * 1.2  # Points to pixels, plus leading
+            top = coords[1] + offset * line_height * len(lines) + line_height / 2
+            weight = ' font-weight="bold"' if bold else ''
+            spans = "".join(f'<tspan x="{coords[0]}" y="{top + i * line_height}">{svg_escape(line)}</tspan>'
+                            for i, line in enumerate(lines))
+            parts.append(f'<text font-family="{family}" font-size="{size * 1.33:.1f}"{weight} fill="{fill}" '
+                         f'text-anchor="{text_anchor}" dominant-baseline="central">{spans}</text>')
+        # Raster images (heatmap) are not part of traces
+    
+    parts.append('</svg>')
+    return "\n".join(parts)
+
+
+# Tk anchor -> Pillow anchor
+PIL_ANCHORS = {'center': 'mm', 'n': 'mt', 's': 'mb', 'w': 'lm', 'e': 'rm',
+               'nw': 'lt', 'ne': 'rt', 'sw': 'lb', 'se': 'rb'}
+
+
+def frame_to_image(items, width, height, background):
+    """One frame of canvas items as a Pillow image"""
+    from PIL import Image, ImageDraw, ImageFont
+    
+    image = Image.new('RGB', (width, height), background)
+    draw = ImageDraw.Draw(image)
+    fonts = {}
+    
+    for item_type, coords, options, _ in items:
+        fill = options.get('fill', 'black' if item_type in ('line', 'text') else '') or None
+        outline = options.get('outline', 'black') or None
+        stroke_width = int(options.get('width', 1))
+        
+        if item_type in ('rectangle', 'oval'):
+            x0, y0, x1, y1 = coords
+            box = [min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)]
+            shape = draw.rectangle if item_type == 'rectangle' else draw.ellipse
+            shape(box, fill=fill, outline=outline, width=stroke_width)
+        elif item_type == 'line':
+            draw.line(coords, fill=fill, width=stroke_width)
+        elif item_type == 'text':
+            _, size, _ = tk_font(options)
+            pixels = round(size * 1.33)
+            if pixels not in fonts:
+                try:
+                    fonts[pixels] = ImageFont.load_default(pixels)
+                except TypeError:  # Pillow < 10.1 has one bitmap size
+                    fonts[pixels] = ImageFont.load_default()
+            lines = str(options.get('text', '')).split("\n")
+            anchor = PIL_ANCHORS.get(options.get('anchor', 'center'), 'mm')
+            line_height = pixels * 1.2
+            _, offset = SVG_ANCHORS.get(options.get('anchor', 'center'), ('middle', -0.5))
+            top = coords[1] + offset * line_height * len(lines) + line_height / 2
+            for i, line in enumerate(lines):
+                draw.text((coords[0], top + i * line_height), line, fill=fill, font=fonts[pixels],
+                          anchor=anchor[0] + 'm')
+    
+    return image
+
+
+def render_trace(trace, out_path, fmt="svg"):
+    """
+    Render a recorded trace
+    
+    fmt "svg" writes one SVG file per frame into the out_path directory,
+    "gif" and "png" (APNG) write one animated file and need Pillow.
+    Returns the written paths.
+    """
+    width, height, background = trace['width'], trace['height'], trace['background']
+    frames = list(trace_frames(trace))
+    
+    if fmt == "svg":
+        os.makedirs(out_path, exist_ok=True)
+        paths = []
+        for i, (_, items) in enumerate(frames):
+            path = os.path.join(out_path, f"frame_{i:03d}.svg")
+            with open(path, 'w') as f:
+                f.write(frame_to_svg(items, width, height, background))
+            paths.append(path)
+        return paths
+    
+    try:
+        import PIL  # noqa: F401 - only needed for raster output
+    except ImportError:
+        raise RuntimeError("GIF/APNG output needs Pillow: pip install pillow")
+    
+    images = [frame_to_image(items, width, height, background) for _, items in frames]
+    # Each frame stays up until the next one, the last one for 2 seconds
+    times = [elapsed for elapsed, _ in frames]
+    durations = [max(50, int((later - earlier) * 1000)) for earlier, later in zip(times, times[1:])] + [2000]
+    images[0].save(out_path, format="GIF" if fmt == "gif" else "PNG", save_all=True,
+                   append_images=images[1:], duration=durations, loop=0)
+    return [out_path]
+
+
+def render_scenario(scenario, out_dir, formats=("svg",)):
+    """Record one scenario offscreen and render it (runs in a worker process)"""
+    name = scenario.get('name') or "{demo}_c{num_clients}_a{max_attempts}".format(**scenario)
+    random.seed(scenario.get('seed', name))  # Same scenario, same pictures
+    
+    demo = OffscreenDemo(scenario.get('width', 780), scenario.get('height', 450), scenario.get('workload', "Burst"))
+    trace = demo.record(scenario['demo'], scenario.get('base_wait', 1), scenario['num_clients'],
+                        scenario['max_attempts'])
+    
+    paths = []
+    for fmt in formats:
+        target = os.path.join(out_dir, name if fmt == "svg" else f"{name}.{fmt}")
+        paths.extend(render_trace(trace, target, fmt))
+    return paths
+
+
+def render_scenarios(scenarios, out_dir, formats=("svg",), workers=None):
+    """Render many scenarios in parallel worker processes, returns all written paths"""
+    os.makedirs(out_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = [pool.submit(render_scenario, scenario, out_dir, formats) for scenario in scenarios]
+        return [path for job in jobs for path in job.result()]
+
+
+def render_cli(args):
+    """Batch-render scenarios (or one recorded trace) without a display"""
+    formats = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip()]
+    start = time.perf_counter()
+    
+    if args.trace:
+        trace = load_trace(args.trace)
+        name = os.path.splitext(os.path.basename(args.trace))[0]
+        os.makedirs(args.render, exist_ok=True)
+        paths = []
+        for fmt in formats:
+            target = os.path.join(args.render, name if fmt == "svg" else f"{name}.{fmt}")
+            paths.extend(render_trace(trace, target, fmt))
+    else:
+        scenarios = [
+            {'demo': demo, 'num_clients': clients, 'max_attempts': attempts, 'base_wait': args.base_wait}
+            for demo in args.demos.split(",")
+            for clients in (int(c) for c in args.clients.split(","))
+            for attempts in (int(a) for a in args.attempts.split(","))
+        ]
+        print(f"Rendering {len(scenarios)} scenarios as {', '.join(formats)}...")
+        paths = render_scenarios(scenarios, args.render, formats, args.workers)
+    
+    print(f"Wrote {len(paths)} files to {args.render} in {time.perf_counter() - start:.1f}s")
+
+
+def batch_cli(args):
+    """Run a directory of scenario files and print the summary"""
+    paths = scenario_files(args.batch)
+    start = time.perf_counter()
+    print(f"Running {len(paths)} scenarios...")
+    rows = run_scenario_batch(paths, args.out, args.workers, args.force)
+    
+    for row in rows:
+        label = row['policy'] if row['admission'] is None else f"{row['admission']} / {row['policy']}"
+        print(f"{row['scenario']} [{row['hash']}] {label}: {row['success_rate']:.1%} success, "
+              f"{row['amplification']:.2f} req/client, p99 {row['p99_latency']:.2f}s")
+    
+    # Strategy x policy grids for scenarios with [[admissions]]
+    matrices = {}
+    for row in rows:
+        if row['admission'] is not None:
+            matrices.setdefault(row['scenario'], []).append(row)
+    for name, matrix in matrices.items():
+        for column, title, fmt in (("goodput", "goodput (req/s)", "{:.1f}"), ("p99_latency", "p99 latency (s)", "{:.2f}")):
+            print(f"\n{name}: {title}, server strategy x client policy")
+            print("\n".join(admission_table(matrix, column, fmt)))
+    print(f"Results in {args.out} ({time.perf_counter() - start:.1f}s)")
+
+
+def calibrate_cli(args):
+    """Fit the server model to an access log and print it as a scenario [server] table"""
+    start = time.perf_counter()
+    calibration = calibrate_server(args.calibrate, args.window, latency_scale=args.latency_scale)
+    print(f"# {calibration['requests']} requests over {calibration['windows']} windows of {args.window:g}s, "
+          f"peak {calibration['peak_load']:.0f}/s, {calibration['failure_rate']:.1%} failed")
+    print(f"# Failure bands explain {calibration['explained']:.0%} of the variation between windows "
+          f"({time.perf_counter() - start:.1f}s)")
+    alternatives = calibration['alternatives']
+    if len(alternatives) > 1:
+        print(f"# Capacity is not identifiable from this log: {', '.join(f'{c:.4g}' for c in alternatives)} "
+              f"fit equally well; picked the one closest to the default failure curve")
+    print(server_table(calibration))
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Exponential Backoff Demo")
+    parser.add_argument("--render", metavar="OUT_DIR", help="render scenarios offscreen instead of opening the window")
+    parser.add_argument("--trace", metavar="FILE", help="with --render: render this recorded trace instead")
+    parser.add_argument("--demos", default="comparison,with_jitter,graph",
+                        help=f"comma-separated, any of: {', '.join(OFFSCREEN_DEMOS)}")
+    parser.add_argument("--clients", default="10,50,100,200,500", help="comma-separated client counts")
+    parser.add_argument("--attempts", default="5", help="comma-separated max attempts")
+    parser.add_argument("--base-wait", type=float, default=1.0)
+    parser.add_argument("--formats", default="svg", help="comma-separated: svg (frames), gif, png (APNG)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--batch", metavar="PATH", help="run a scenario file or a directory of them headless")
+    parser.add_argument("--out", default="results", help="with --batch: where results go, one JSON per scenario hash")
+    parser.add_argument("--force", action="store_true", help="with --batch: rerun scenarios that already have results")
+    parser.add_argument("--calibrate", metavar="LOG", help="fit the server model to an access log or CSV of "
+                                                           "timestamp,status,latency and print its [server] table")
+    parser.add_argument("--window", type=float, default=1.0, help="with --calibrate: seconds per load measurement")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="with --calibrate: multiply latencies by this to get seconds (0.001 for ms)")
+    args = parser.parse_args()
+    
+    if args.render:
+        render_cli(args)
+        return
+    if args.batch:
+        batch_cli(args)
+        return
+    if args.calibrate:
+        calibrate_cli(args)
+        return
+    
     root = tk.Tk()
     app = ExponentialBackoffDemo(root)
+    root.protocol("WM_DELETE_WINDOW", app.close_pane)  # Finish any trace being recorded
     
     # Center window
     root.update_idletasks()